@@ -0,0 +1,28 @@
+"""
+Benchmark the startup time of the `optiml.ml.svm` package import in a fresh
+interpreter, against the previous eager import of matplotlib, cvxpy, qpsolvers
+and the autograd derivatives at package load, which is emulated by importing
+them beforehand.
+
+    python benchmarks/bench_import_time.py
+"""
+
+import statistics
+import subprocess
+import sys
+
+EAGER = ('import matplotlib.pyplot, mpl_toolkits.mplot3d.art3d, cvxpy, qpsolvers; '
+         'from autograd import jacobian, hessian, make_hvp; ')
+
+
+def import_time(setup='', repeat=7):
+    code = ('import time; tic = time.perf_counter(); ' + setup +
+            'import optiml.ml.svm; print(time.perf_counter() - tic)')
+    return [float(subprocess.check_output([sys.executable, '-c', code])) for _ in range(repeat)]
+
+
+if __name__ == '__main__':
+    for name, setup in (('eager', EAGER), ('lazy', '')):
+        times = import_time(setup)
+        print(f'{name}: {statistics.median(times) * 1e3:8.1f} ms median, '
+              f'{min(times) * 1e3:8.1f} ms best')
@@ -0,0 +1,38 @@
+"""
+Benchmark the solvers of the linear systems of the Lagrangian dual relaxation,
+i.e., the factorization of Q computed once by the 'cholesky' and 'eigh' solvers
+against the 'lsqr' solver from scratch for each lambda, on the DualSVC problems.
+
+    python benchmarks/bench_lagrangian_dual.py
+"""
+
+import time
+
+import numpy as np
+from sklearn.datasets import make_classification
+
+from optiml.ml.svm.kernels import gaussian, linear
+from optiml.opti import Quadratic
+from optiml.opti.constrained import LagrangianBoxConstrainedQuadratic
+
+if __name__ == '__main__':
+    n_evals = 100
+
+    for n_samples in (500, 1000, 2000):
+        X, y = make_classification(n_samples=n_samples, n_features=20, random_state=1)
+        y = np.where(y == 1, 1., -1.)
+        lmbdas = np.random.RandomState(0).uniform(size=(n_evals, 2 * n_samples))
+
+        for name, kernel in (('gaussian', gaussian), ('linear', linear)):
+            quad = Quadratic(kernel(X) * np.outer(y, y), -np.ones(n_samples))
+            print(f'{name} kernel, {n_samples} samples')
+            for solver in ('lsqr', 'cholesky', 'eigh'):
+                tic = time.perf_counter()
+                dual = LagrangianBoxConstrainedQuadratic(quad, np.ones(n_samples), solver=solver)
+                factorization = time.perf_counter() - tic
+                tic = time.perf_counter()
+                for lmbda in lmbdas:
+                    dual.function_and_jacobian(lmbda)
+                elapsed = time.perf_counter() - tic
+                print(f'\t{solver:>8} ({dual.solver:>8}): {factorization * 1e3:8.1f} ms factorization, '
+                      f'{elapsed / n_evals * 1e3:8.2f} ms per evaluation')
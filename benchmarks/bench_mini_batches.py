@@ -0,0 +1,75 @@
+"""
+Benchmark the memory allocated per epoch by the mini batch iteration of the
+stochastic optimizers, i.e., the new batch arrays and the peak of the memory
+traced by tracemalloc, against the previous slicing of contiguous blocks in
+shuffled order and against the plain fancy indexing of a permutation.
+
+    python benchmarks/bench_mini_batches.py
+"""
+
+import time
+import tracemalloc
+
+import numpy as np
+
+from optiml.opti import OptimizationFunction
+from optiml.opti.unconstrained.stochastic import StochasticGradientDescent
+
+
+class LeastSquares(OptimizationFunction):
+
+    def __init__(self, X, y):
+        super().__init__(X.shape[1])
+        self.X = X
+        self.y = y
+
+    def args(self):
+        return self.X, self.y
+
+
+def sliced_blocks(X, y, batch_size, random_state):
+    # contiguous blocks visited in shuffled order, i.e., samples are never reshuffled within a block
+    n_batches = int(np.ceil(X.shape[0] / batch_size))
+    while True:
+        for i in random_state.permutation(n_batches):
+            yield X[i * batch_size:(i + 1) * batch_size], y[i * batch_size:(i + 1) * batch_size]
+
+
+def fancy_indexed(X, y, batch_size, random_state):
+    while True:
+        idx = random_state.permutation(X.shape[0])
+        for start in range(0, X.shape[0], batch_size):
+            batch_idx = idx[start:start + batch_size]
+            yield X[batch_idx], y[batch_idx]
+
+
+def profile(batches, n_batches, epochs=5):
+    for epoch in range(epochs):
+        tracemalloc.start()
+        new_arrays = 0
+        tic = time.perf_counter()
+        for _ in range(n_batches):
+            X_batch, _ = next(batches)
+            # views of the data or of a reused buffer do not own their memory
+            new_arrays += X_batch.flags.owndata
+        elapsed = time.perf_counter() - tic
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        yield epoch, new_arrays, peak, elapsed
+
+
+if __name__ == '__main__':
+    n_samples, n_features, batch_size = 100000, 100, 256
+    X = np.random.RandomState(0).standard_normal((n_samples, n_features))
+    y = np.random.RandomState(1).standard_normal(n_samples)
+
+    opt = StochasticGradientDescent(f=LeastSquares(X, y), x=np.zeros(n_features),
+                                    batch_size=batch_size, random_state=0)
+
+    for name, batches in (('sliced blocks', sliced_blocks(X, y, batch_size, np.random.RandomState(0))),
+                          ('fancy indexed', fancy_indexed(X, y, batch_size, np.random.RandomState(0))),
+                          ('np.take(out=)', opt.batches)):
+        print(name)
+        for epoch, new_arrays, peak, elapsed in profile(batches, opt.n_batches):
+            print(f'\tepoch {epoch}: {new_arrays:4d} new batch arrays, '
+                  f'{peak / 2 ** 10:8.1f} KB traced peak, {elapsed * 1e3:6.1f} ms')
@@ -0,0 +1,47 @@
+import os
+
+import numpy as np
+import scipy.sparse as sp
+from sklearn.model_selection import train_test_split
+
+
+def load_data(X):
+    """
+    Return X itself or, if X is the path of a .npy file, a read-only memory map
+    of it, so that the data are loaded from the disk only when they are used.
+    :param X: an array-like or the path of a .npy file.
+    :return:  X or the memory map of the .npy file.
+    """
+    if isinstance(X, (str, os.PathLike)):
+        return np.load(X, mmap_mode='r')
+    return X
+
+
+def as_dtype(X, dtype):
+    """
+    Return X converted to dtype, without copying it if it is already of that type,
+    e.g., a memory map, which is kept as it is, or a sparse matrix.
+    :param X: an array-like or a sparse matrix.
+    :param dtype: the numpy floating type.
+    :return: X as an array or a sparse matrix of the given type.
+    """
+    if not sp.issparse(X):
+        X = np.asanyarray(X)
+    return X.astype(dtype, copy=False)
+
+
+def split_train_val(X, y, validation_split, stratify=None, random_state=None):
+    """
+    Split the data into a training and a validation set like train_test_split but,
+    if X is memory-mapped, the validation set is made of the last validation_split
+    fraction of the samples and both the sets are views of the memory map, so that
+    the data are never copied in memory.
+    :return: X_train, X_val, y_train, y_val
+    """
+    if isinstance(X, np.memmap):
+        n_train = X.shape[0] - int(np.ceil(validation_split * X.shape[0]))
+        return X[:n_train], X[n_train:], y[:n_train], y[n_train:]
+    return train_test_split(X, y,
+                            stratify=stratify,
+                            test_size=validation_split,
+                            random_state=random_state)
@@ -0,0 +1,49 @@
+from ..opti.unconstrained.stochastic import StochasticOptimizer
+
+
+def partial_fit_epoch(model, X, y, make_loss, make_x):
+    """
+    Update the model with a single epoch of its stochastic optimizer over the given
+    chunk of data, going on with the state of the optimizer from the previous calls,
+    i.e., the current point, the last step and the moment estimates of the adaptive
+    methods, so that the model can be trained on datasets larger than memory.
+    :param model:     the model, e.g., a PrimalSVM or a NeuralNetwork, whose optimizer
+                      is either a StochasticOptimizer class or an instance of it.
+    :param X:         the chunk of the data matrix, already of the model dtype.
+    :param y:         the chunk of the target values, already of the model dtype.
+    :param make_loss: the function returning the loss of the model over X and y,
+                      only called at the first call.
+    :param make_x:    the function returning the starting point of the optimizer,
+                      only called at the first call.
+    :return:          the updated model.
+    """
+    optimizer = model.optimizer if isinstance(model.optimizer, type) else type(model.optimizer)
+    if not issubclass(optimizer, StochasticOptimizer):
+        raise TypeError('partial_fit is only available for stochastic optimizers')
+    if model.validation_split:
+        raise ValueError('partial_fit does not support validation_split')
+
+    if isinstance(model.optimizer, StochasticOptimizer):
+        model.loss.X, model.loss.y = X, y
+        model.optimizer.reset_batches()
+    else:
+        model.loss = make_loss(X, y)
+        model.optimizer = model.optimizer(f=model.loss,
+                                          x=make_x(),
+                                          step_size=model.learning_rate,
+                                          epochs=1,
+                                          batch_size=model.batch_size,
+                                          momentum_type=model.momentum_type,
+                                          momentum=model.momentum,
+                                          callback=model._store_train_val_info,
+                                          callback_args=(None, None),
+                                          shuffle=model.shuffle,
+                                          random_state=model.random_state,
+                                          verbose=model.verbose,
+                                          dtype=model.dtype)
+
+    model.optimizer.minimize_epoch()
+
+    model._unpack(model.optimizer.x)
+
+    return model
@@ -5,8 +5,9 @@ import autograd.numpy as np
 from sklearn.base import BaseEstimator, RegressorMixin, ClassifierMixin
 from sklearn.exceptions import ConvergenceWarning
 from sklearn.metrics import accuracy_score
-from sklearn.model_selection import train_test_split
 
+from .._data import load_data, as_dtype, split_train_val
+from .._partial_fit import partial_fit_epoch
 from .activations import sigmoid, linear, softmax
 from .layers import Layer, ParamLayer
 from .losses import (CategoricalCrossEntropy, SparseCategoricalCrossEntropy,
@@ -34,7 +35,8 @@ class NeuralNetwork(BaseEstimator, Layer, ABC):
                  patience=5,
                  shuffle=True,
                  random_state=None,
-                 verbose=False):
+                 verbose=False,
+                 dtype=np.float64):
         self.layers = layers
         if not issubclass(loss, NeuralNetworkLoss):
             raise TypeError(f'{loss} is not an allowed neural network loss function')
@@ -55,6 +57,7 @@ class NeuralNetwork(BaseEstimator, Layer, ABC):
         self.shuffle = shuffle
         self.random_state = random_state
         self.verbose = verbose
+        self.dtype = dtype
         if issubclass(self.optimizer, StochasticOptimizer):
             self.train_loss_history = []
             self.train_score_history = []
@@ -73,18 +76,18 @@ class NeuralNetwork(BaseEstimator, Layer, ABC):
         return X
 
     def backward(self, delta):
-        coef_grads = []
-        inter_grads = []
-        # back propagate
+        # back propagate, each layer writing its gradients in place into the flat gradient
         for layer in self.layers[::-1]:
             if isinstance(layer, ParamLayer):
                 delta, grads = layer.backward(delta)
-                coef_grads.append(grads['dW'] + layer.coef_reg.jacobian(layer.coef_) / layer._X.shape[0])
-                if layer.fit_intercept:
-                    inter_grads.append(grads['db'] + layer.inter_reg.jacobian(layer.inter_) / layer._X.shape[0])
+                # the regularization terms are added only if they are not null
+                if layer.coef_reg.lmbda:
+                    grads['dW'] += layer.coef_reg.jacobian(layer.coef_) / layer._X.shape[0]
+                if layer.fit_intercept and layer.inter_reg.lmbda:
+                    grads['db'] += layer.inter_reg.jacobian(layer.inter_) / layer._X.shape[0]
             else:
                 delta = layer.backward(delta)
-        return coef_grads[::-1], inter_grads[::-1]
+        return self._packed_grads
 
     @property
     def coefs_(self):
@@ -98,6 +101,20 @@ class NeuralNetwork(BaseEstimator, Layer, ABC):
         return np.hstack([w.ravel() for w in coefs + intercepts])
 
     def _unpack(self, packed_coef_inter):
+        if isinstance(packed_coef_inter, np.ndarray):
+            # the layers hold views of the flat parameter buffer, so it is just overwritten
+            if packed_coef_inter is not self._packed_coef_inter:
+                np.copyto(self._packed_coef_inter, packed_coef_inter)
+            if not self._params_bound:
+                self._set_params(self._packed_coef_inter)
+                self._params_bound = True
+        else:
+            # e.g., an autograd box, which would lose its trace if copied into the
+            # buffer, so the layers get the slices of the flat vector itself
+            self._set_params(packed_coef_inter)
+            self._params_bound = False
+
+    def _set_params(self, packed_coef_inter):
         coef_idx = 0
         inter_idx = 0
         for layer in self.layers:
@@ -106,7 +123,7 @@ class NeuralNetwork(BaseEstimator, Layer, ABC):
                 layer.coef_ = np.reshape(packed_coef_inter[start:end], shape)
                 if layer.fit_intercept:
                     start, end = self.inter_idx[inter_idx]
-                    layer.inter_ = packed_coef_inter[start:end]
+                    layer.inter_ = np.reshape(packed_coef_inter[start:end], layer.inter_.shape)
                     inter_idx += 1
                 coef_idx += 1
 
@@ -128,6 +145,27 @@ class NeuralNetwork(BaseEstimator, Layer, ABC):
                 end = start + fan_out
                 self.inter_idx.append((start, end))
                 start = end
+        # allocate the flat parameter and gradient buffers once and move the
+        # parameters of the layers into them, so that the layers hold views of
+        # the buffers and a training step never packs nor unpacks them
+        self._packed_coef_inter = np.empty(start, dtype=self.dtype)
+        self._packed_grads = np.empty(start, dtype=self.dtype)
+        coef_idx = 0
+        inter_idx = 0
+        for layer in self.layers:
+            if isinstance(layer, ParamLayer):
+                start, end, shape = self.coef_idx[coef_idx]
+                coef = self._packed_coef_inter[start:end].reshape(shape)
+                coef_grad = self._packed_grads[start:end].reshape(shape)
+                inter = inter_grad = None
+                if layer.fit_intercept:
+                    start, end = self.inter_idx[inter_idx]
+                    inter = self._packed_coef_inter[start:end].reshape(layer.inter_.shape)
+                    inter_grad = self._packed_grads[start:end].reshape(layer.inter_.shape)
+                    inter_idx += 1
+                layer._bind(coef, inter, coef_grad, inter_grad)
+                coef_idx += 1
+        self._params_bound = True
 
     def _store_train_val_info(self, opt, X_batch, y_batch, X_val, y_val):
         self._avg_epoch_loss += opt.f_x * X_batch.shape[0]
@@ -181,7 +219,21 @@ class NeuralNetwork(BaseEstimator, Layer, ABC):
 
                 raise StopIteration
 
+    def _check_targets(self, y, partial=False):
+        return y
+
     def fit(self, X, y):
+        """
+        Fit the model to the data.
+        :param X: ([n_samples x n_features] real matrix, or the path of a .npy file which is
+                  memory-mapped): the data matrix.
+        :param y: ([n_samples] or [n_samples x n_targets] real matrix, or the path of a .npy file
+                  which is memory-mapped): the target values.
+        :return:  the fitted model.
+        """
+        # the data are copied only if they are not of the given dtype yet
+        X = as_dtype(load_data(X), self.dtype)
+        y = self._check_targets(as_dtype(load_data(y), self.dtype))
 
         self._store_meta_info()
 
@@ -208,15 +260,17 @@ class NeuralNetwork(BaseEstimator, Layer, ABC):
                 # don't stratify in multi-label classification
                 should_stratify = isinstance(self, NeuralNetworkClassifier) and self.layers[-1].fan_out == 1
                 stratify = y if should_stratify else None
-                X, X_val, y, y_val = train_test_split(X, y,
-                                                      stratify=stratify,
-                                                      test_size=self.validation_split,
-                                                      random_state=self.random_state)
+                X, X_val, y, y_val = split_train_val(X, y,
+                                                     validation_split=self.validation_split,
+                                                     stratify=stratify,
+                                                     random_state=self.random_state)
             else:
                 X_val = None
                 y_val = None
 
-            self.loss = self.loss(self, X, y)
+            # the stochastic optimizers use the gradient only within a step, so it
+            # is not copied out of the flat gradient buffer of the network
+            self.loss = self.loss(self, X, y, copy_jacobian=False)
             self.optimizer = self.optimizer(f=self.loss,
                                             x=packed_coef_inter,
                                             step_size=self.learning_rate,
@@ -228,12 +282,36 @@ class NeuralNetwork(BaseEstimator, Layer, ABC):
                                             callback_args=(X_val, y_val),
                                             shuffle=self.shuffle,
                                             random_state=self.random_state,
-                                            verbose=self.verbose).minimize()
+                                            verbose=self.verbose,
+                                            dtype=self.dtype).minimize()
 
         self._unpack(self.optimizer.x)
 
         return self
 
+    def partial_fit(self, X, y):
+        """
+        Update the model with a single epoch of the stochastic optimizer over the given
+        chunk of data. The state of the optimizer, e.g., the moment estimates of Adam or
+        the accumulated squared gradients of AdaGrad, goes on across the calls, so that
+        the model can be trained on datasets larger than memory one chunk at a time.
+        :param X: ([n_samples x n_features] real matrix, or the path of a .npy file which is
+                  memory-mapped): the chunk of the data matrix.
+        :param y: ([n_samples] or [n_samples x n_targets] real matrix, or the path of a .npy file
+                  which is memory-mapped): the chunk of the target values.
+        :return:  the updated model.
+        """
+        X = as_dtype(load_data(X), self.dtype)
+        y = self._check_targets(as_dtype(load_data(y), self.dtype), partial=True)
+
+        def make_loss(X, y):
+            self._store_meta_info()
+            return self.loss(self, X, y, copy_jacobian=False)
+
+        return partial_fit_epoch(self, X, y,
+                                 make_loss=make_loss,
+                                 make_x=lambda: self._pack(self.coefs_, self.intercepts_))
+
 
 class NeuralNetworkClassifier(ClassifierMixin, NeuralNetwork):
 
@@ -253,7 +331,8 @@ class NeuralNetworkClassifier(ClassifierMixin, NeuralNetwork):
                  patience=5,
                  shuffle=True,
                  random_state=None,
-                 verbose=False):
+                 verbose=False,
+                 dtype=np.float64):
         super().__init__(layers=layers,
                          loss=loss,
                          optimizer=optimizer,
@@ -269,7 +348,8 @@ class NeuralNetworkClassifier(ClassifierMixin, NeuralNetwork):
                          patience=patience,
                          shuffle=shuffle,
                          random_state=random_state,
-                         verbose=verbose)
+                         verbose=verbose,
+                         dtype=dtype)
 
     def _store_train_val_info(self, opt, X_batch, y_batch, X_val, y_val):
         super()._store_train_val_info(opt, X_batch, y_batch, X_val, y_val)
@@ -285,7 +365,7 @@ class NeuralNetworkClassifier(ClassifierMixin, NeuralNetwork):
                     print(' - val_acc: {: 1.4f}'.format(val_acc), end='')
             self._update_no_improvement_count(opt)
 
-    def fit(self, X, y):
+    def _check_targets(self, y, partial=False):
         if y.ndim == 1:
             y = y.reshape(-1, 1)
 
@@ -294,7 +374,8 @@ class NeuralNetworkClassifier(ClassifierMixin, NeuralNetwork):
             if self.layers[-1].activation != softmax:
                 raise ValueError(f'NeuralNetworkClassifier with {type(self.loss).__name__} loss '
                                  'function only works with softmax output layer')
-            if self.layers[-1].fan_out != n_classes:
+            # a chunk of the data may not contain all the classes
+            if self.layers[-1].fan_out < n_classes if partial else self.layers[-1].fan_out != n_classes:
                 raise ValueError('the number of neurons in the output layer must '
                                  f'be equal to the number of classes, i.e., {n_classes}')
         elif self.loss in (MeanSquaredError, BinaryCrossEntropy):
@@ -308,7 +389,7 @@ class NeuralNetworkClassifier(ClassifierMixin, NeuralNetwork):
                 raise ValueError(f'NeuralNetworkClassifier with {type(self.loss).__name__} loss '
                                  'function only works with one neuron in the output layer')
 
-        return super().fit(X, y)
+        return y
 
     def predict(self, X):
         if self.layers[-1].activation == sigmoid:
@@ -339,7 +420,7 @@ class NeuralNetworkRegressor(RegressorMixin, NeuralNetwork):
                     print(' - val_r2: {: 1.4f}'.format(val_r2), end='')
             self._update_no_improvement_count(opt)
 
-    def fit(self, X, y):
+    def _check_targets(self, y, partial=False):
         if y.ndim == 1:
             y = y.reshape(-1, 1)
 
@@ -358,7 +439,7 @@ class NeuralNetworkRegressor(RegressorMixin, NeuralNetwork):
             raise ValueError(f'the number of neurons in the output layer must be '
                              f'equal to the number of targets, i.e., {n_targets}')
 
-        return super().fit(X, y)
+        return y
 
     def predict(self, X):
         if self.layers[-1].fan_out == 1:  # one target
@@ -1,6 +1,6 @@
 from abc import ABC
 
-import numpy as np
+import autograd.numpy as np
 from autograd.scipy.special import expit
 
 
@@ -31,7 +31,7 @@ class ReLU(Activation):
         return np.maximum(0., x)
 
     def jacobian(self, x):
-        return np.where(x > 0, 1., 0.)
+        return (x > 0).astype(x.dtype)
 
 
 class Tanh(Activation):
@@ -26,19 +26,24 @@ class ParamLayer(Layer, ABC):
                  coef_reg,
                  inter_reg,
                  fit_intercept,
-                 random_state=None):
+                 random_state=None,
+                 dtype=None):
 
         if isinstance(activation, Activation):
             self.activation = activation
         else:
             raise TypeError(f'{activation} is not an allowed activation function')
 
+        # the given coef_init and inter_init are cast to dtype, if any, otherwise to float
+        self.dtype = dtype
+        init_dtype = float if dtype is None else dtype
+
         if coef_init is None:
             self.coef_ = glorot_uniform(coef_shape, random_state=random_state)
         elif callable(coef_init):
             self.coef_ = coef_init(coef_shape, random_state=random_state)
         else:
-            self.coef_ = np.asarray(coef_init, dtype=np.float).reshape(-1, 1)
+            self.coef_ = np.asarray(coef_init, dtype=init_dtype).reshape(-1, 1)
 
         self.fit_intercept = fit_intercept
         if self.fit_intercept:
@@ -49,7 +54,13 @@ class ParamLayer(Layer, ABC):
             elif callable(inter_init):
                 self.inter_ = inter_init(shape, random_state=random_state)
             else:
-                self.inter_ = np.asarray(inter_init, dtype=np.float).reshape(-1, 1)
+                self.inter_ = np.asarray(inter_init, dtype=init_dtype).reshape(-1, 1)
+
+        # the gradients are written in place into these buffers, which become views
+        # of the flat gradient of the network once the layer is bound to it
+        self._coef_grad = np.empty_like(self.coef_)
+        if self.fit_intercept:
+            self._inter_grad = np.empty_like(self.inter_)
 
         if coef_reg is None:
             self.coef_reg = l2
@@ -61,6 +72,25 @@ class ParamLayer(Layer, ABC):
         else:
             self.inter_reg = inter_reg
 
+    def _bind(self, coef, inter, coef_grad, inter_grad):
+        """
+        Move the parameters of the layer into the given views of the flat parameter
+        buffer of the network and write its gradients into the given views of the
+        flat gradient buffer, so that neither the parameters nor the gradients
+        need to be packed or unpacked at every evaluation.
+        :param coef: the view of the parameter buffer for coef_.
+        :param inter: the view of the parameter buffer for inter_, if fit_intercept.
+        :param coef_grad: the view of the gradient buffer for coef_.
+        :param inter_grad: the view of the gradient buffer for inter_, if fit_intercept.
+        """
+        coef[...] = self.coef_
+        self.coef_ = coef
+        self._coef_grad = coef_grad
+        if self.fit_intercept:
+            inter[...] = self.inter_
+            self.inter_ = inter
+            self._inter_grad = inter_grad
+
 
 class FullyConnected(ParamLayer):
 
@@ -73,7 +103,8 @@ class FullyConnected(ParamLayer):
                  coef_reg=l2,
                  inter_reg=l2,
                  fit_intercept=True,
-                 random_state=None):
+                 random_state=None,
+                 dtype=None):
         super().__init__(coef_shape=(n_in, n_out),
                          activation=activation,
                          coef_init=coef_init,
@@ -81,7 +112,8 @@ class FullyConnected(ParamLayer):
                          coef_reg=coef_reg,
                          inter_reg=inter_reg,
                          fit_intercept=fit_intercept,
-                         random_state=random_state)
+                         random_state=random_state,
+                         dtype=dtype)
         self.fan_in = n_in
         self.fan_out = n_out
 
@@ -95,9 +127,14 @@ class FullyConnected(ParamLayer):
     def backward(self, delta):
         # dW, db
         dZ = delta * self.activation.jacobian(self._WX_b)
-        grads = {'dW': self._X.T.dot(dZ)}
+        # write the product straight into the gradient buffer whenever numpy allows it
+        if self._coef_grad.dtype == np.result_type(self._X, dZ):
+            np.dot(self._X.T, dZ, out=self._coef_grad)
+        else:
+            self._coef_grad[...] = self._X.T.dot(dZ)
+        grads = {'dW': self._coef_grad}
         if self.fit_intercept:
-            grads['db'] = np.sum(dZ, axis=0, keepdims=True)
+            grads['db'] = np.sum(dZ, axis=0, keepdims=True, out=self._inter_grad)
         # dX
         dX = dZ.dot(self.coef_.T)
         return dX, grads
@@ -11,11 +11,22 @@ from ...opti import OptimizationFunction
 
 class NeuralNetworkLoss(OptimizationFunction, ABC):
 
-    def __init__(self, neural_net, X, y):
+    def __init__(self, neural_net, X, y, copy_jacobian=True):
+        """
+
+        :param neural_net: the neural network whose parameters are optimized.
+        :param X: ([n_samples x n_features] real matrix): the data matrix.
+        :param y: ([n_samples x n_targets] real matrix): the target values.
+        :param copy_jacobian: (boolean, optional, default value True): if False, the jacobian
+                              is returned as the flat gradient buffer of the network itself,
+                              which is overwritten by the next evaluation, e.g., for the
+                              optimizers which do not keep the gradients across the steps.
+        """
         super().__init__(X.shape[1])
         self.neural_net = neural_net
         self.X = X
         self.y = y
+        self.copy_jacobian = copy_jacobian
 
     def f_star(self):
         if not np.isnan(self.x_star()).all():
@@ -56,7 +67,39 @@ class NeuralNetworkLoss(OptimizationFunction, ABC):
 
         n_samples = X_batch.shape[0]
         delta = 1 / n_samples * self.delta(self.neural_net.forward(X_batch), y_batch)
-        return self.neural_net._pack(*self.neural_net.backward(delta))
+        g_x = self.neural_net.backward(delta)
+        return g_x.copy() if self.copy_jacobian else g_x
+
+    def function_and_jacobian(self, packed_coef_inter, X_batch=None, y_batch=None):
+        if X_batch is None:
+            X_batch = self.X
+        if y_batch is None:
+            y_batch = self.y
+
+        self.neural_net._unpack(packed_coef_inter)
+
+        n_samples = X_batch.shape[0]
+        y_pred = self.neural_net.forward(X_batch)
+        coef_regs = np.sum(layer.coef_reg(layer.coef_) for layer in self.neural_net.layers
+                           if isinstance(layer, ParamLayer)) / (2 * n_samples)
+        inter_regs = np.sum(layer.inter_reg(layer.inter_) for layer in self.neural_net.layers
+                            if isinstance(layer, ParamLayer) and layer.fit_intercept) / (2 * n_samples)
+        # the loss must be computed before the delta since
+        # some losses compute the delta in place on y_pred
+        f_x = 1 / (2 * n_samples) * self.loss(y_pred, y_batch) + coef_regs + inter_regs
+        delta = 1 / n_samples * self.delta(y_pred, y_batch)
+        g_x = self.neural_net.backward(delta)
+        return f_x, g_x.copy() if self.copy_jacobian else g_x
+
+    def hessian_vector_product(self, packed_coef_inter, v, X_batch=None, y_batch=None):
+        """
+        The product of the Hessian matrix of the loss with a vector, computed by autograd
+        differentiating the product of the Jacobian with v through the forward pass.
+        :param packed_coef_inter: the point at which the Hessian is to be computed.
+        :param v: the vector to be multiplied by the Hessian.
+        :return: the product of the Hessian matrix of the loss at packed_coef_inter with v.
+        """
+        return self.auto_hvp(packed_coef_inter, X_batch, y_batch)[0](v)
 
     def __call__(self, y_pred, y_true):
         return self.loss(y_pred, y_true)
@@ -114,7 +157,7 @@ class CategoricalCrossEntropy(NeuralNetworkLoss):
 
     def delta(self, y_pred, y_true):
         # according to: https://deepnotes.io/softmax-crossentropy
-        one_hot_mask = y_true.astype(np.bool)
+        one_hot_mask = y_true.astype(bool)
         y_pred[one_hot_mask] -= 1.
         return y_pred
 
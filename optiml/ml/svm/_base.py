@@ -2,14 +2,17 @@ import warnings
 from abc import ABC
 
 import numpy as np
-from qpsolvers import solve_qp
-from sklearn.base import ClassifierMixin, BaseEstimator, RegressorMixin
+from joblib import Parallel, delayed
+from sklearn.base import ClassifierMixin, BaseEstimator, RegressorMixin, clone
 from sklearn.exceptions import ConvergenceWarning
 from sklearn.linear_model._base import LinearClassifierMixin, SparseCoefMixin, LinearModel
-from sklearn.model_selection import train_test_split
+from sklearn.multiclass import _ovr_decision_function
 from sklearn.preprocessing import LabelBinarizer
+from sklearn.utils.extmath import safe_sparse_dot
 
-from .kernels import gaussian, Kernel, LinearKernel
+from .._data import load_data, as_dtype, split_train_val
+from .._partial_fit import partial_fit_epoch
+from .kernels import gaussian, Kernel, LinearKernel, KernelCache
 from .losses import squared_hinge, SVMLoss, SVCLoss, SVRLoss, epsilon_insensitive
 from .smo import SMO, SMOClassifier, SMORegression
 from ...opti import Optimizer
@@ -161,7 +164,8 @@ class PrimalSVM(SVM, ABC):
                  master_verbose=False,
                  shuffle=True,
                  random_state=None,
-                 verbose=False):
+                 verbose=False,
+                 dtype=np.float64):
         super().__init__(C=C,
                          tol=tol,
                          optimizer=optimizer,
@@ -185,6 +189,7 @@ class PrimalSVM(SVM, ABC):
         self.coef_ = np.zeros(0)
         self.intercept_ = 0.
         self.fit_intercept = fit_intercept
+        self.dtype = dtype
         if issubclass(self.optimizer, StochasticOptimizer):
             self.train_loss_history = []
             self.train_score_history = []
@@ -255,6 +260,13 @@ class PrimalSVM(SVM, ABC):
 
                 raise StopIteration
 
+    def _partial_fit(self, X, y, *loss_args):
+        X, y = as_dtype(X, self.dtype), as_dtype(y, self.dtype)
+        return partial_fit_epoch(self, X, y,
+                                 make_loss=lambda X, y: self.loss(self, X, y, *loss_args,
+                                                                  fit_intercept=self.fit_intercept),
+                                 make_x=lambda: np.zeros(self.loss.ndim))
+
 
 class DualSVM(SVM, ABC):
     """
@@ -269,6 +281,13 @@ class DualSVM(SVM, ABC):
         If none is given, 'gaussian' will be used. If a custom is given it is
         used to pre-compute the kernel matrix from data matrices; that matrix
         should be an array of shape ``(n_samples, n_samples)``.
+
+    cache_size : float, default=None
+        Specify the size of the kernel cache (in MB). Only used when ``optimizer``
+        is a subclass of `SMO`. If None, the full kernel matrix is computed before
+        training, otherwise its rows are computed on demand and the least recently
+        used ones are evicted when the cache is full, so that the memory needed is
+        bounded regardless of the number of samples.
     """
 
     def __init__(self,
@@ -284,6 +303,7 @@ class DualSVM(SVM, ABC):
                  max_f_eval=15000,
                  master_solver='ecos',
                  master_verbose=False,
+                 cache_size=None,
                  shuffle=True,
                  random_state=None,
                  verbose=False):
@@ -308,12 +328,91 @@ class DualSVM(SVM, ABC):
             raise TypeError(f'{optimizer} is not an allowed optimization method')
         self.master_solver = master_solver
         self.master_verbose = master_verbose
+        if cache_size is not None and not cache_size > 0:
+            raise ValueError('cache_size must be > 0')
+        self.cache_size = cache_size
         if isinstance(self.kernel, LinearKernel):
             self.coef_ = np.zeros(0)
         self.intercept_ = 0.
 
 
-class PrimalSVC(LinearClassifierMixin, SparseCoefMixin, PrimalSVM):
+def _fit_binary(estimator, X, y, K=None, idx=None):
+    """
+    Fit an estimator over a binary subproblem, i.e., over the samples
+    in idx if given, slicing the shared kernel matrix K accordingly.
+    """
+    if idx is not None:
+        X, y = X[idx], y[idx]
+        if K is not None:
+            K = K[np.ix_(idx, idx)]
+    y = estimator.lb.fit_transform(y).ravel()
+    if K is None:
+        return estimator._fit(X, y)
+    return estimator._fit(X, y, K)
+
+
+class MultiClassMixin:
+    """
+    Mixin class to train a SVC over more than two labels with the
+    one-vs-rest or the one-vs-one scheme, fitting the binary subproblems
+    in parallel and sharing across them the data computed just once,
+    e.g., the kernel matrix.
+    """
+
+    def _shared_kernel(self, X):
+        return None
+
+    def _fit_multi_class(self, X, y):
+        self.classes_ = self.lb.classes_
+        n_classes = len(self.classes_)
+        K = self._shared_kernel(X)
+
+        if self.multi_class == 'ovr':
+            subproblems = [((y == c).astype(int), None) for c in self.classes_]
+        else:  # ovo
+            # the positive class of the (i, j) subproblem is j as in sklearn.multiclass
+            subproblems = [((y == self.classes_[j]).astype(int),
+                            np.flatnonzero((y == self.classes_[i]) | (y == self.classes_[j])))
+                           for i in range(n_classes) for j in range(i + 1, n_classes)]
+
+        self.estimators_ = Parallel(n_jobs=self.n_jobs)(
+            delayed(_fit_binary)(clone(self), X, y_binary, K, idx) for y_binary, idx in subproblems)
+
+        return self
+
+    def _decision_function_multi_class(self, X):
+        if self.multi_class == 'ovr':
+            return np.column_stack([estimator.decision_function(X) for estimator in self.estimators_])
+        # ovo
+        predictions = np.column_stack([estimator.predict(X) for estimator in self.estimators_])
+        confidences = np.column_stack([estimator.decision_function(X) for estimator in self.estimators_])
+        return _ovr_decision_function(predictions, confidences, len(self.classes_))
+
+    def _predict_multi_class(self, X):
+        return self.classes_[self._decision_function_multi_class(X).argmax(axis=1)]
+
+
+class PrimalSVC(LinearClassifierMixin, SparseCoefMixin, MultiClassMixin, PrimalSVM):
+    """
+
+    Parameters
+    ----------
+
+    multi_class : {'ovr', 'ovo'}, default='ovr'
+        The scheme used to train the model over more than two labels, i.e.,
+        one-vs-rest or one-vs-one. Ignored for binary classification.
+
+    n_jobs : int, default=None
+        The number of jobs used to fit the binary subproblems in parallel
+        when there are more than two labels. None means 1, while -1 means
+        using all processors.
+
+    dtype : numpy floating type, default=np.float64
+        The type of the data, and of the coefficients when ``optimizer`` is a
+        subclass of `StochasticOptimizer`, e.g., np.float32 to halve the memory
+        and speed up the matrix-vector products. The data are copied only if
+        they are not of this type yet.
+    """
 
     def __init__(self,
                  C=1.,
@@ -332,9 +431,12 @@ class PrimalSVC(LinearClassifierMixin, SparseCoefMixin, PrimalSVM):
                  fit_intercept=True,
                  master_solver='ecos',
                  master_verbose=False,
+                 multi_class='ovr',
+                 n_jobs=None,
                  shuffle=True,
                  random_state=None,
-                 verbose=False):
+                 verbose=False,
+                 dtype=np.float64):
         super().__init__(C=C,
                          tol=tol,
                          loss=loss,
@@ -353,40 +455,75 @@ class PrimalSVC(LinearClassifierMixin, SparseCoefMixin, PrimalSVM):
                          master_verbose=master_verbose,
                          shuffle=shuffle,
                          random_state=random_state,
-                         verbose=verbose)
+                         verbose=verbose,
+                         dtype=dtype)
         if not issubclass(loss, SVCLoss):
             raise TypeError(f'{loss} is not an allowed LinearSVC loss function')
+        if multi_class not in ('ovr', 'ovo'):
+            raise ValueError(f'unknown multi_class type {multi_class}')
+        self.multi_class = multi_class
+        self.n_jobs = n_jobs
         self.lb = LabelBinarizer(neg_label=-1)
 
     def _store_train_val_info(self, opt, X_batch, y_batch, X_val, y_val):
         super()._store_train_val_info(opt, X_batch, y_batch, X_val, y_val)
         if opt.is_batch_end():
-            acc = self.score(X_batch[:, :-1], y_batch)
+            acc = self.score(X_batch, y_batch)
             self.train_score_history.append(acc)
             if opt.is_verbose():
                 print(' - acc: {: 1.4f}'.format(acc), end='')
             if self.validation_split:
-                val_acc = self.score(X_val[:, :-1], y_val)
+                val_acc = self.score(X_val, y_val)
                 self.val_score_history.append(val_acc)
                 if opt.is_verbose():
                     print(' - val_acc: {: 1.4f}'.format(val_acc), end='')
             self._update_no_improvement_count(opt)
 
     def fit(self, X, y):
+        X, y = load_data(X), load_data(y)
         self.lb.fit(y)
         if len(self.lb.classes_) > 2:
-            raise ValueError('use OneVsOneClassifier or OneVsRestClassifier from sklearn.multiclass '
-                             'to train a model over more than two labels')
-        y = self.lb.transform(y).ravel()
+            return self._fit_multi_class(X, y)
+        return self._fit(X, self.lb.transform(y).ravel())
+
+    def partial_fit(self, X, y, classes=None):
+        """
+        Update the model with a single epoch of the stochastic optimizer over the given
+        chunk of data, going on with the state of the optimizer from the previous calls,
+        so that the model can be trained on datasets larger than memory one chunk at a time.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_samples, n_features) or str
+            The chunk of the training data, or the path of a .npy file which is memory-mapped.
+
+        y : array-like of shape (n_samples,) or str
+            The chunk of the target values, or the path of a .npy file which is memory-mapped.
+
+        classes : array-like of shape (n_classes,), default=None
+            The labels across all the calls to partial_fit, required at the first call
+            if the first chunk does not contain them all. Only two labels are supported:
+            use `sklearn.multiclass.OneVsRestClassifier` to train over more than two.
+
+        Returns
+        -------
+        self : object
+        """
+        X, y = load_data(X), load_data(y)
+        if not hasattr(self.lb, 'classes_'):
+            self.lb.fit(y if classes is None else classes)
+        if len(self.lb.classes_) > 2:
+            raise ValueError('use sklearn.multiclass.OneVsRestClassifier '
+                             'to partial_fit a model over more than two labels')
+        return self._partial_fit(X, self.lb.transform(y).ravel())
 
-        if issubclass(self.optimizer, LineSearchOptimizer):
+    def _fit(self, X, y):
+        # the data are copied only if they are not of the given dtype yet
+        X, y = as_dtype(X, self.dtype), as_dtype(y, self.dtype)
 
-            if self.fit_intercept:
-                X_biased = np.c_[X, np.ones_like(y)]
-            else:
-                X_biased = X
+        if issubclass(self.optimizer, LineSearchOptimizer):
 
-            self.loss = self.loss(self, X_biased, y)
+            self.loss = self.loss(self, X, y, fit_intercept=self.fit_intercept)
             self.optimizer = self.optimizer(f=self.loss,
                                             x=np.zeros(self.loss.ndim),
                                             max_iter=self.max_iter,
@@ -403,12 +540,7 @@ class PrimalSVC(LinearClassifierMixin, SparseCoefMixin, PrimalSVM):
 
         elif issubclass(self.optimizer, ProximalBundle):
 
-            if self.fit_intercept:
-                X_biased = np.c_[X, np.ones_like(y)]
-            else:
-                X_biased = X
-
-            self.loss = self.loss(self, X_biased, y)
+            self.loss = self.loss(self, X, y, fit_intercept=self.fit_intercept)
             self.optimizer = self.optimizer(f=self.loss,
                                             x=np.zeros(self.loss.ndim),
                                             max_iter=self.max_iter,
@@ -424,50 +556,65 @@ class PrimalSVC(LinearClassifierMixin, SparseCoefMixin, PrimalSVM):
         elif issubclass(self.optimizer, StochasticOptimizer):
 
             if self.validation_split:
-                X, X_val, y, y_val = train_test_split(X, y,
-                                                      test_size=self.validation_split,
-                                                      random_state=self.random_state)
-
-                if self.fit_intercept:
-                    X_val_biased = np.c_[X_val, np.ones_like(y_val)]
-                else:
-                    X_val_biased = X_val
-
+                X, X_val, y, y_val = split_train_val(X, y,
+                                                     validation_split=self.validation_split,
+                                                     random_state=self.random_state)
             else:
-                X_val_biased = None
+                X_val = None
                 y_val = None
 
-            if self.fit_intercept:
-                X_biased = np.c_[X, np.ones_like(y)]
-            else:
-                X_biased = X
-
-            self.loss = self.loss(self, X_biased, y)
+            self.loss = self.loss(self, X, y, fit_intercept=self.fit_intercept)
             self.optimizer = self.optimizer(f=self.loss,
                                             x=np.zeros(self.loss.ndim),
                                             epochs=self.max_iter,
                                             step_size=self.learning_rate,
+                                            batch_size=self.batch_size,
                                             momentum_type=self.momentum_type,
                                             momentum=self.momentum,
                                             callback=self._store_train_val_info,
-                                            callback_args=(X_val_biased, y_val),
+                                            callback_args=(X_val, y_val),
                                             shuffle=self.shuffle,
                                             random_state=self.random_state,
-                                            verbose=self.verbose).minimize()
-
-        if self.fit_intercept and X.shape[1] > 1:
-            self.loss.X = X
+                                            verbose=self.verbose,
+                                            dtype=self.dtype).minimize()
 
         return self
 
     def decision_function(self, X):
-        return np.dot(X, self.coef_) + self.intercept_
+        if len(self.lb.classes_) > 2:
+            return self._decision_function_multi_class(X)
+        return safe_sparse_dot(X, self.coef_) + self.intercept_
 
     def predict(self, X):
+        if len(self.lb.classes_) > 2:
+            return self._predict_multi_class(X)
         return self.lb.inverse_transform(self.decision_function(X))
 
 
-class DualSVC(ClassifierMixin, DualSVM):
+class DualSVC(ClassifierMixin, MultiClassMixin, DualSVM):
+    """
+
+    Parameters
+    ----------
+
+    selection : {'keerthi', 'wss2'}, default='keerthi'
+        The working set selection rule used by `SMOClassifier`. If 'keerthi', the
+        pair is selected among the maximal violating ones as in Keerthi et al., if
+        'wss2' it is selected by the second order information as in LIBSVM.
+
+    shrinking : bool, default=True
+        Whether to use the shrinking heuristic. Only used when ``selection='wss2'``.
+
+    multi_class : {'ovr', 'ovo'}, default='ovr'
+        The scheme used to train the model over more than two labels, i.e.,
+        one-vs-rest or one-vs-one. The kernel matrix is computed just once and
+        shared across the binary subproblems. Ignored for binary classification.
+
+    n_jobs : int, default=None
+        The number of jobs used to fit the binary subproblems in parallel
+        when there are more than two labels. None means 1, while -1 means
+        using all processors.
+    """
 
     def __init__(self,
                  kernel=gaussian,
@@ -482,6 +629,11 @@ class DualSVC(ClassifierMixin, DualSVM):
                  max_f_eval=15000,
                  master_solver='ecos',
                  master_verbose=False,
+                 cache_size=None,
+                 selection='keerthi',
+                 shrinking=True,
+                 multi_class='ovr',
+                 n_jobs=None,
                  shuffle=True,
                  random_state=None,
                  verbose=False):
@@ -497,40 +649,72 @@ class DualSVC(ClassifierMixin, DualSVM):
                          max_f_eval=max_f_eval,
                          master_solver=master_solver,
                          master_verbose=master_verbose,
+                         cache_size=cache_size,
                          shuffle=shuffle,
                          random_state=random_state,
                          verbose=verbose)
+        if selection not in ('keerthi', 'wss2'):
+            raise ValueError(f'unknown selection type {selection}')
+        self.selection = selection
+        self.shrinking = shrinking
+        if multi_class not in ('ovr', 'ovo'):
+            raise ValueError(f'unknown multi_class type {multi_class}')
+        self.multi_class = multi_class
+        self.n_jobs = n_jobs
         self.lb = LabelBinarizer(neg_label=-1)
 
+    def _shared_kernel(self, X):
+        if self.optimizer == SMOClassifier and self.cache_size is not None:
+            return None  # each subproblem uses its own kernel cache
+        return self.kernel(X)
+
     def fit(self, X, y):
         self.lb.fit(y)
         if len(self.lb.classes_) > 2:
-            raise ValueError('use OneVsOneClassifier or OneVsRestClassifier from sklearn.multiclass '
-                             'to train a model over more than two labels')
-        y = self.lb.transform(y).ravel()
+            return self._fit_multi_class(X, y)
+        return self._fit(X, self.lb.transform(y).ravel())
 
+    def _fit(self, X, y, K=None):
         n_samples = len(y)
 
-        # kernel matrix
-        K = self.kernel(X)
+        if K is None and self.optimizer == SMOClassifier and self.cache_size is not None:
+
+            # kernel rows computed on demand, the Hessian is never built
+            K = KernelCache(self.kernel, X, self.cache_size)
+            self.obj = None
+
+        else:
+
+            # kernel matrix
+            if K is None:
+                K = self.kernel(X)
 
-        Q = K * np.outer(y, y)
-        q = -np.ones(n_samples)
+            Q = K * np.outer(y, y)
+            q = -np.ones(n_samples)
 
-        ub = np.ones(n_samples) * self.C  # upper bounds
+            ub = np.ones(n_samples) * self.C  # upper bounds
 
-        self.obj = Quadratic(Q, q)
+            self.obj = Quadratic(Q, q)
 
         if self.optimizer == SMOClassifier:
 
-            self.optimizer = SMOClassifier(self.obj, X, y, K, self.kernel, self.C,
-                                           self.tol, self.verbose).minimize()
+            self.optimizer = SMOClassifier(quad=self.obj,
+                                           X=X,
+                                           y=y,
+                                           K=K,
+                                           kernel=self.kernel,
+                                           C=self.C,
+                                           tol=self.tol,
+                                           selection=self.selection,
+                                           shrinking=self.shrinking,
+                                           verbose=self.verbose).minimize()
             alphas = self.optimizer.alphas
             if isinstance(self.kernel, LinearKernel):
                 self.coef_ = self.optimizer.w
             self.intercept_ = self.optimizer.b
 
         elif isinstance(self.optimizer, str):
+            from qpsolvers import solve_qp
 
             lb = np.zeros(n_samples)  # lower bounds
             alphas = solve_qp(P=Q,
@@ -597,11 +781,15 @@ class DualSVC(ClassifierMixin, DualSVM):
         return self
 
     def decision_function(self, X):
+        if len(self.lb.classes_) > 2:
+            return self._decision_function_multi_class(X)
         if not isinstance(self.kernel, LinearKernel):
             return np.dot(self.dual_coef_, self.kernel(self.support_vectors_, X)) + self.intercept_
-        return np.dot(X, self.coef_) + self.intercept_
+        return safe_sparse_dot(X, self.coef_) + self.intercept_
 
     def predict(self, X):
+        if len(self.lb.classes_) > 2:
+            return self._predict_multi_class(X)
         return self.lb.inverse_transform(self.decision_function(X))
 
 
@@ -627,7 +815,8 @@ class PrimalSVR(RegressorMixin, LinearModel, PrimalSVM):
                  master_verbose=False,
                  shuffle=True,
                  random_state=None,
-                 verbose=False):
+                 verbose=False,
+                 dtype=np.float64):
         super().__init__(C=C,
                          tol=tol,
                          loss=loss,
@@ -646,7 +835,8 @@ class PrimalSVR(RegressorMixin, LinearModel, PrimalSVM):
                          master_verbose=master_verbose,
                          shuffle=shuffle,
                          random_state=random_state,
-                         verbose=verbose)
+                         verbose=verbose,
+                         dtype=dtype)
         if not issubclass(loss, SVRLoss):
             raise TypeError(f'{loss} is not an allowed LinearSVR loss function')
         if not epsilon >= 0:
@@ -656,18 +846,20 @@ class PrimalSVR(RegressorMixin, LinearModel, PrimalSVM):
     def _store_train_val_info(self, opt, X_batch, y_batch, X_val, y_val):
         super()._store_train_val_info(opt, X_batch, y_batch, X_val, y_val)
         if opt.is_batch_end():
-            r2 = self.score(X_batch[:, :-1], y_batch)
+            r2 = self.score(X_batch, y_batch)
             self.train_score_history.append(r2)
             if opt.is_verbose():
                 print(' - r2: {: 1.4f}'.format(r2), end='')
             if self.early_stopping:
-                val_r2 = self.score(X_val[:, :-1], y_val)
+                val_r2 = self.score(X_val, y_val)
                 self.val_score_history.append(val_r2)
                 if opt.is_verbose():
                     print(' - val_r2: {: 1.4f}'.format(val_r2), end='')
             self._update_no_improvement_count(opt)
 
     def fit(self, X, y):
+        # the data are copied only if they are not of the given dtype yet
+        X, y = as_dtype(load_data(X), self.dtype), as_dtype(load_data(y), self.dtype)
         targets = y.shape[1] if y.ndim > 1 else 1
         if targets > 1:
             raise ValueError('use sklearn.multioutput.MultiOutputRegressor '
@@ -675,12 +867,7 @@ class PrimalSVR(RegressorMixin, LinearModel, PrimalSVM):
 
         if issubclass(self.optimizer, LineSearchOptimizer):
 
-            if self.fit_intercept:
-                X_biased = np.c_[X, np.ones_like(y)]
-            else:
-                X_biased = X
-
-            self.loss = self.loss(self, X_biased, y, self.epsilon)
+            self.loss = self.loss(self, X, y, self.epsilon, fit_intercept=self.fit_intercept)
             self.optimizer = self.optimizer(f=self.loss,
                                             x=np.zeros(self.loss.ndim),
                                             max_iter=self.max_iter,
@@ -697,12 +884,7 @@ class PrimalSVR(RegressorMixin, LinearModel, PrimalSVM):
 
         elif issubclass(self.optimizer, ProximalBundle):
 
-            if self.fit_intercept:
-                X_biased = np.c_[X, np.ones_like(y)]
-            else:
-                X_biased = X
-
-            self.loss = self.loss(self, X_biased, y, self.epsilon)
+            self.loss = self.loss(self, X, y, self.epsilon, fit_intercept=self.fit_intercept)
             self.optimizer = self.optimizer(f=self.loss,
                                             x=np.zeros(self.loss.ndim),
                                             max_iter=self.max_iter,
@@ -718,44 +900,52 @@ class PrimalSVR(RegressorMixin, LinearModel, PrimalSVM):
         elif issubclass(self.optimizer, StochasticOptimizer):
 
             if self.validation_split:
-                X, X_val, y, y_val = train_test_split(X, y,
-                                                      test_size=self.validation_split,
-                                                      random_state=self.random_state)
-
-                if self.fit_intercept:
-                    X_val_biased = np.c_[X_val, np.ones_like(y_val)]
-                else:
-                    X_val_biased = X_val
-
+                X, X_val, y, y_val = split_train_val(X, y,
+                                                     validation_split=self.validation_split,
+                                                     random_state=self.random_state)
             else:
-                X_val_biased = None
+                X_val = None
                 y_val = None
 
-            if self.fit_intercept:
-                X_biased = np.c_[X, np.ones_like(y)]
-            else:
-                X_biased = X
-
-            self.loss = self.loss(self, X_biased, y, self.epsilon)
+            self.loss = self.loss(self, X, y, self.epsilon, fit_intercept=self.fit_intercept)
             self.optimizer = self.optimizer(f=self.loss,
                                             x=np.zeros(self.loss.ndim),
                                             epochs=self.max_iter,
                                             step_size=self.learning_rate,
+                                            batch_size=self.batch_size,
                                             momentum_type=self.momentum_type,
                                             momentum=self.momentum,
                                             callback=self._store_train_val_info,
-                                            callback_args=(X_val_biased, y_val),
+                                            callback_args=(X_val, y_val),
                                             shuffle=self.shuffle,
                                             random_state=self.random_state,
-                                            verbose=self.verbose).minimize()
-
-        if self.fit_intercept and X.shape[1] > 1:
-            self.loss.X = X
+                                            verbose=self.verbose,
+                                            dtype=self.dtype).minimize()
 
         return self
 
+    def partial_fit(self, X, y):
+        """
+        Update the model with a single epoch of the stochastic optimizer over the given
+        chunk of data, going on with the state of the optimizer from the previous calls,
+        so that the model can be trained on datasets larger than memory one chunk at a time.
+
+        Parameters
+        ----------
+        X : {array-like, sparse matrix} of shape (n_samples, n_features) or str
+            The chunk of the training data, or the path of a .npy file which is memory-mapped.
+
+        y : array-like of shape (n_samples,) or str
+            The chunk of the target values, or the path of a .npy file which is memory-mapped.
+
+        Returns
+        -------
+        self : object
+        """
+        return self._partial_fit(load_data(X), load_data(y), self.epsilon)
+
     def predict(self, X):
-        return np.dot(X, self.coef_) + self.intercept_
+        return safe_sparse_dot(X, self.coef_) + self.intercept_
 
 
 class DualSVR(RegressorMixin, DualSVM):
@@ -774,6 +964,7 @@ class DualSVR(RegressorMixin, DualSVM):
                  max_f_eval=15000,
                  master_solver='ecos',
                  master_verbose=False,
+                 cache_size=None,
                  shuffle=True,
                  random_state=None,
                  verbose=False):
@@ -789,6 +980,7 @@ class DualSVR(RegressorMixin, DualSVM):
                          max_f_eval=max_f_eval,
                          master_solver=master_solver,
                          master_verbose=master_verbose,
+                         cache_size=cache_size,
                          shuffle=shuffle,
                          random_state=random_state,
                          verbose=verbose)
@@ -804,16 +996,24 @@ class DualSVR(RegressorMixin, DualSVM):
 
         n_samples = len(y)
 
-        # kernel matrix
-        K = self.kernel(X)
+        if self.optimizer == SMORegression and self.cache_size is not None:
 
-        Q = np.vstack((np.hstack((K, -K)),
-                       np.hstack((-K, K))))
-        q = np.hstack((-y, y)) + self.epsilon
+            # kernel rows computed on demand, the Hessian is never built
+            K = KernelCache(self.kernel, X, self.cache_size)
+            self.obj = None
 
-        ub = np.ones(2 * n_samples) * self.C  # upper bounds
+        else:
+
+            # kernel matrix
+            K = self.kernel(X)
+
+            Q = np.vstack((np.hstack((K, -K)),
+                           np.hstack((-K, K))))
+            q = np.hstack((-y, y)) + self.epsilon
 
-        self.obj = Quadratic(Q, q)
+            ub = np.ones(2 * n_samples) * self.C  # upper bounds
+
+            self.obj = Quadratic(Q, q)
 
         if self.optimizer == SMORegression:
 
@@ -832,6 +1032,7 @@ class DualSVR(RegressorMixin, DualSVM):
             self.obj = Quadratic(Q, q)
 
             if isinstance(self.optimizer, str):
+                from qpsolvers import solve_qp
 
                 lb = np.zeros(2 * n_samples)  # lower bounds
 
@@ -1,14 +1,83 @@
 from abc import ABC
+from collections import OrderedDict
 
 import numpy as np
-from sklearn.base import BaseEstimator
+import scipy.sparse as sp
+from sklearn.base import BaseEstimator, clone
+from sklearn.utils.extmath import safe_sparse_dot, row_norms
 
 
 class Kernel(BaseEstimator, ABC):
+    """
+    Base abstract class for all kernels. The kernel matrix is computed a block
+    of ``block_size`` rows of X at a time, so that the temporaries needed are
+    at most [block_size x n_samples_Y], and it can be written straight into
+    a preallocated, e.g., memory-mapped, ``out`` array. Both X and Y can be
+    scipy sparse matrices, while the kernel matrix is always dense.
+    """
+
+    def __init__(self, block_size=1024):
+        if block_size is not None and not block_size > 0:
+            raise ValueError('block_size must be > 0')
+        self.block_size = block_size
 
-    def __call__(self, X, Y=None):
+    def __call__(self, X, Y=None, out=None):
         pass
 
+    def _check_out(self, X, Y, out):
+        shape = (X.shape[0], Y.shape[0])
+        if out is None:
+            return np.empty(shape)
+        if out.shape != shape:
+            raise ValueError(f'out must have shape {shape}')
+        return out
+
+    def _row_blocks(self, n_rows):
+        block_size = n_rows if self.block_size is None else self.block_size
+        for start in range(0, n_rows, block_size):
+            yield slice(start, min(start + block_size, n_rows))
+
+    @staticmethod
+    def _dot(X_block, Y, out_block):
+        if sp.issparse(X_block) or sp.issparse(Y):
+            out_block[...] = safe_sparse_dot(X_block, Y.T, dense_output=True)
+        # write the product straight into out_block whenever numpy allows it
+        elif out_block.flags.c_contiguous and out_block.dtype == np.result_type(X_block, Y):
+            np.dot(X_block, Y.T, out=out_block)
+        else:
+            out_block[...] = np.dot(X_block, Y.T)
+        return out_block
+
+    def _gamma(self, X):
+        if self.gamma == 'scale':
+            # the variance of a sparse X is computed without densifying it
+            X_var = X.multiply(X).mean() - X.mean() ** 2 if sp.issparse(X) else X.var()
+            return 1. / (X.shape[1] * X_var)
+        if self.gamma == 'auto':
+            return 1. / X.shape[1]
+        return self.gamma
+
+    def _resolve(self, X):
+        """
+        Return the kernel with its parameters depending on the data, i.e., gamma='scale'
+        or 'auto', fixed to their values wrt X, so that they are not computed again
+        when the kernel is evaluated on parts of X.
+        :param X: ([n_samples x n_features] real matrix): the data matrix.
+        :return:  the kernel itself if no parameter depends on X, a copy of it otherwise.
+        """
+        if isinstance(getattr(self, 'gamma', None), str):
+            return clone(self).set_params(gamma=self._gamma(X))
+        return self
+
+    def diag(self, X):
+        """
+        Compute the diagonal of the kernel matrix K(X, X) without computing the full matrix.
+        :param X: ([n_samples x n_features] real matrix): the data matrix.
+        :return:  ([n_samples] real vector): the diagonal of K(X, X).
+        """
+        kernel = self._resolve(X)
+        return np.array([kernel(X[i:i + 1], X[i:i + 1])[0, 0] for i in range(X.shape[0])])
+
 
 class LinearKernel(Kernel):
     """
@@ -17,10 +86,16 @@ class LinearKernel(Kernel):
         K(X, Y) = <X, Y>
     """
 
-    def __call__(self, X, Y=None):
+    def __call__(self, X, Y=None, out=None):
         if Y is None:
             Y = X
-        return np.dot(X, Y.T)
+        out = self._check_out(X, Y, out)
+        for rows in self._row_blocks(X.shape[0]):
+            self._dot(X[rows], Y, out[rows])
+        return out
+
+    def diag(self, X):
+        return row_norms(X, squared=True)
 
 
 class PolyKernel(Kernel):
@@ -30,7 +105,8 @@ class PolyKernel(Kernel):
         K(X, Y) = (gamma <X, Y> + coef0)^degree
     """
 
-    def __init__(self, degree=3, gamma='scale', coef0=0.):
+    def __init__(self, degree=3, gamma='scale', coef0=0., block_size=1024):
+        super().__init__(block_size)
         if not degree > 0:
             raise ValueError('degree must be > 0')
         self.degree = degree
@@ -43,12 +119,21 @@ class PolyKernel(Kernel):
         self.gamma = gamma
         self.coef0 = coef0
 
-    def __call__(self, X, Y=None):
+    def __call__(self, X, Y=None, out=None):
         if Y is None:
             Y = X
-        gamma = (1. / (X.shape[1] * X.var()) if self.gamma == 'scale' else  # auto
-                 1. / X.shape[1] if isinstance(self.gamma, str) else self.gamma)
-        return (gamma * np.dot(X, Y.T) + self.coef0) ** self.degree
+        gamma = self._gamma(X)
+        out = self._check_out(X, Y, out)
+        for rows in self._row_blocks(X.shape[0]):
+            K = self._dot(X[rows], Y, out[rows])
+            K *= gamma
+            K += self.coef0
+            K **= self.degree
+        return out
+
+    def diag(self, X):
+        gamma = self._gamma(X)
+        return (gamma * row_norms(X, squared=True) + self.coef0) ** self.degree
 
 
 class GaussianKernel(Kernel):
@@ -58,7 +143,8 @@ class GaussianKernel(Kernel):
         K(X, Y) = exp(-gamma ||X - Y||_2^2)
     """
 
-    def __init__(self, gamma='scale'):
+    def __init__(self, gamma='scale', block_size=1024):
+        super().__init__(block_size)
         if isinstance(gamma, str):
             if gamma not in ('scale', 'auto'):
                 raise ValueError(f'unknown gamma type {gamma}')
@@ -67,12 +153,31 @@ class GaussianKernel(Kernel):
                 raise ValueError('gamma must be > 0')
         self.gamma = gamma
 
-    def __call__(self, X, Y=None):
+    def __call__(self, X, Y=None, out=None, X_norm_squared=None):
+        symmetric = Y is None
         if Y is None:
             Y = X
-        gamma = (1. / (X.shape[1] * X.var()) if self.gamma == 'scale' else  # auto
-                 1. / X.shape[1] if isinstance(self.gamma, str) else self.gamma)
-        return np.exp(-gamma * np.linalg.norm(X[:, np.newaxis] - Y[np.newaxis, :], axis=2) ** 2)
+        gamma = self._gamma(X)
+        out = self._check_out(X, Y, out)
+        # ||x - y||^2 = ||x||^2 + ||y||^2 - 2 <x, y>, where the squared
+        # row norms of X may be given if they are reused across calls
+        XX = row_norms(X, squared=True) if X_norm_squared is None else X_norm_squared
+        YY = XX if symmetric else row_norms(Y, squared=True)
+        for rows in self._row_blocks(X.shape[0]):
+            K = self._dot(X[rows], Y, out[rows])
+            K *= -2
+            K += XX[rows, np.newaxis]
+            K += YY
+            # clip the negative values due to rounding errors
+            np.maximum(K, 0, out=K)
+            if symmetric:
+                K[np.arange(K.shape[0]), np.arange(rows.start, rows.stop)] = 0
+            K *= -gamma
+            np.exp(K, out=K)
+        return out
+
+    def diag(self, X):
+        return np.ones(X.shape[0])
 
 
 class SigmoidKernel(Kernel):
@@ -82,7 +187,8 @@ class SigmoidKernel(Kernel):
         K(X, Y) = tanh(gamma <X, Y> + coef0)
     """
 
-    def __init__(self, gamma='scale', coef0=0.):
+    def __init__(self, gamma='scale', coef0=0., block_size=1024):
+        super().__init__(block_size)
         if isinstance(gamma, str):
             if gamma not in ('scale', 'auto'):
                 raise ValueError(f'unknown gamma type {gamma}')
@@ -92,12 +198,93 @@ class SigmoidKernel(Kernel):
         self.gamma = gamma
         self.coef0 = coef0
 
-    def __call__(self, X, Y=None):
+    def __call__(self, X, Y=None, out=None):
         if Y is None:
             Y = X
-        gamma = (1. / (X.shape[1] * X.var()) if self.gamma == 'scale' else  # auto
-                 1. / X.shape[1] if isinstance(self.gamma, str) else self.gamma)
-        return np.tanh(gamma * np.dot(X, Y.T) + self.coef0)
+        gamma = self._gamma(X)
+        out = self._check_out(X, Y, out)
+        for rows in self._row_blocks(X.shape[0]):
+            K = self._dot(X[rows], Y, out[rows])
+            K *= gamma
+            K += self.coef0
+            np.tanh(K, out=K)
+        return out
+
+    def diag(self, X):
+        gamma = self._gamma(X)
+        return np.tanh(gamma * row_norms(X, squared=True) + self.coef0)
+
+
+class KernelCache:
+    """
+    Compute the rows of the kernel matrix K(X, X) on demand and keep
+    the most recently used ones within a given memory budget, so that
+    the memory needed to train a kernel machine is bounded regardless
+    of the number of samples, e.g., K[i] returns the i-th row of the
+    kernel matrix while K[i, j] returns its (i, j)-th entry.
+    """
+
+    def __init__(self, kernel, X, cache_size=200):
+        """
+
+        :param kernel: the kernel function used to compute the rows.
+        :param X: ([n_samples x n_features] real matrix): the data matrix.
+        :param cache_size: (real scalar, optional, default value 200): the memory
+                           budget (in MB) for the cached rows. At least two rows
+                           are always kept, whatever the budget.
+        """
+        if not isinstance(kernel, Kernel):
+            raise TypeError(f'{kernel} is not an allowed kernel function')
+        self.kernel = kernel
+        self.X = X
+        # the kernel parameters depending on X, e.g., gamma='scale', and the squared
+        # row norms of X for the gaussian kernel are computed once for all the rows
+        self._kernel = kernel._resolve(X)
+        self._kernel_kwargs = ({'X_norm_squared': row_norms(X, squared=True)}
+                               if isinstance(kernel, GaussianKernel) else {})
+        if not cache_size > 0:
+            raise ValueError('cache_size must be > 0')
+        self.cache_size = cache_size
+        n_samples = X.shape[0]
+        self.shape = (n_samples, n_samples)
+        self.max_rows = max(2, int(cache_size * 2 ** 20 // (n_samples * np.dtype(np.float64).itemsize)))
+        self.rows = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return self.shape[0]
+
+    def row(self, i):
+        """
+        Return the i-th row of the kernel matrix, computing it
+        and evicting the least recently used one if needed.
+        :param i: the index of the row.
+        :return:  ([n_samples] real vector): the i-th row of K(X, X).
+        """
+        if i in self.rows:
+            self.hits += 1
+            self.rows.move_to_end(i)
+            return self.rows[i]
+        self.misses += 1
+        Ki = self._kernel(self.X, self.X[i:i + 1], **self._kernel_kwargs).ravel()
+        if len(self.rows) >= self.max_rows:
+            self.rows.popitem(last=False)
+        self.rows[i] = Ki
+        return Ki
+
+    def diagonal(self):
+        """
+        Return the diagonal of the kernel matrix, like ndarray.diagonal.
+        :return: ([n_samples] real vector): the diagonal of K(X, X).
+        """
+        return self.kernel.diag(self.X)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            i, j = key
+            return self.row(i)[j]
+        return self.row(key)
 
 
 linear = LinearKernel()
@@ -1,27 +1,75 @@
 from abc import ABC
 
 import autograd.numpy as np
+from sklearn.utils.extmath import safe_sparse_dot
 
 from ...opti import OptimizationFunction
 
 
 class SVMLoss(OptimizationFunction, ABC):
 
-    def __init__(self, svm, X, y):
-        super().__init__(X.shape[1])
+    def __init__(self, svm, X, y, fit_intercept=True):
+        """
+
+        :param svm: the SVM estimator whose regularization parameter C is used.
+        :param X: ([n_samples x n_features] real matrix, dense or sparse): the data matrix.
+        :param y: ([n_samples] real vector): the target values.
+        :param fit_intercept: (boolean, optional, default value True): if True, the last
+                              coefficient is treated as the intercept, i.e., as the weight of
+                              an implicit column of ones, so that X is never augmented.
+        """
+        super().__init__(X.shape[1] + fit_intercept)
         self.svm = svm
         self.X = X
         self.y = y
+        self.fit_intercept = fit_intercept
 
     def args(self):
         return self.X, self.y
 
+    def _predict(self, packed_coef_inter, X_batch):
+        if self.fit_intercept:
+            return safe_sparse_dot(X_batch, packed_coef_inter[:-1]) + packed_coef_inter[-1]
+        return safe_sparse_dot(X_batch, packed_coef_inter)
+
+    def _backward(self, X_batch, delta):
+        """
+        Compute the gradient of sum_i delta_i * y_pred_i wrt the packed
+        coefficients, i.e., X^T delta followed by sum(delta) for the intercept.
+        """
+        coef_grad = safe_sparse_dot(X_batch.T, delta)
+        if self.fit_intercept:
+            return np.append(coef_grad, np.sum(delta))
+        return coef_grad
+
     def loss(self, y_pred, y_true):
         raise NotImplementedError
 
-    def loss_jacobian(self, packed_coef_inter, X_batch, y_batch):
+    def loss_jacobian(self, y_pred, X_batch, y_batch):
+        raise NotImplementedError
+
+    def loss_hessian_vector_product(self, y_pred, v, X_batch, y_batch):
         raise NotImplementedError
 
+    def hessian_vector_product(self, packed_coef_inter, v, X_batch=None, y_batch=None):
+        """
+        The product of the (generalized) Hessian matrix of the loss with a vector,
+        i.e., v / n_samples plus C / n_samples times X^T D X v, where D is the diagonal
+        of the 2nd derivatives of the loss wrt the predictions, without forming X^T D X.
+        :param packed_coef_inter: the point at which the Hessian is to be computed.
+        :param v: the vector to be multiplied by the Hessian.
+        :return: the product of the Hessian matrix of the loss at packed_coef_inter with v.
+        """
+        if X_batch is None:
+            X_batch = self.X
+        if y_batch is None:
+            y_batch = self.y
+
+        n_samples = X_batch.shape[0]
+        y_pred = self._predict(packed_coef_inter, X_batch)
+        return ((1 / n_samples) * v +
+                self.svm.C / n_samples * self.loss_hessian_vector_product(y_pred, v, X_batch, y_batch))
+
     def __call__(self, y_pred, y_true):
         return self.loss(y_pred, y_true)
 
@@ -36,7 +84,7 @@ class SVCLoss(SVMLoss, ABC):
 
         n_samples = X_batch.shape[0]
         return (1 / (2 * n_samples) * np.linalg.norm(packed_coef_inter) ** 2 +
-                self.svm.C / n_samples * np.sum(self.loss(np.dot(X_batch, packed_coef_inter), y_batch)))
+                self.svm.C / n_samples * np.sum(self.loss(self._predict(packed_coef_inter, X_batch), y_batch)))
 
     def jacobian(self, packed_coef_inter, X_batch=None, y_batch=None):
         if X_batch is None:
@@ -45,8 +93,22 @@ class SVCLoss(SVMLoss, ABC):
             y_batch = self.y
 
         n_samples = X_batch.shape[0]
+        y_pred = self._predict(packed_coef_inter, X_batch)
         return ((1 / n_samples) * packed_coef_inter -
-                self.svm.C / n_samples * self.loss_jacobian(packed_coef_inter, X_batch, y_batch))
+                self.svm.C / n_samples * self.loss_jacobian(y_pred, X_batch, y_batch))
+
+    def function_and_jacobian(self, packed_coef_inter, X_batch=None, y_batch=None):
+        if X_batch is None:
+            X_batch = self.X
+        if y_batch is None:
+            y_batch = self.y
+
+        n_samples = X_batch.shape[0]
+        y_pred = self._predict(packed_coef_inter, X_batch)
+        return (1 / (2 * n_samples) * np.linalg.norm(packed_coef_inter) ** 2 +
+                self.svm.C / n_samples * np.sum(self.loss(y_pred, y_batch)),
+                (1 / n_samples) * packed_coef_inter -
+                self.svm.C / n_samples * self.loss_jacobian(y_pred, X_batch, y_batch))
 
 
 class Hinge(SVCLoss):
@@ -59,9 +121,13 @@ class Hinge(SVCLoss):
     def loss(self, y_pred, y_true):
         return np.maximum(0, 1 - y_true * y_pred)
 
-    def loss_jacobian(self, packed_coef_inter, X_batch, y_batch):
-        idx = np.argwhere(y_batch * np.dot(X_batch, packed_coef_inter) < 1.).ravel()
-        return np.dot(y_batch[idx], X_batch[idx])
+    def loss_jacobian(self, y_pred, X_batch, y_batch):
+        idx = np.argwhere(y_batch * y_pred < 1.).ravel()
+        return self._backward(X_batch[idx], y_batch[idx])
+
+    def loss_hessian_vector_product(self, y_pred, v, X_batch, y_batch):
+        # the hinge loss is piecewise linear in the predictions
+        return np.zeros_like(v)
 
 
 class SquaredHinge(Hinge):
@@ -74,8 +140,13 @@ class SquaredHinge(Hinge):
     def loss(self, y_pred, y_true):
         return np.square(super().loss(y_pred, y_true))
 
-    def loss_jacobian(self, packed_coef_inter, X_batch, y_batch):
-        return 2 * super().loss_jacobian(packed_coef_inter, X_batch, y_batch)
+    def loss_jacobian(self, y_pred, X_batch, y_batch):
+        return 2 * super().loss_jacobian(y_pred, X_batch, y_batch)
+
+    def loss_hessian_vector_product(self, y_pred, v, X_batch, y_batch):
+        idx = np.argwhere(y_batch * y_pred < 1.).ravel()
+        # _predict(v, X) is the product of X, augmented with the intercept column, with v
+        return 2 * self._backward(X_batch[idx], np.square(y_batch[idx]) * self._predict(v, X_batch[idx]))
 
 
 class SVRLoss(SVMLoss, ABC):
@@ -88,7 +159,7 @@ class SVRLoss(SVMLoss, ABC):
 
         n_samples = X_batch.shape[0]
         return (1 / (2 * n_samples) * np.linalg.norm(packed_coef_inter) ** 2 +
-                self.svm.C / n_samples * np.sum(self.loss(np.dot(X_batch, packed_coef_inter), y_batch)))
+                self.svm.C / n_samples * np.sum(self.loss(self._predict(packed_coef_inter, X_batch), y_batch)))
 
     def jacobian(self, packed_coef_inter, X_batch=None, y_batch=None):
         if X_batch is None:
@@ -97,8 +168,22 @@ class SVRLoss(SVMLoss, ABC):
             y_batch = self.y
 
         n_samples = X_batch.shape[0]
+        y_pred = self._predict(packed_coef_inter, X_batch)
         return ((1 / n_samples) * packed_coef_inter -
-                self.svm.C / n_samples * self.loss_jacobian(packed_coef_inter, X_batch, y_batch))
+                self.svm.C / n_samples * self.loss_jacobian(y_pred, X_batch, y_batch))
+
+    def function_and_jacobian(self, packed_coef_inter, X_batch=None, y_batch=None):
+        if X_batch is None:
+            X_batch = self.X
+        if y_batch is None:
+            y_batch = self.y
+
+        n_samples = X_batch.shape[0]
+        y_pred = self._predict(packed_coef_inter, X_batch)
+        return (1 / (2 * n_samples) * np.linalg.norm(packed_coef_inter) ** 2 +
+                self.svm.C / n_samples * np.sum(self.loss(y_pred, y_batch)),
+                (1 / n_samples) * packed_coef_inter -
+                self.svm.C / n_samples * self.loss_jacobian(y_pred, X_batch, y_batch))
 
 
 class EpsilonInsensitive(SVRLoss):
@@ -108,17 +193,20 @@ class EpsilonInsensitive(SVRLoss):
         L(y_pred, y_true) = max(0, |y_true - y_pred| - epsilon)
     """
 
-    def __init__(self, svm, X, y, epsilon=0.1):
-        super().__init__(svm, X, y)
+    def __init__(self, svm, X, y, epsilon=0.1, fit_intercept=True):
+        super().__init__(svm, X, y, fit_intercept)
         self.epsilon = epsilon
 
     def loss(self, y_pred, y_true):
         return np.maximum(0, np.abs(y_pred - y_true) - self.epsilon)
 
-    def loss_jacobian(self, packed_coef_inter, X_batch, y_batch):
-        y_pred = np.dot(X_batch, packed_coef_inter)
+    def loss_jacobian(self, y_pred, X_batch, y_batch):
         idx = np.argwhere(np.abs(y_pred - y_batch) > self.epsilon).ravel()
-        return np.dot(y_batch[idx] - y_pred[idx], X_batch[idx])
+        return self._backward(X_batch[idx], y_batch[idx] - y_pred[idx])
+
+    def loss_hessian_vector_product(self, y_pred, v, X_batch, y_batch):
+        # the epsilon-insensitive loss is piecewise linear in the predictions
+        return np.zeros_like(v)
 
 
 class SquaredEpsilonInsensitive(EpsilonInsensitive):
@@ -131,8 +219,12 @@ class SquaredEpsilonInsensitive(EpsilonInsensitive):
     def loss(self, y_pred, y_true):
         return np.square(super().loss(y_pred, y_true))
 
-    def loss_jacobian(self, packed_coef_inter, X_batch, y_batch):
-        return 2 * super().loss_jacobian(packed_coef_inter, X_batch, y_batch)
+    def loss_jacobian(self, y_pred, X_batch, y_batch):
+        return 2 * super().loss_jacobian(y_pred, X_batch, y_batch)
+
+    def loss_hessian_vector_product(self, y_pred, v, X_batch, y_batch):
+        idx = np.argwhere(np.abs(y_pred - y_batch) > self.epsilon).ravel()
+        return 2 * self._backward(X_batch[idx], self._predict(v, X_batch[idx]))
 
 
 hinge = Hinge
@@ -22,6 +22,7 @@ class SMO(ABC):
         self.C = C
         self.errors = np.zeros(len(X))
         self.tol = tol
+        self.iter = 0  # number of successful steps
         self.verbose = verbose
 
     def _take_step(self, i1, i2):
@@ -45,7 +46,8 @@ class SMOClassifier(SMO):
     series of smallest possible QP problems, which are then solved analytically.
 
     This class follows the original algorithm by Platt with additional modifications
-    by Keerthi et al.
+    by Keerthi et al. or, alternatively, selects the working set by the second order
+    information as in LIBSVM by Fan et al., optionally shrinking the bounded variables.
 
     References
 
@@ -53,27 +55,35 @@ class SMOClassifier(SMO):
 
     S.S. Keerthi, S.K. Shevade, C. Bhattacharyya, K.R.K. Murthy. Improvements to Platt's SMO
     Algorithm for SVM Classifier Design. Technical Report CD-99-14.
+
+    R.E. Fan, P.H. Chen, C.J. Lin. Working Set Selection Using Second Order Information
+    for Training Support Vector Machines. Journal of Machine Learning Research 6, 2005.
     """
 
-    def __init__(self, quad, X, y, K, kernel=gaussian, C=1., tol=1e-3, verbose=False):
+    def __init__(self, quad, X, y, K, kernel=gaussian, C=1., tol=1e-3, selection='keerthi',
+                 shrinking=True, verbose=False):
         self.alphas = np.zeros(len(X))
         super().__init__(quad, X, y, K, kernel, C, tol, verbose)
+        if selection not in ('keerthi', 'wss2'):
+            raise ValueError(f'unknown selection type {selection}')
+        self.selection = selection
+        self.shrinking = shrinking
 
         # initialize variables and structures to implement improvements
         # on the original Platt's SMO algorithm described in Keerthi et
         # al. for better performance ed efficiency
 
-        # set of indices
+        # sets of indices as boolean masks
         # {i : 0 < alphas[i] < C}
-        self.I0 = set()
+        self.I0 = np.zeros(len(X), dtype=bool)
         # {i : y[i] = +1, alphas[i] = 0}
-        self.I1 = set(i for i in range(len(X)) if y[i] == 1)
+        self.I1 = y == 1
         # {i : y[i] = -1, alphas[i] = C}
-        self.I2 = set()
+        self.I2 = np.zeros(len(X), dtype=bool)
         # {i : y[i] = +1, alphas[i] = C}
-        self.I3 = set()
+        self.I3 = np.zeros(len(X), dtype=bool)
         # {i : y[i] = -1, alphas[i] = 0}
-        self.I4 = set(i for i in range(len(X)) if y[i] == -1)
+        self.I4 = y == -1
 
         # multiple thresholds
         self.b_up = -1
@@ -113,9 +123,12 @@ class SMOClassifier(SMO):
         if L == H:
             return False
 
+        # fetch the kernel rows just once since K may be a KernelCache
+        K1, K2 = self.K[i1], self.K[i2]
+
         # compute the 2nd derivative of the objective function along
         # the diagonal line based on equation 15 in Platt's paper
-        eta = self.K[i1, i1] + self.K[i2, i2] - 2 * self.K[i1, i2]
+        eta = K1[i1] + K2[i2] - 2 * K1[i2]
 
         # under normal circumstances, the objective function will be positive
         # definite, there will be a minimum along the direction of the linear
@@ -151,12 +164,12 @@ class SMOClassifier(SMO):
             self.w += y1 * (a1 - alpha1) * self.X[i1] + y2 * (a2 - alpha2) * self.X[i2]
 
         # update error cache using new alphas
-        for i in self.I0:
-            if i != i1 and i != i2:
-                self.errors[i] += y1 * (a1 - alpha1) * self.K[i1, i] + y2 * (a2 - alpha2) * self.K[i2, i]
+        I0 = self.I0.copy()
+        I0[[i1, i2]] = False
+        self.errors[I0] += y1 * (a1 - alpha1) * K1[I0] + y2 * (a2 - alpha2) * K2[I0]
         # update error cache using new alphas for i1 and i2
-        self.errors[i1] += y1 * (a1 - alpha1) * self.K[i1, i1] + y2 * (a2 - alpha2) * self.K[i1, i2]
-        self.errors[i2] += y1 * (a1 - alpha1) * self.K[i1, i2] + y2 * (a2 - alpha2) * self.K[i2, i2]
+        self.errors[i1] += y1 * (a1 - alpha1) * K1[i1] + y2 * (a2 - alpha2) * K1[i2]
+        self.errors[i2] += y1 * (a1 - alpha1) * K1[i2] + y2 * (a2 - alpha2) * K2[i2]
 
         # to prevent precision problems
         if a2 > self.C - 1e-8 * self.C:
@@ -175,26 +188,11 @@ class SMOClassifier(SMO):
 
         # update the sets of indices for i1 and i2
         for i in (i1, i2):
-            if 0 < self.alphas[i] < self.C:
-                self.I0.add(i)
-            else:
-                self.I0.discard(i)
-            if self.y[i] == 1 and self.alphas[i] == 0:
-                self.I1.add(i)
-            else:
-                self.I1.discard(i)
-            if self.y[i] == -1 and self.alphas[i] == self.C:
-                self.I2.add(i)
-            else:
-                self.I2.discard(i)
-            if self.y[i] == 1 and self.alphas[i] == self.C:
-                self.I3.add(i)
-            else:
-                self.I3.discard(i)
-            if self.y[i] == -1 and self.alphas[i] == 0:
-                self.I4.add(i)
-            else:
-                self.I4.discard(i)
+            self.I0[i] = 0 < self.alphas[i] < self.C
+            self.I1[i] = self.y[i] == 1 and self.alphas[i] == 0
+            self.I2[i] = self.y[i] == -1 and self.alphas[i] == self.C
+            self.I3[i] = self.y[i] == 1 and self.alphas[i] == self.C
+            self.I4[i] = self.y[i] == -1 and self.alphas[i] == 0
 
         # update thresholds (b_up, b_up_idx) and (b_low, b_low_idx)
         # by applying equations 11a and 11b, using only i1, i2 and
@@ -205,23 +203,22 @@ class SMOClassifier(SMO):
         self.b_up = sys.float_info.max
         self.b_low = -sys.float_info.max
 
-        for i in self.I0:
-            if self.errors[i] > self.b_low:
-                self.b_low = self.errors[i]
-                self.b_low_idx = i
-            if self.errors[i] < self.b_up:
-                self.b_up = self.errors[i]
-                self.b_up_idx = i
-        if i1 not in self.I0:
-            if i1 in self.I3 or i1 in self.I4:
+        I0 = np.flatnonzero(self.I0)
+        if I0.size:
+            errors = self.errors[I0]
+            low, up = errors.argmax(), errors.argmin()
+            self.b_low, self.b_low_idx = errors[low], I0[low]
+            self.b_up, self.b_up_idx = errors[up], I0[up]
+        if not self.I0[i1]:
+            if self.I3[i1] or self.I4[i1]:
                 if self.errors[i1] > self.b_low:
                     self.b_low = self.errors[i1]
                     self.b_low_idx = i1
             elif self.errors[i1] < self.b_up:
                 self.b_up = self.errors[i1]
                 self.b_up_idx = i1
-        if i2 not in self.I0:
-            if i2 in self.I3 or i2 in self.I4:
+        if not self.I0[i2]:
+            if self.I3[i2] or self.I4[i2]:
                 if self.errors[i2] > self.b_low:
                     self.b_low = self.errors[i2]
                     self.b_low_idx = i2
@@ -232,20 +229,22 @@ class SMOClassifier(SMO):
         if self.b_low_idx == -1 or self.b_up_idx == -1:
             raise Exception('unexpected status')
 
+        self.iter += 1
+
         return True
 
     def _examine_example(self, i2):
-        if i2 in self.I0:
+        if self.I0[i2]:
             E2 = self.errors[i2]
         else:
             E2 = (self.alphas * self.y).dot(self.K[i2]) - self.y[i2]
             self.errors[i2] = E2
 
             # update (b_up, b_up_idx) or (b_low, b_low_idx) using E2 and i2
-            if (i2 in self.I1 or i2 in self.I2) and E2 < self.b_up:
+            if (self.I1[i2] or self.I2[i2]) and E2 < self.b_up:
                 self.b_up = E2
                 self.b_up_idx = i2
-            elif (i2 in self.I3 or i2 in self.I4) and E2 > self.b_low:
+            elif (self.I3[i2] or self.I4[i2]) and E2 > self.b_low:
                 self.b_low = E2
                 self.b_low_idx = i2
 
@@ -253,11 +252,11 @@ class SMOClassifier(SMO):
         # find another index i1 to do joint optimization with i2
         i1 = -1
         optimal = True
-        if i2 in self.I0 or i2 in self.I1 or i2 in self.I2:
+        if self.I0[i2] or self.I1[i2] or self.I2[i2]:
             if self.b_low - E2 > 2 * self.tol:
                 optimal = False
                 i1 = self.b_low_idx
-        if i2 in self.I0 or i2 in self.I3 or i2 in self.I4:
+        if self.I0[i2] or self.I3[i2] or self.I4[i2]:
             if E2 - self.b_up > 2 * self.tol:
                 optimal = False
                 i1 = self.b_up_idx
@@ -266,7 +265,7 @@ class SMOClassifier(SMO):
             return False
 
         # for i2 in I0 choose the better i1
-        if i2 in self.I0:
+        if self.I0[i2]:
             if self.b_low - E2 > E2 - self.b_up:
                 i1 = self.b_low_idx
             else:
@@ -277,7 +276,165 @@ class SMOClassifier(SMO):
 
         return self._take_step(i1, i2)
 
+    def _select_working_set(self, G, active):
+        """
+        Select the pair (i, j) by the second order information as in
+        the WSS2 rule of LIBSVM, i.e., i is the maximal violating index
+        while j is the one which gives the largest decrease of the objective.
+        :param G: the gradient of the dual objective.
+        :param active: the mask of the indices not shrunk.
+        :return: the pair (i, j) or (-1, -1) if the tolerance is attained.
+        """
+        y, alphas = self.y, self.alphas
+        # {i : y[i] = +1, alphas[i] < C} or {i : y[i] = -1, alphas[i] > 0}
+        I_up = active & (((y == 1) & (alphas < self.C)) | ((y == -1) & (alphas > 0)))
+        # {i : y[i] = +1, alphas[i] > 0} or {i : y[i] = -1, alphas[i] < C}
+        I_low = active & (((y == 1) & (alphas > 0)) | ((y == -1) & (alphas < self.C)))
+        if not I_up.any() or not I_low.any():
+            return -1, -1
+
+        yG = -y * G
+        up = np.flatnonzero(I_up)
+        i = up[yG[up].argmax()]
+        G_max = yG[i]
+        if G_max - yG[I_low].min() < 2 * self.tol:
+            return -1, -1
+
+        low = np.flatnonzero(I_low & (yG < G_max))
+        Ki = self.K[i]
+        b = G_max - yG[low]
+        a = Ki[i] + self.K_diag[low] - 2 * Ki[low]
+        a[a <= 0] = 1e-12
+        j = low[(-b * b / a).argmin()]
+        return i, j
+
+    def _update_pair(self, i, j, G, active):
+        """
+        Solve analytically the sub-problem wrt alphas[i] and alphas[j]
+        and update the gradient of the dual objective over the active set.
+        """
+        y, alphas, C = self.y, self.alphas, self.C
+        Ki, Kj = self.K[i], self.K[j]
+        alpha_i, alpha_j = alphas[i], alphas[j]
+
+        eta = max(Ki[i] + Kj[j] - 2 * Ki[j], 1e-12)
+        if y[i] != y[j]:
+            delta = (-G[i] - G[j]) / eta
+            diff = alpha_i - alpha_j
+            alpha_i += delta
+            alpha_j += delta
+            if diff > 0:
+                if alpha_j < 0:
+                    alpha_j, alpha_i = 0., diff
+            elif alpha_i < 0:
+                alpha_i, alpha_j = 0., -diff
+            if diff > 0:
+                if alpha_i > C:
+                    alpha_i, alpha_j = C, C - diff
+            elif alpha_j > C:
+                alpha_j, alpha_i = C, C + diff
+        else:
+            delta = (G[i] - G[j]) / eta
+            total = alpha_i + alpha_j
+            alpha_i -= delta
+            alpha_j += delta
+            if total > C:
+                if alpha_i > C:
+                    alpha_i, alpha_j = C, total - C
+            elif alpha_j < 0:
+                alpha_j, alpha_i = 0., total
+            if total > C:
+                if alpha_j > C:
+                    alpha_j, alpha_i = C, total - C
+            elif alpha_i < 0:
+                alpha_i, alpha_j = 0., total
+
+        delta_i, delta_j = alpha_i - alphas[i], alpha_j - alphas[j]
+        alphas[i], alphas[j] = alpha_i, alpha_j
+
+        G[active] += y[active] * (y[i] * delta_i * Ki[active] + y[j] * delta_j * Kj[active])
+
+        self.iter += 1
+
+    def _shrink(self, G, active):
+        """
+        Remove from the active set the bounded variables which are
+        unlikely to change, as in the shrinking heuristic of LIBSVM.
+        """
+        y, alphas = self.y, self.alphas
+        I_up = ((y == 1) & (alphas < self.C)) | ((y == -1) & (alphas > 0))
+        I_low = ((y == 1) & (alphas > 0)) | ((y == -1) & (alphas < self.C))
+        yG = -y * G
+        G_max1 = yG[active & I_up].max(initial=-np.inf)
+        G_max2 = -yG[active & I_low].min(initial=np.inf)
+        active &= ~((I_up & ~I_low & (-yG > G_max2)) | (I_low & ~I_up & (yG > G_max1)))
+
+    def _reconstruct_gradient(self, G, active):
+        """
+        Compute again the gradient of the dual objective for the shrunk variables.
+        """
+        inactive = ~active
+        G[inactive] = -1.
+        for s in np.flatnonzero(self.alphas):
+            G[inactive] += self.y[inactive] * self.y[s] * self.alphas[s] * self.K[s][inactive]
+
+    def _minimize_wss2(self):
+        if self.verbose:
+            print('iter\t cost')
+
+        n_samples = len(self.X)
+        self.K_diag = self.K.diagonal()
+        # gradient of the dual objective 1/2 alphas^T Q alphas - e^T alphas
+        G = -np.ones(n_samples)
+        active = np.ones(n_samples, dtype=bool)
+        counter = min(n_samples, 1000)
+        while True:
+            if self.shrinking:
+                counter -= 1
+                if not counter:
+                    counter = min(n_samples, 1000)
+                    self._shrink(G, active)
+
+            i, j = self._select_working_set(G, active)
+            if i == -1:
+                if active.all():
+                    break
+                # check the optimality over all the variables
+                self._reconstruct_gradient(G, active)
+                active[:] = True
+                continue
+
+            self._update_pair(i, j, G, active)
+
+            if self.verbose and not self.iter % self.verbose:
+                if self.quad is None:  # the Hessian is not available when K is a KernelCache
+                    print('{:4d}'.format(self.iter))
+                else:
+                    print('{:4d}\t{: 1.4e}'.format(self.iter, self.quad.function(self.alphas)))
+
+        # the errors are y * G, so the threshold is the average of the
+        # errors over the free variables or the middle of the feasible interval
+        self.errors = self.y * G
+        free = (0 < self.alphas) & (self.alphas < self.C)
+        if free.any():
+            self.b = -self.errors[free].mean()
+        else:
+            upper = ((self.y == 1) & (self.alphas == 0)) | ((self.y == -1) & (self.alphas == self.C))
+            lower = ~upper
+            self.b = -(self.errors[upper].min(initial=np.inf) + self.errors[lower].max(initial=-np.inf)) / 2
+
+        if isinstance(self.kernel, LinearKernel):
+            self.w = np.dot(self.alphas * self.y, self.X)
+
+        if self.verbose:
+            print()
+
+        return self
+
     def minimize(self):
+        if self.selection == 'wss2':
+            return self._minimize_wss2()
+
         if self.verbose:
             print('iter\t cost')
 
@@ -305,7 +462,10 @@ class SMOClassifier(SMO):
                 examine_all = True
 
             if self.verbose and not loop_counter % self.verbose:
-                print('{:4d}\t{: 1.4e}'.format(loop_counter, self.quad.function(self.alphas)))
+                if self.quad is None:  # the Hessian is not available when K is a KernelCache
+                    print('{:4d}'.format(loop_counter))
+                else:
+                    print('{:4d}\t{: 1.4e}'.format(loop_counter, self.quad.function(self.alphas)))
 
             loop_counter += 1
 
@@ -352,15 +512,15 @@ class SMORegression(SMO):
         # on the original Smola and Scholkopf SMO algorithm described in
         # Shevade et al. for better performance ed efficiency
 
-        # set of indices
+        # sets of indices as boolean masks
         # {i : 0 < alphas_p[i] < C, 0 < alphas_n[i] < C}
-        self.I0 = set()
+        self.I0 = np.zeros(len(X), dtype=bool)
         # {i : alphas_p[i] = 0, alphas_n[i] = 0}
-        self.I1 = set(range(len(X)))
+        self.I1 = np.ones(len(X), dtype=bool)
         # {i : alphas_p[i] = 0, alphas_n[i] = C}
-        self.I2 = set()
+        self.I2 = np.zeros(len(X), dtype=bool)
         # {i : alphas_p[i] = C, alphas_n[i] = 0}
-        self.I3 = set()
+        self.I3 = np.zeros(len(X), dtype=bool)
 
         # multiple thresholds
         self.b_up_idx = 0
@@ -379,9 +539,12 @@ class SMORegression(SMO):
         alpha2_p, alpha2_n = self.alphas_p[i2], self.alphas_n[i2]
         E2 = self.errors[i2]
 
+        # fetch the kernel rows just once since K may be a KernelCache
+        K1, K2 = self.K[i1], self.K[i2]
+
         # compute kernel and 2nd derivative eta
         # based on equation 15 in Platt's paper
-        eta = self.K[i1, i1] + self.K[i2, i2] - 2 * self.K[i1, i2]
+        eta = K1[i1] + K2[i2] - 2 * K1[i2]
 
         if eta < 0:
             eta = 0
@@ -501,16 +664,15 @@ class SMORegression(SMO):
                        ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * self.X[i2])
 
         # update error cache using new alphas
-        for i in self.I0:
-            if i != i1 and i != i2:
-                self.errors[i] += (
-                        ((self.alphas_p[i1] - self.alphas_n[i1]) - (alpha1_p - alpha1_n)) * self.K[i1, i] +
-                        ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * self.K[i2, i])
+        I0 = self.I0.copy()
+        I0[[i1, i2]] = False
+        self.errors[I0] += (((self.alphas_p[i1] - self.alphas_n[i1]) - (alpha1_p - alpha1_n)) * K1[I0] +
+                            ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * K2[I0])
         # update error cache using new alphas for i1 and i2
-        self.errors[i1] += (((self.alphas_p[i1] - self.alphas_n[i1]) - (alpha1_p - alpha1_n)) * self.K[i1, i1] +
-                            ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * self.K[i1, i2])
-        self.errors[i2] += (((self.alphas_p[i1] - self.alphas_n[i1]) - (alpha1_p - alpha1_n)) * self.K[i1, i2] +
-                            ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * self.K[i2, i2])
+        self.errors[i1] += (((self.alphas_p[i1] - self.alphas_n[i1]) - (alpha1_p - alpha1_n)) * K1[i1] +
+                            ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * K1[i2])
+        self.errors[i2] += (((self.alphas_p[i1] - self.alphas_n[i1]) - (alpha1_p - alpha1_n)) * K1[i2] +
+                            ((self.alphas_p[i2] - self.alphas_n[i2]) - (alpha2_p - alpha2_n)) * K2[i2])
 
         # to prevent precision problems
         if alpha1_p > self.C - 1e-10 * self.C:
@@ -539,22 +701,10 @@ class SMORegression(SMO):
 
         # update the sets of indices for i1 and i2
         for i in (i1, i2):
-            if 0 < self.alphas_p[i] < self.C or 0 < self.alphas_n[i] < self.C:
-                self.I0.add(i)
-            else:
-                self.I0.discard(i)
-            if self.alphas_p[i] == 0 and self.alphas_n[i] == 0:
-                self.I1.add(i)
-            else:
-                self.I1.discard(i)
-            if self.alphas_p[i] == 0 and self.alphas_n[i] == self.C:
-                self.I2.add(i)
-            else:
-                self.I2.discard(i)
-            if self.alphas_p[i] == self.C and self.alphas_n[i] == 0:
-                self.I3.add(i)
-            else:
-                self.I3.discard(i)
+            self.I0[i] = 0 < self.alphas_p[i] < self.C or 0 < self.alphas_n[i] < self.C
+            self.I1[i] = self.alphas_p[i] == 0 and self.alphas_n[i] == 0
+            self.I2[i] = self.alphas_p[i] == 0 and self.alphas_n[i] == self.C
+            self.I3[i] = self.alphas_p[i] == self.C and self.alphas_n[i] == 0
 
         # update thresholds
         self.b_up_idx = -1
@@ -562,61 +712,56 @@ class SMORegression(SMO):
         self.b_up = sys.float_info.max
         self.b_low = -sys.float_info.max
 
-        for i in self.I0:
-            if 0 < self.alphas_p[i] < self.C and self.errors[i] - self.epsilon > self.b_low:
-                self.b_low = self.errors[i] - self.epsilon
-                self.b_low_idx = i
-            elif 0 < self.alphas_n[i] < self.C and self.errors[i] + self.epsilon > self.b_low:
-                self.b_low = self.errors[i] + self.epsilon
-                self.b_low_idx = i
-
-            if 0 < self.alphas_p[i] < self.C and self.errors[i] - self.epsilon < self.b_up:
-                self.b_up = self.errors[i] - self.epsilon
-                self.b_up_idx = i
-            elif 0 < self.alphas_n[i] < self.C and self.errors[i] + self.epsilon < self.b_up:
-                self.b_up = self.errors[i] + self.epsilon
-                self.b_up_idx = i
+        I0 = np.flatnonzero(self.I0)
+        if I0.size:
+            # for i in I0 either alphas_p[i] or alphas_n[i] is unbounded
+            errors = np.where(0 < self.alphas_p[I0], self.errors[I0] - self.epsilon, self.errors[I0] + self.epsilon)
+            low, up = errors.argmax(), errors.argmin()
+            self.b_low, self.b_low_idx = errors[low], I0[low]
+            self.b_up, self.b_up_idx = errors[up], I0[up]
 
         for i in (i1, i2):
-            if i not in self.I0:
-                if i in self.I2 and self.errors[i] + self.epsilon > self.b_low:
+            if not self.I0[i]:
+                if self.I2[i] and self.errors[i] + self.epsilon > self.b_low:
                     self.b_low = self.errors[i] + self.epsilon
                     self.b_low_idx = i
-                elif i in self.I1 and self.errors[i] - self.epsilon > self.b_low:
+                elif self.I1[i] and self.errors[i] - self.epsilon > self.b_low:
                     self.b_low = self.errors[i] - self.epsilon
                     self.b_low_idx = i
 
-                if i in self.I3 and self.errors[i] - self.epsilon < self.b_up:
+                if self.I3[i] and self.errors[i] - self.epsilon < self.b_up:
                     self.b_up = self.errors[i] - self.epsilon
                     self.b_up_idx = i
-                elif i in self.I1 and self.errors[i] + self.epsilon < self.b_up:
+                elif self.I1[i] and self.errors[i] + self.epsilon < self.b_up:
                     self.b_up = self.errors[i] + self.epsilon
                     self.b_up_idx = i
 
         if self.b_low_idx == -1 or self.b_up_idx == -1:
             raise Exception('unexpected status')
 
+        self.iter += 1
+
         return True
 
     def _examine_example(self, i2):
         alpha2_p, alpha2_n = self.alphas_p[i2], self.alphas_n[i2]
 
-        if i2 in self.I0:
+        if self.I0[i2]:
             E2 = self.errors[i2]
         else:
             E2 = self.y[i2] - (self.alphas_p - self.alphas_n).dot(self.K[i2])
             self.errors[i2] = E2
-            if i2 in self.I1:
+            if self.I1[i2]:
                 if E2 + self.epsilon < self.b_up:
                     self.b_up = E2 + self.epsilon
                     self.b_up_idx = i2
                 elif E2 - self.epsilon > self.b_low:
                     self.b_low = E2 - self.epsilon
                     self.b_low_idx = i2
-            elif i2 in self.I2 and E2 + self.epsilon > self.b_low:
+            elif self.I2[i2] and E2 + self.epsilon > self.b_low:
                 self.b_low = E2 + self.epsilon
                 self.b_low_idx = i2
-            elif i2 in self.I3 and E2 - self.epsilon < self.b_up:
+            elif self.I3[i2] and E2 - self.epsilon < self.b_up:
                 self.b_up = E2 - self.epsilon
                 self.b_up_idx = i2
 
@@ -624,7 +769,7 @@ class SMORegression(SMO):
         # find another index i1 to do joint optimization with i2
         i1 = -1
         optimal = True
-        if i2 in self.I0:
+        if self.I0[i2]:
             if 0 < alpha2_p < self.C:
                 if self.b_low - (E2 - self.epsilon) > 2 * self.tol:
                     optimal = False
@@ -647,7 +792,7 @@ class SMORegression(SMO):
                     i1 = self.b_up_idx
                     if self.b_low - (E2 + self.epsilon) > (E2 + self.epsilon) - self.b_up:
                         i1 = self.b_low_idx
-        elif i2 in self.I1:
+        elif self.I1[i2]:
             if self.b_low - (E2 + self.epsilon) > 2 * self.tol:
                 optimal = False
                 i1 = self.b_low_idx
@@ -658,11 +803,11 @@ class SMORegression(SMO):
                 i1 = self.b_up_idx
                 if self.b_low - (E2 - self.epsilon) > (E2 - self.epsilon) - self.b_up:
                     i1 = self.b_low_idx
-        elif i2 in self.I2:
+        elif self.I2[i2]:
             if (E2 + self.epsilon) - self.b_up > 2 * self.tol:
                 optimal = False
                 i1 = self.b_up_idx
-        elif i2 in self.I3:
+        elif self.I3[i2]:
             if self.b_low - (E2 - self.epsilon) > 2 * self.tol:
                 optimal = False
                 i1 = self.b_low_idx
@@ -702,8 +847,11 @@ class SMORegression(SMO):
                 examine_all = True
 
             if self.verbose and not loop_counter % self.verbose:
-                print('{:4d}\t{: 1.4e}'.format(
-                    loop_counter, self.quad.function(np.hstack((self.alphas_p, self.alphas_n)))))
+                if self.quad is None:  # the Hessian is not available when K is a KernelCache
+                    print('{:4d}'.format(loop_counter))
+                else:
+                    print('{:4d}\t{: 1.4e}'.format(
+                        loop_counter, self.quad.function(np.hstack((self.alphas_p, self.alphas_n)))))
 
             loop_counter += 1
 
@@ -5,11 +5,11 @@ from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, MinMaxScaler, OneHotEncoder
 
 from optiml.ml.neural_network import NeuralNetworkRegressor, NeuralNetworkClassifier
-from optiml.ml.neural_network.activations import sigmoid, softmax, linear
+from optiml.ml.neural_network.activations import sigmoid, tanh, softmax, linear
 from optiml.ml.neural_network.layers import FullyConnected
 from optiml.ml.neural_network.losses import mean_squared_error, categorical_cross_entropy
 from optiml.ml.neural_network.regularizers import L2
-from optiml.opti.unconstrained.line_search import BFGS
+from optiml.opti.unconstrained.line_search import BFGS, LBFGS, NewtonCG
 from optiml.opti.unconstrained.stochastic import Adam
 
 
@@ -31,6 +31,14 @@ def test_perceptron_ridge_regressor():
                        np.linalg.inv(X.T.dot(X) + np.identity(net.loss.ndim) * lmbda).dot(X.T).dot(y))
 
 
+def test_perceptron_regressor_with_lbfgs():
+    X, y = load_boston(return_X_y=True)
+    X = StandardScaler().fit_transform(X)
+    net = NeuralNetworkRegressor((FullyConnected(13, 1, linear, fit_intercept=False),),
+                                 loss=mean_squared_error, optimizer=LBFGS).fit(X, y)
+    assert np.allclose(net.coefs_[0].ravel(), np.linalg.inv(X.T.dot(X)).dot(X.T).dot(y), atol=1e-4)
+
+
 def test_neural_network_regressor():
     X, y = load_boston(return_X_y=True)
     X_scaled = StandardScaler().fit_transform(X)
@@ -56,5 +64,127 @@ def test_neural_network_classifier():
     assert net.score(X_test, ohe.transform(y_test.reshape(-1, 1))) >= 0.95
 
 
+def test_neural_network_loss_function_and_jacobian():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = OneHotEncoder(sparse=False).fit_transform(y.reshape(-1, 1))
+    net = NeuralNetworkClassifier((FullyConnected(4, 4, sigmoid),
+                                   FullyConnected(4, 3, softmax)),
+                                  loss=categorical_cross_entropy)
+    net._store_meta_info()
+    loss = categorical_cross_entropy(net, X_scaled, y)
+    packed_coef_inter = net._pack(net.coefs_, net.intercepts_)
+    f_x, g_x = loss.function_and_jacobian(packed_coef_inter)
+    assert np.allclose(f_x, loss.function(packed_coef_inter))
+    assert np.allclose(g_x, loss.jacobian(packed_coef_inter))
+
+
+def test_neural_network_flat_buffers():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = OneHotEncoder(sparse=False).fit_transform(y.reshape(-1, 1))
+    net = NeuralNetworkClassifier((FullyConnected(4, 4, sigmoid),
+                                   FullyConnected(4, 3, softmax)),
+                                  loss=categorical_cross_entropy)
+    coefs = [coef.copy() for coef in net.coefs_ + net.intercepts_]
+    net._store_meta_info()
+    # the layers keep their parameters, now held as views of the flat buffer
+    for coef, init_coef in zip(net.coefs_ + net.intercepts_, coefs):
+        assert np.shares_memory(coef, net._packed_coef_inter)
+        assert np.array_equal(coef, init_coef)
+    packed_coef_inter = net._pack(net.coefs_, net.intercepts_)
+    g_x = categorical_cross_entropy(net, X_scaled, y).jacobian(packed_coef_inter)
+    loss = categorical_cross_entropy(net, X_scaled, y, copy_jacobian=False)
+    assert loss.jacobian(packed_coef_inter) is net._packed_grads
+    assert np.allclose(net._packed_grads, g_x)
+    _, g_x = loss.function_and_jacobian(packed_coef_inter + 1.)
+    assert np.array_equal(net._packed_coef_inter, packed_coef_inter + 1.)
+    assert g_x is net._packed_grads
+    # autograd differentiates through the slices of the flat vector, after which
+    # the layers get back the views of the flat buffer
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    net = NeuralNetworkRegressor((FullyConnected(13, 13, sigmoid, random_state=1),
+                                  FullyConnected(13, 1, linear, random_state=1)),
+                                 loss=mean_squared_error)
+    net._store_meta_info()
+    loss = mean_squared_error(net, X_scaled, y.reshape(-1, 1))
+    packed_coef_inter = net._pack(net.coefs_, net.intercepts_)
+    assert np.allclose(loss.auto_jac(packed_coef_inter), loss.jacobian(packed_coef_inter))
+    for coef in net.coefs_ + net.intercepts_:
+        assert np.shares_memory(coef, net._packed_coef_inter)
+
+
+def test_neural_network_regressor_hessian_free_newton():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    net = NeuralNetworkRegressor((FullyConnected(13, 13, sigmoid, random_state=1),
+                                  FullyConnected(13, 1, linear, random_state=1)),
+                                 loss=mean_squared_error, optimizer=NewtonCG, max_iter=50)
+    net.fit(X_train, y_train)
+    assert net.score(X_test, y_test) >= 0.8
+    # the Hessian-vector product is exact, i.e., the one of the full Hessian
+    net = NeuralNetworkRegressor((FullyConnected(13, 4, tanh, random_state=1),
+                                  FullyConnected(4, 1, linear, random_state=1)),
+                                 loss=mean_squared_error)
+    net._store_meta_info()
+    loss = mean_squared_error(net, X_train, y_train.reshape(-1, 1))
+    packed_coef_inter = net._pack(net.coefs_, net.intercepts_)
+    v = np.random.RandomState(1).randn(packed_coef_inter.size)
+    assert np.allclose(loss.hessian_vector_product(packed_coef_inter, v),
+                       loss.hessian(packed_coef_inter).dot(v))
+
+
+def test_float32_neural_network_regressor():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X).astype(np.float32)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    net = NeuralNetworkRegressor((FullyConnected(13, 13, sigmoid),
+                                  FullyConnected(13, 13, sigmoid),
+                                  FullyConnected(13, 1, linear)),
+                                 loss=mean_squared_error, optimizer=Adam, learning_rate=0.01, dtype=np.float32)
+    net.fit(X_train, y_train)
+    assert net.optimizer.x.dtype == net.optimizer.est_mom1.dtype == net.optimizer.est_mom2.dtype == np.float32
+    assert all(coef.dtype == np.float32 for coef in net.coefs_ + net.intercepts_)
+    assert net.predict(X_test).dtype == np.float32
+    assert net.score(X_test, y_test) >= 0.7
+    # the given initial parameters are cast to the dtype of the layer
+    layer = FullyConnected(2, 1, coef_init=[1, 2], inter_init=[0], dtype=np.float32)
+    assert layer.coef_.dtype == layer.inter_.dtype == np.float32
+
+
+def test_neural_network_partial_fit(tmp_path):
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    np.save(tmp_path / 'X.npy', X_scaled)
+    np.save(tmp_path / 'y.npy', y)
+
+    def make_net():
+        return NeuralNetworkRegressor((FullyConnected(13, 13, sigmoid, random_state=1),
+                                       FullyConnected(13, 1, linear, random_state=1)),
+                                      loss=mean_squared_error, optimizer=Adam, learning_rate=0.01,
+                                      batch_size=64, max_iter=3, shuffle=False)
+
+    net = make_net().fit(X_scaled, y)
+    partial_net = make_net()
+    # the moment estimates of Adam go on across the calls, so a partial_fit per epoch is the same as a fit
+    for _ in range(3):
+        partial_net.partial_fit(X_scaled, y)
+    assert partial_net.optimizer.iter == net.optimizer.iter
+    assert np.allclose(partial_net.optimizer.x, net.optimizer.x)
+    # and the data can be given as .npy files, which are memory-mapped
+    X_mmap = np.load(tmp_path / 'X.npy', mmap_mode='r')
+    y_mmap = np.load(tmp_path / 'y.npy', mmap_mode='r')
+    mmap_net = make_net()
+    for start in range(0, X.shape[0], 200):
+        mmap_net.partial_fit(X_mmap[start:start + 200], y_mmap[start:start + 200])
+    # 4 + 4 + 2 mini batches over the chunks of 200, 200 and 106 samples
+    assert mmap_net.optimizer.iter == 10
+    mmap_net = make_net().fit(str(tmp_path / 'X.npy'), str(tmp_path / 'y.npy'))
+    assert isinstance(mmap_net.loss.X, np.memmap)
+    assert np.allclose(mmap_net.optimizer.x, net.optimizer.x)
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -1,13 +1,17 @@
+import numpy as np
 import pytest
+import scipy.sparse as sp
 from sklearn.datasets import load_iris, load_boston
 from sklearn.model_selection import train_test_split
-from sklearn.multiclass import OneVsRestClassifier
+from sklearn.multiclass import OneVsRestClassifier, OneVsOneClassifier
 from sklearn.preprocessing import StandardScaler, MinMaxScaler
 
 from optiml.ml.svm import PrimalSVC, DualSVC, PrimalSVR, DualSVR
-from optiml.ml.svm.kernels import linear, gaussian
+from optiml.ml.svm.kernels import linear, gaussian, Kernel, KernelCache, LinearKernel, PolyKernel, GaussianKernel, SigmoidKernel
 from optiml.ml.svm.losses import hinge, squared_hinge, epsilon_insensitive, squared_epsilon_insensitive
+from optiml.opti import Quadratic
 from optiml.opti.constrained import ProjectedGradient, ActiveSet, InteriorPoint, FrankWolfe
+from optiml.opti.constrained import LagrangianBoxConstrainedQuadratic
 from optiml.opti.unconstrained import ProximalBundle
 from optiml.opti.unconstrained.line_search import SteepestGradientDescent
 from optiml.opti.unconstrained.stochastic import StochasticGradientDescent, AdaGrad
@@ -131,6 +135,40 @@ def test_solve_svc_with_smo():
     assert svc.score(X_test, y_test) >= 0.97
 
 
+class CountingGaussianKernel(GaussianKernel):
+    n_calls = 0
+
+    def __call__(self, X, Y=None, out=None):
+        CountingGaussianKernel.n_calls += 1
+        return super().__call__(X, Y, out)
+
+
+def test_solve_multi_class_svc_with_smo():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    for multi_class, wrapper in (('ovr', OneVsRestClassifier), ('ovo', OneVsOneClassifier)):
+        svc = DualSVC(kernel=gaussian, multi_class=multi_class).fit(X_train, y_train)
+        assert len(svc.estimators_) == 3
+        assert np.array_equal(svc.predict(X_test), wrapper(DualSVC(kernel=gaussian)).fit(X_train, y_train).predict(X_test))
+        assert np.array_equal(svc.predict(X_test),
+                              DualSVC(kernel=gaussian, multi_class=multi_class, n_jobs=2).fit(X_train, y_train).predict(X_test))
+        # the kernel matrix is computed just once and shared across the subproblems
+        CountingGaussianKernel.n_calls = 0
+        DualSVC(kernel=CountingGaussianKernel(), multi_class=multi_class).fit(X_train, y_train)
+        assert CountingGaussianKernel.n_calls == 1
+
+
+def test_solve_multi_class_linear_svc():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = PrimalSVC(loss=squared_hinge, optimizer=SteepestGradientDescent, multi_class='ovo').fit(X_train, y_train)
+    assert np.array_equal(svc.predict(X_test),
+                          OneVsOneClassifier(PrimalSVC(loss=squared_hinge, optimizer=SteepestGradientDescent))
+                          .fit(X_train, y_train).predict(X_test))
+
+
 def test_solve_svc_as_bcqp_with_cvxopt():
     X, y = load_iris(return_X_y=True)
     X_scaled = MinMaxScaler().fit_transform(X)
@@ -176,7 +214,262 @@ def test_solve_svc_as_bcqp_lagrangian_relaxation_with_subgradient_optimizer():
     X_scaled = MinMaxScaler().fit_transform(X)
     X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
     svc = OneVsRestClassifier(DualSVC(kernel=gaussian, optimizer=AdaGrad)).fit(X_train, y_train)
+    assert svc.score(X_test, y_test) >= 0.94
+
+
+def test_lagrangian_relaxation_solvers():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = np.where(y == 1, 1., -1.)
+    ub = np.ones_like(y)
+    # the regularized gaussian kernel is positive definite while the linear one is singular
+    for K in (gaussian(X_scaled) + np.identity(y.size), linear(X_scaled)):
+        quad = Quadratic(K * np.outer(y, y), -np.ones_like(y))
+        lmbda = np.random.uniform(size=2 * y.size)
+        lsqr = LagrangianBoxConstrainedQuadratic(quad, ub, solver='lsqr')
+        for solver in ('cholesky', 'eigh'):
+            dual = LagrangianBoxConstrainedQuadratic(quad, ub, solver=solver)
+            assert np.isclose(dual.function(lmbda), lsqr.function(lmbda), rtol=1e-4)
+
+
+def test_lagrangian_relaxation_cache():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = np.where(y == 1, 1., -1.)
+    quad = Quadratic(linear(X_scaled) * np.outer(y, y), -np.ones_like(y))
+    dual = LagrangianBoxConstrainedQuadratic(quad, np.ones_like(y), cache_size=2)
+    lmbdas = np.random.uniform(size=(3, 2 * y.size))
+    # the function and the jacobian share the same solution
+    dual.function(lmbdas[0])
+    dual.jacobian(lmbdas[0])
+    assert (dual.hits, dual.misses) == (1, 1)
+    # the interleaved points are still cached until they are evicted
+    dual.function(lmbdas[1])
+    dual.jacobian(lmbdas[0])
+    assert (dual.hits, dual.misses) == (2, 2)
+    dual.function(lmbdas[2])
+    dual.jacobian(lmbdas[1])
+    assert (dual.hits, dual.misses) == (2, 4)
+    # the lambda buffer updated in place is a new point
+    lmbdas[2] += 1.
+    dual.function(lmbdas[2])
+    assert (dual.hits, dual.misses) == (2, 5)
+
+
+def test_solve_svc_with_smo_wss2():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = OneVsRestClassifier(DualSVC(kernel=gaussian, selection='wss2')).fit(X_train, y_train)
     assert svc.score(X_test, y_test) >= 0.97
+    svc = OneVsRestClassifier(DualSVC(kernel=gaussian, selection='wss2', shrinking=False)).fit(X_train, y_train)
+    assert svc.score(X_test, y_test) >= 0.97
+
+
+def test_smo_wss2_same_dual_objective():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    keerthi = DualSVC(kernel=gaussian, C=10.).fit(X_scaled, y == 1)
+    wss2 = DualSVC(kernel=gaussian, C=10., selection='wss2').fit(X_scaled, y == 1)
+    assert np.isclose(keerthi.obj.function(keerthi.optimizer.alphas),
+                      wss2.obj.function(wss2.optimizer.alphas), rtol=1e-3)
+    assert wss2.optimizer.iter < keerthi.optimizer.iter
+
+
+def test_smo_index_sets():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    svc = DualSVC(kernel=gaussian).fit(X_scaled, y == 1)
+    smo, C = svc.optimizer, svc.C
+    assert np.array_equal(smo.I0, (0 < smo.alphas) & (smo.alphas < C))
+    assert np.array_equal(smo.I0 | smo.I1 | smo.I2 | smo.I3 | smo.I4, np.ones(len(X), dtype=bool))
+
+
+def test_blocked_kernels(tmp_path):
+    X, _ = load_iris(return_X_y=True)
+    Y = X[::3]
+    gamma = 1. / (X.shape[1] * X.var())
+    for kernel, K in ((PolyKernel(block_size=7), (gamma * np.dot(X, Y.T)) ** 3),
+                      (GaussianKernel(block_size=7),
+                       np.exp(-gamma * np.linalg.norm(X[:, np.newaxis] - Y[np.newaxis, :], axis=2) ** 2)),
+                      (SigmoidKernel(block_size=7), np.tanh(gamma * np.dot(X, Y.T)))):
+        assert np.allclose(kernel(X, Y), K)
+        out = np.lib.format.open_memmap(str(tmp_path / 'K.npy'), mode='w+', shape=(len(X), len(Y)))
+        assert kernel(X, Y, out=out) is out
+        assert np.allclose(out, K)
+    assert np.all(np.diag(GaussianKernel(block_size=7)(X)) == 1.)
+
+
+def test_kernel_cache():
+    X, _ = load_iris(return_X_y=True)
+    K = gaussian(X)
+    # a budget smaller than two rows keeps just the two most recently used ones
+    cache = KernelCache(gaussian, X, cache_size=1e-6)
+    assert np.allclose(cache[0], K[0])
+    assert np.allclose(cache[1, 2], K[1, 2])
+    assert np.allclose(cache[0, 3], K[0, 3])
+    assert list(cache.rows) == [1, 0]
+    assert cache.hits == 1 and cache.misses == 2
+    # the kernel parameters wrt X, e.g., gamma='scale', are fixed once for all the rows
+    poly_kernel = PolyKernel()
+    cache = KernelCache(poly_kernel, X)
+    assert poly_kernel.gamma == 'scale' and np.isscalar(cache._kernel.gamma)
+    assert np.allclose(cache[5], poly_kernel(X)[5])
+    # the generic diagonal evaluates the kernel on each sample against itself
+    assert np.allclose(Kernel.diag(poly_kernel, X), np.diag(poly_kernel(X)))
+    assert np.allclose(Kernel.diag(gaussian, X), 1.)
+
+
+def test_solve_svc_with_smo_and_kernel_cache():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svc = OneVsRestClassifier(DualSVC(kernel=gaussian)).fit(X_train, y_train)
+    cached_svc = OneVsRestClassifier(DualSVC(kernel=gaussian, cache_size=0.01)).fit(X_train, y_train)
+    # SMO is sensitive to the rounding of the kernel entries, which may differ
+    # slightly between cached rows and rows of the full kernel matrix
+    assert np.array_equal(svc.predict(X_test), cached_svc.predict(X_test))
+
+
+def test_solve_svr_with_smo_and_kernel_cache():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y, train_size=0.75, random_state=1)
+    svr = DualSVR(kernel=gaussian).fit(X_train, y_train)
+    cached_svr = DualSVR(kernel=gaussian, cache_size=0.1).fit(X_train, y_train)
+    # SMO is sensitive to the rounding of the dot products, which may differ
+    # slightly between cached rows and rows of the full kernel matrix
+    assert np.allclose(svr.predict(X_test), cached_svr.predict(X_test), rtol=1e-2)
+
+
+def test_svm_loss_function_and_jacobian():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    svr = PrimalSVR()
+    loss = squared_epsilon_insensitive(svr, X_scaled, y, epsilon=0.1)
+    packed_coef_inter = np.random.uniform(size=loss.ndim)
+    f_x, g_x = loss.function_and_jacobian(packed_coef_inter)
+    assert np.allclose(f_x, loss.function(packed_coef_inter))
+    assert np.allclose(g_x, loss.jacobian(packed_coef_inter))
+
+
+def test_svm_loss_fit_intercept():
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    svr = PrimalSVR()
+    packed_coef_inter = np.random.uniform(size=X.shape[1] + 1)
+    for loss in (epsilon_insensitive, squared_epsilon_insensitive):
+        # the intercept is the weight of an implicit column of ones
+        implicit = loss(svr, X_scaled, y, epsilon=0.1, fit_intercept=True)
+        explicit = loss(svr, np.c_[X_scaled, np.ones_like(y)], y, epsilon=0.1, fit_intercept=False)
+        assert implicit.ndim == explicit.ndim
+        assert np.allclose(implicit.function(packed_coef_inter), explicit.function(packed_coef_inter))
+        assert np.allclose(implicit.jacobian(packed_coef_inter), explicit.jacobian(packed_coef_inter))
+
+
+def test_sparse_kernels():
+    X, _ = load_iris(return_X_y=True)
+    # zero the smallest entries to get a truly sparse matrix
+    X = np.where(X > 1.5, X, 0.)
+    X_sparse = sp.csr_matrix(X)
+    for kernel in (LinearKernel(block_size=7), PolyKernel(block_size=7),
+                   GaussianKernel(block_size=7), SigmoidKernel(block_size=7)):
+        assert np.allclose(kernel(X_sparse), kernel(X))
+        assert np.allclose(kernel(X_sparse, X_sparse[::3]), kernel(X, X[::3]))
+        assert np.allclose(kernel.diag(X_sparse), kernel.diag(X))
+
+
+def test_solve_sparse_linear_svc_and_svr():
+    X, y = load_iris(return_X_y=True)
+    X = MinMaxScaler().fit_transform(X)
+    X[X < 0.5] = 0.
+    for optimizer in (SteepestGradientDescent, StochasticGradientDescent):
+        svc = PrimalSVC(loss=squared_hinge, optimizer=optimizer).fit(X, y)
+        sparse_svc = PrimalSVC(loss=squared_hinge, optimizer=optimizer).fit(sp.csr_matrix(X), y)
+        assert np.allclose(svc.predict(X), sparse_svc.predict(sp.csr_matrix(X)))
+    X, y = load_boston(return_X_y=True)
+    X = StandardScaler().fit_transform(X)
+    X[X < 0.] = 0.
+    svr = PrimalSVR(loss=epsilon_insensitive, optimizer=StochasticGradientDescent,
+                    batch_size=50, random_state=1).fit(X, y)
+    sparse_svr = PrimalSVR(loss=epsilon_insensitive, optimizer=StochasticGradientDescent,
+                           batch_size=50, random_state=1).fit(sp.csr_matrix(X), y)
+    assert np.allclose(svr.coef_, sparse_svr.coef_)
+    assert np.allclose(svr.predict(X), sparse_svr.predict(sp.csr_matrix(X)))
+
+
+def test_svm_loss_hessian_vector_product():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    rs = np.random.RandomState(1)
+    for loss, svm, target in ((hinge, PrimalSVC(), np.where(y == 0, 1., -1.)),
+                              (squared_hinge, PrimalSVC(), np.where(y == 0, 1., -1.)),
+                              (epsilon_insensitive, PrimalSVR(), y.astype(float)),
+                              (squared_epsilon_insensitive, PrimalSVR(), y.astype(float))):
+        for fit_intercept in (True, False):
+            f = loss(svm, X_scaled, target, fit_intercept=fit_intercept)
+            w, v = rs.uniform(size=f.ndim), rs.uniform(size=f.ndim)
+            # the analytic product matches the one of the Hessian built by autograd
+            assert np.allclose(f.hessian_vector_product(w, v), f.auto_hess(w).dot(v))
+
+
+def test_float32_linear_svc():
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X).astype(np.float32)
+    X_train, X_test, y_train, y_test = train_test_split(X_scaled, y == 0, train_size=0.75, random_state=1)
+    svc = PrimalSVC(loss=hinge, optimizer=AdaGrad, batch_size=20, random_state=1, dtype=np.float32)
+    svc.fit(X_train, y_train)
+    assert svc.coef_.dtype == np.float32
+    assert svc.decision_function(X_test).dtype == np.float32
+    assert svc.score(X_test, y_test) >= 0.9
+
+
+def test_linear_svm_partial_fit(tmp_path):
+    X, y = load_boston(return_X_y=True)
+    X_scaled = StandardScaler().fit_transform(X)
+    svr = PrimalSVR(loss=squared_epsilon_insensitive, optimizer=AdaGrad, batch_size=50, max_iter=5, shuffle=False)
+    svr.fit(X_scaled, y)
+    # the accumulators of AdaGrad go on across the calls, so a partial_fit per epoch is the same as a fit
+    partial_svr = PrimalSVR(loss=squared_epsilon_insensitive, optimizer=AdaGrad, batch_size=50, shuffle=False)
+    for _ in range(5):
+        partial_svr.partial_fit(X_scaled, y)
+    assert np.allclose(partial_svr.coef_, svr.coef_)
+    assert np.allclose(partial_svr.intercept_, svr.intercept_)
+
+    # with the full batch each call takes a single step, while the fit
+    # takes max_iter - 1 ones since it starts with an epoch end
+    full_svr = PrimalSVR(loss=squared_epsilon_insensitive, optimizer=AdaGrad, max_iter=6)
+    full_svr.fit(X_scaled, y)
+    partial_svr = PrimalSVR(loss=squared_epsilon_insensitive, optimizer=AdaGrad)
+    for _ in range(5):
+        partial_svr.partial_fit(X_scaled, y)
+    assert partial_svr.optimizer.iter == full_svr.optimizer.iter == 5
+    assert np.allclose(partial_svr.coef_, full_svr.coef_)
+    assert np.allclose(partial_svr.intercept_, full_svr.intercept_)
+
+    X, y = load_iris(return_X_y=True)
+    X_scaled = MinMaxScaler().fit_transform(X)
+    y = y == 1
+    np.save(tmp_path / 'X.npy', X_scaled)
+    np.save(tmp_path / 'y.npy', y)
+    X_mmap = np.load(tmp_path / 'X.npy', mmap_mode='r')
+    y_mmap = np.load(tmp_path / 'y.npy', mmap_mode='r')
+    svc = PrimalSVC(loss=hinge, optimizer=StochasticGradientDescent, batch_size=30, max_iter=10, shuffle=False)
+    svc.fit(X_scaled, y)
+    # the chunks of the memory-mapped data are made of whole mini batches, so a
+    # partial_fit per chunk and per epoch goes through the same steps of the fit
+    partial_svc = PrimalSVC(loss=hinge, optimizer=StochasticGradientDescent, batch_size=30, shuffle=False)
+    for epoch in range(10):
+        for start in range(0, X_mmap.shape[0], 60):
+            partial_svc.partial_fit(X_mmap[start:start + 60], y_mmap[start:start + 60], classes=[False, True])
+    assert partial_svc.optimizer.iter == svc.optimizer.iter
+    assert np.allclose(partial_svc.coef_, svc.coef_)
+    assert np.allclose(partial_svc.intercept_, svc.intercept_)
+    # and the data can be given as .npy files, which are memory-mapped
+    mmap_svc = PrimalSVC(loss=hinge, optimizer=StochasticGradientDescent, batch_size=30, max_iter=10, shuffle=False)
+    mmap_svc.fit(str(tmp_path / 'X.npy'), str(tmp_path / 'y.npy'))
+    assert isinstance(mmap_svc.loss.X, np.memmap)
+    assert np.allclose(mmap_svc.coef_, svc.coef_)
 
 
 if __name__ == "__main__":
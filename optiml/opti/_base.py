@@ -1,10 +1,12 @@
-import autograd.numpy as np
-from autograd import jacobian, hessian
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.linalg import LinearOperator
 
 
 class Optimizer:
 
-    def __init__(self, f, x, eps=1e-6, max_iter=1000, callback=None, callback_args=(), verbose=False):
+    def __init__(self, f, x, eps=1e-6, max_iter=1000, callback=None, callback_args=(), verbose=False,
+                 dtype=np.float64):
         """
 
         :param f:        the objective function.
@@ -15,14 +17,17 @@ class Optimizer:
         :param max_iter: (integer scalar, optional, default value 1000): the maximum number of iterations.
         :param verbose:  (boolean, optional, default value False): print details about each iteration
                          if True, nothing otherwise.
+        :param dtype:    (numpy floating type, optional, default value np.float64): the type of the
+                         current point, e.g., np.float32 to halve the memory of the parameters.
         """
         if not isinstance(f, OptimizationFunction):
             raise TypeError(f'{f} is not an allowed optimization function')
         self.f = f
+        self.dtype = dtype
         if callable(x):
-            self.x = x(f.ndim)
+            self.x = np.asarray(x(f.ndim), dtype=dtype)
         else:
-            self.x = np.asarray(x, dtype=np.float)
+            self.x = np.asarray(x, dtype=dtype)
         self.f_x = np.nan
         self.g_x = np.zeros(0)
         if self.f.ndim <= 3:
@@ -59,10 +64,37 @@ class Optimizer:
 class OptimizationFunction:
 
     def __init__(self, ndim=2):
-        self.auto_jac = jacobian(self.function)
-        self.auto_hess = hessian(self.function)
+        # the automatic derivatives are built on first use since most
+        # functions, e.g., the quadratic ones, override them analytically
+        self._auto_jac = None
+        self._auto_hess = None
+        self._auto_hvp = None
         self.ndim = ndim
 
+    @property
+    def auto_jac(self):
+        """The Jacobian of the function computed by autograd, built on first use."""
+        if self._auto_jac is None:
+            from autograd import jacobian
+            self._auto_jac = jacobian(self.function)
+        return self._auto_jac
+
+    @property
+    def auto_hess(self):
+        """The Hessian of the function computed by autograd, built on first use."""
+        if self._auto_hess is None:
+            from autograd import hessian
+            self._auto_hess = hessian(self.function)
+        return self._auto_hess
+
+    @property
+    def auto_hvp(self):
+        """The Hessian-vector product of the function computed by autograd, built on first use."""
+        if self._auto_hvp is None:
+            from autograd import make_hvp
+            self._auto_hvp = make_hvp(self.function)
+        return self._auto_hvp
+
     def x_star(self):
         return np.full(fill_value=np.nan, shape=self.ndim)
 
@@ -83,6 +115,15 @@ class OptimizationFunction:
         """
         return self.auto_jac(x)
 
+    def function_and_jacobian(self, x, *args):
+        """
+        The value and the Jacobian (i.e., the gradient) of the function evaluated together,
+        so that subclasses can share the work needed by both, e.g., a forward pass.
+        :param x: 1D array of points at which the function and the Jacobian are to be computed.
+        :return:  the value and the Jacobian of the function at x.
+        """
+        return self.function(x, *args), self.jacobian(x, *args)
+
     def hessian(self, x):
         """
         The Hessian matrix of the function.
@@ -91,6 +132,17 @@ class OptimizationFunction:
         """
         return self.auto_hess(x)
 
+    def hessian_vector_product(self, x, v):
+        """
+        The product of the Hessian matrix of the function with a vector, computed
+        without forming the Hessian, i.e., by differentiating the product of the
+        Jacobian with v, which costs a small multiple of a function evaluation.
+        :param x: 1D array of points at which the Hessian is to be computed.
+        :param v: 1D array to be multiplied by the Hessian.
+        :return:  the product of the Hessian matrix of the function at x with v.
+        """
+        return self.auto_hvp(x)[0](v)
+
 
 class Quadratic(OptimizationFunction):
 
@@ -102,18 +154,22 @@ class Quadratic(OptimizationFunction):
 
         :param Q: ([n x n] real symmetric matrix, not necessarily positive semidefinite):
                            the Hessian (i.e., the quadratic part) of f. If it is not
-                           positive semidefinite, f(x) will be unbounded below.
+                           positive semidefinite, f(x) will be unbounded below. It can
+                           also be a scipy sparse matrix or a LinearOperator, so that
+                           it is only used through the products Q x, e.g., by the
+                           ConjugateGradient, and never needs to be dense.
         :param q: ([n x 1] real column vector): the linear part of f.
         """
-        Q = np.array(Q)
+        if not (sp.issparse(Q) or isinstance(Q, LinearOperator)):
+            Q = np.array(Q)
         q = np.array(q)
 
-        n = len(Q)
+        n = Q.shape[0]
         super().__init__(n)
 
         if n <= 1:
             raise ValueError('Q is too small')
-        if n != Q.shape[0]:
+        if Q.shape != (n, n):
             raise ValueError('Q is not square')
         self.Q = Q
 
@@ -124,6 +180,9 @@ class Quadratic(OptimizationFunction):
     def x_star(self):
         if not hasattr(self, 'x_opt'):
             try:
+                # the optimal solution is not computed if Q is not dense
+                if not isinstance(self.Q, np.ndarray):
+                    raise np.linalg.LinAlgError
                 self.x_opt = np.linalg.solve(self.Q, -self.q)
             except np.linalg.LinAlgError:
                 self.x_opt = np.full(fill_value=np.nan, shape=self.ndim)
@@ -139,7 +198,7 @@ class Quadratic(OptimizationFunction):
         :return:  the value of a general quadratic function if x, the optimal solution of a
                   linear system Qx = q (=> x = Q^-1 q) which has a complexity of O(n^3) otherwise.
         """
-        return 0.5 * x.T.dot(self.Q).dot(x) + self.q.T.dot(x)
+        return 0.5 * x.T.dot(self.Q.dot(x)) + self.q.T.dot(x)
 
     def jacobian(self, x):
         """
@@ -149,6 +208,15 @@ class Quadratic(OptimizationFunction):
         """
         return self.Q.dot(x) + self.q
 
+    def function_and_jacobian(self, x):
+        """
+        The value and the Jacobian of a general quadratic function computing Q x just once.
+        :param x: ([n x 1] real column vector): the point where to start the algorithm from.
+        :return:  the value and the Jacobian of a general quadratic function at x.
+        """
+        Qx = self.Q.dot(x)
+        return 0.5 * x.T.dot(Qx) + self.q.T.dot(x), Qx + self.q
+
     def hessian(self, x):
         """
         The Hessian matrix of a general quadratic function H f(x) = Q.
@@ -157,6 +225,15 @@ class Quadratic(OptimizationFunction):
         """
         return self.Q
 
+    def hessian_vector_product(self, x, v):
+        """
+        The product of the Hessian matrix of a general quadratic function with a vector, i.e., Q v.
+        :param x: 1D array of points at which the Hessian is to be computed.
+        :param v: 1D array to be multiplied by the Hessian.
+        :return:  the product Q v.
+        """
+        return self.Q.dot(v)
+
 
 # 2x2 quadratic function with nicely conditioned Hessian
 quad1 = Quadratic(Q=[[6, -2], [-2, 6]], q=[10, 5])
@@ -1,6 +1,8 @@
 from abc import ABC
+from collections import OrderedDict
 
 import numpy as np
+from scipy.linalg import cho_factor, cho_solve, eigh
 from scipy.sparse.linalg import lsqr
 
 from optiml.opti import Optimizer
@@ -16,7 +18,8 @@ class BoxConstrainedQuadraticOptimizer(Optimizer, ABC):
                  max_iter=1000,
                  callback=None,
                  callback_args=(),
-                 verbose=False):
+                 verbose=False,
+                 dtype=np.float64):
         if not isinstance(f, Quadratic):
             raise TypeError(f'{f} is not an allowed quadratic function')
         super().__init__(f=f,
@@ -25,10 +28,11 @@ class BoxConstrainedQuadraticOptimizer(Optimizer, ABC):
                          max_iter=max_iter,
                          callback=callback,
                          callback_args=callback_args,
-                         verbose=verbose)
+                         verbose=verbose,
+                         dtype=dtype)
         if any(u < 0 for u in ub):
             raise ValueError('the lower bound must be > 0')
-        self.ub = ub
+        self.ub = np.asarray(ub, dtype=self.dtype)
 
 
 class LagrangianBoxConstrainedQuadratic(Quadratic):
@@ -36,20 +40,102 @@ class LagrangianBoxConstrainedQuadratic(Quadratic):
     Construct the Lagrangian dual relaxation of a box-constrained quadratic function defined as:
 
                     1/2 x^T Q x + q^T x : 0 <= x <= ub
+
+    Since Q never changes, the linear systems Q x = -(q + lambda_+ - lambda_-) solved
+    for each lambda share a factorization of Q computed once by the given solver:
+
+        - 'cholesky': the Cholesky factorization of Q, so that each system costs a pair
+                      of triangular solves. If Q is not positive definite, it falls back
+                      to the 'eigh' solver;
+        - 'eigh':     the eigendecomposition of Q, so that each system costs the product
+                      with its pseudo-inverse restricted to the nonzero eigenvalues, i.e.,
+                      the solution that minimizes the residue with minimum norm;
+        - 'lsqr':     no factorization, each system is solved from scratch by lsqr, so
+                      that Q can also be a scipy sparse matrix or a LinearOperator.
+
+    The solutions x are also kept for the most recently used lambdas, shared by the
+    function and the jacobian, since the line searches revisit and interleave points.
     """
 
-    def __init__(self, quad, ub):
+    def __init__(self, quad, ub, solver='cholesky', cache_size=8):
         if not isinstance(quad, Quadratic):
             raise TypeError(f'{quad} is not an allowed quadratic function')
         super().__init__(quad.Q, quad.q)
         self.ndim *= 2
         if any(u < 0 for u in ub):
             raise ValueError('the lower bound must be > 0')
-        self.ub = np.asarray(ub, dtype=np.float)
+        # the bounds follow the precision of the quadratic, at least a float one
+        self.ub = np.asarray(ub, dtype=np.result_type(self.q, float))
         self.primal = quad
+        if solver not in ('cholesky', 'eigh', 'lsqr'):
+            raise ValueError(f'unknown solver {solver}')
+        if solver != 'lsqr' and not isinstance(self.Q, np.ndarray):
+            raise ValueError(f'the {solver} solver needs a dense Q, use the lsqr one instead')
+        self.solver = solver
+        if self.solver == 'cholesky':
+            try:
+                self.cho_factor = cho_factor(self.Q)
+            except np.linalg.LinAlgError:
+                self.solver = 'eigh'
+        if self.solver == 'eigh':
+            w, V = eigh(self.Q)
+            # since Q is indefinite, i.e., the function is linear along the eigenvector
+            # correspondent to zero eigenvalues, the system has not solutions, so we
+            # will choose the one that minimize the residue by dropping them
+            nonzero = np.abs(w) > w.size * np.finfo(w.dtype).eps * np.abs(w).max()
+            self.V = V[:, nonzero]
+            self.inv_w = 1. / w[nonzero]
+        if not cache_size > 0:
+            raise ValueError('cache_size must be > 0')
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
         self.last_lmbda = None
         self.last_x = None
 
+    def _solve(self, ql):
+        """
+        Solve the linear system Q x = -ql by the factorization of Q.
+
+        :param ql: the linear part of the Lagrangian relaxation wrt x
+        :return: the solution x of the linear system
+        """
+        if self.solver == 'cholesky':
+            return cho_solve(self.cho_factor, -ql)
+        if self.solver == 'eigh':
+            return self.V.dot(self.inv_w * self.V.T.dot(-ql))
+        # since Q is indefinite, i.e., the function is linear along the eigenvector
+        # correspondent to zero eigenvalues, the system has not solutions, so we
+        # will choose the one that minimize the residue
+        return lsqr(self.Q, -ql)[0]
+
+    def _primal_x(self, lmbda, ql):
+        """
+        Return the solution x of the linear system Q x = -ql for the given lambda,
+        solving it and evicting the least recently used one if it is not cached.
+
+        :param lmbda: the dual variable wrt solve the linear system
+        :param ql: the linear part of the Lagrangian relaxation wrt x
+        :return: the solution x of the linear system
+        """
+        # the raw bytes of lambda are an exact key, hashed in a single pass
+        # and immune to the later in place updates of the lambda buffer
+        key = lmbda.tobytes()
+        if key in self.cache:
+            self.hits += 1
+            self.cache.move_to_end(key)
+            x = self.cache[key]
+        else:
+            self.misses += 1
+            x = self._solve(ql)
+            if len(self.cache) >= self.cache_size:
+                self.cache.popitem(last=False)
+            self.cache[key] = x
+        self.last_lmbda = lmbda
+        self.last_x = x
+        return x
+
     def x_star(self):
         raise np.full(fill_value=np.nan, shape=self.ndim)
 
@@ -81,15 +167,7 @@ class LagrangianBoxConstrainedQuadratic(Quadratic):
         """
         lmbda_p, lmbda_n = np.split(lmbda, 2)
         ql = self.q + lmbda_p - lmbda_n
-        if np.array_equal(lmbda, self.last_lmbda):
-            x = self.last_x
-        else:
-            # since Q is indefinite, i.e., the function is linear along the eigenvector
-            # correspondent to zero eigenvalues, the system has not solutions, so we
-            # will choose the one that minimize the residue
-            x = lsqr(self.Q, -ql)[0]
-            self.last_lmbda = lmbda
-            self.last_x = x
+        x = self._primal_x(lmbda, ql)
         return 0.5 * x.T.dot(self.Q).dot(x) + ql.T.dot(x) - lmbda_p.T.dot(self.ub)
 
     def jacobian(self, lmbda):
@@ -107,15 +185,16 @@ class LagrangianBoxConstrainedQuadratic(Quadratic):
         :param lmbda: the dual variable wrt evaluate the gradient
         :return: the gradient wrt lambda
         """
-        if np.array_equal(lmbda, self.last_lmbda):
-            x = self.last_x
-        else:
-            lmbda_p, lmbda_n = np.split(lmbda, 2)
-            ql = self.q + lmbda_p - lmbda_n
-            # since Q is indefinite, i.e., the function is linear along the eigenvector
-            # correspondent to zero eigenvalues, the system has not solutions, so we
-            # will choose the one that minimize the residue
-            x = lsqr(self.Q, -ql)[0]
-            self.last_lmbda = lmbda
-            self.last_x = x
+        lmbda_p, lmbda_n = np.split(lmbda, 2)
+        x = self._primal_x(lmbda, self.q + lmbda_p - lmbda_n)
         return np.hstack((self.ub - x, x))
+
+    def function_and_jacobian(self, lmbda):
+        """
+        Compute both the function value and the jacobian of the Lagrangian dual
+        relaxation solving the inner linear system just once for the given lambda.
+
+        :param lmbda: the dual variable wrt evaluate the function and the gradient
+        :return: the function value and the gradient wrt lambda
+        """
+        return self.function(lmbda), self.jacobian(lmbda)
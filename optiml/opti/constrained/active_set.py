@@ -1,8 +1,9 @@
 import numpy as np
+from scipy.linalg import cho_solve
 from scipy.sparse.linalg import lsqr
 
 from optiml.opti.constrained import BoxConstrainedQuadraticOptimizer
-from optiml.opti.utils import cholesky_solve
+from optiml.opti.utils import cholesky_add, cholesky_delete
 
 
 class ActiveSet(BoxConstrainedQuadraticOptimizer):
@@ -14,6 +15,15 @@ class ActiveSet(BoxConstrainedQuadraticOptimizer):
     # - max_iter (integer scalar, optional, default value 1000): the maximum
     #   number of iterations
     #
+    # - release_size (integer scalar, optional, default value 1): the maximum
+    #   number of bound constraints released per iteration when the solution of
+    #   the unconstrained problem is feasible. If 1, the first one with a wrong
+    #   sign multiplier is released as by Bland's anti-cycle rule, otherwise the
+    #   ones with the most violating multipliers are, so that problems with many
+    #   variables at their bounds, e.g., the SVM duals, need far fewer iterations.
+    #   The batch is halved whenever a release does not decrease the function
+    #   value, so that it eventually falls back to Bland's rule if it cycles
+    #
     # Output:
     #
     # - v (real scalar): the best function value found so far (possibly the
@@ -38,16 +48,22 @@ class ActiveSet(BoxConstrainedQuadraticOptimizer):
                  ub,
                  eps=1e-6,
                  max_iter=1000,
+                 release_size=1,
                  callback=None,
                  callback_args=(),
-                 verbose=False):
+                 verbose=False,
+                 dtype=np.float64):
         super().__init__(f=f,
                          ub=ub,
                          eps=eps,
                          max_iter=max_iter,
                          callback=callback,
                          callback_args=callback_args,
-                         verbose=verbose)
+                         verbose=verbose,
+                         dtype=dtype)
+        if not release_size > 0:
+            raise ValueError('release_size must be > 0')
+        self.release_size = release_size
 
     def minimize(self):
 
@@ -66,6 +82,25 @@ class ActiveSet(BoxConstrainedQuadraticOptimizer):
         # 1 : n of L union U; since L and U are empty now, A = 1 : n
         A = np.full(self.f.ndim, True)
 
+        # since each iteration adds or removes a few variables from A, the Cholesky
+        # factor R of Q_{AA}, whose rows and columns follow the order of the active
+        # variables in F, is updated in O(|A|^2) rather than recomputed in O(|A|^3).
+        # R is None if Q_{AA} is not positive definite, so it has to be recomputed
+        F = np.arange(self.f.ndim)
+        try:
+            R = np.linalg.cholesky(self.f.Q)
+        except np.linalg.LinAlgError:
+            R = None
+
+        # the linear term Q_{AU} u_U due to the variables fixed to their upper
+        # bounds, which is also updated as the variables enter and leave U
+        Qu = np.zeros(self.f.ndim)
+
+        # the current batch size of the released constraints and the function
+        # value at the last feasible point, used to detect a batch that cycles
+        release_size = self.release_size
+        last_f_x = np.inf
+
         if self.verbose:
             print('iter\t cost\t\t|B|\tI/O')
 
@@ -99,16 +134,23 @@ class ActiveSet(BoxConstrainedQuadraticOptimizer):
             xs = np.zeros(self.f.ndim)
             xs[U] = self.ub[U]
 
-            try:
-                # use the Cholesky factorization to solve the linear system if Q_{AA}
-                # is symmetric and positive definite, i.e., the function is convex
-                xs[A] = cholesky_solve(np.linalg.cholesky(self.f.Q[A, :][:, A]),
-                                       -(self.f.q[A] + self.f.Q[A, :][:, U].dot(self.ub[U])))
-            except np.linalg.LinAlgError:
-                # if Q_{AA} is indefinite, i.e., the function is linear along the eigenvector
-                # correspondent to zero eigenvalues, the system has not solutions, so we
-                # will choose the one that minimize the residue
-                xs[A] = lsqr(self.f.Q[A, :][:, A], -(self.f.q[A] + self.f.Q[A, :][:, U].dot(self.ub[U])))[0]
+            if F.size > 0:
+                if R is None:
+                    # a single gather of Q_{AA} for the full factorization
+                    Q_AA = self.f.Q[np.ix_(F, F)]
+                    try:
+                        R = np.linalg.cholesky(Q_AA)
+                    except np.linalg.LinAlgError:
+                        pass
+                if R is not None:
+                    # use the Cholesky factorization to solve the linear system if Q_{AA}
+                    # is symmetric and positive definite, i.e., the function is convex
+                    xs[F] = cho_solve((R, True), -(self.f.q[F] + Qu[F]), check_finite=False)
+                else:
+                    # if Q_{AA} is indefinite, i.e., the function is linear along the eigenvector
+                    # correspondent to zero eigenvalues, the system has not solutions, so we
+                    # will choose the one that minimize the residue
+                    xs[F] = lsqr(Q_AA, -(self.f.q[F] + Qu[F]))[0]
 
             if np.logical_and(xs[A] <= self.ub[A] + 1e-12, xs[A] >= -1e-12).all():
                 # the solution of the unconstrained problem is actually feasible
@@ -117,29 +159,44 @@ class ActiveSet(BoxConstrainedQuadraticOptimizer):
                 last_x = xs
 
                 # compute function value and gradient
-                self.f_x, self.g_x = self.f.function(last_x), self.f.jacobian(last_x)
+                self.f_x, self.g_x = self.f.function_and_jacobian(last_x)
 
-                h = np.nonzero(np.logical_and(L, self.g_x < -1e-12))[0]
-                if h.size > 0:
-                    uppr = False
+                if release_size > 1 and self.f_x >= last_f_x:
+                    release_size //= 2
+                last_f_x = self.f_x
+
+                if release_size == 1:
+                    h = np.nonzero(np.logical_and(L, self.g_x < -1e-12))[0]
+                    if h.size == 0:
+                        h = np.nonzero(np.logical_and(U, self.g_x > 1e-12))[0]
+                    h = h[:1]  # that's probably Bland's anti-cycle rule
                 else:
-                    h = np.nonzero(np.logical_and(U, self.g_x > 1e-12))[0]
-                    uppr = True
+                    # the multipliers of the constraints in L and U are -g and g respectively
+                    multipliers = np.where(L, -self.g_x, np.where(U, self.g_x, 0.))
+                    h = np.nonzero(multipliers > 1e-12)[0]
+                    h = h[np.argsort(-multipliers[h], kind='stable')[:release_size]]
 
                 if h.size == 0:
                     self.status = 'optimal'
                     break
                 else:
-                    h = h[0]  # that's probably Bland's anti-cycle rule
+                    for i in h:
+                        if R is not None:
+                            try:
+                                R = cholesky_add(R, self.f.Q[F, i], self.f.Q[i, i])
+                            except np.linalg.LinAlgError:
+                                R = None
+                        F = np.append(F, i)
                     A[h] = True
-                    if uppr:
-                        U[h] = False
-                        if self.is_verbose():
-                            print('O {:d}(U)'.format(h))
-                    else:
-                        L[h] = False
-                        if self.is_verbose():
-                            print('O {:d}(L)'.format(h))
+                    hU = h[U[h]]
+                    Qu -= self.f.Q[:, hU].dot(self.ub[hU])
+                    if self.is_verbose():
+                        if h.size == 1:
+                            print('O {:d}({})'.format(h[0], 'U' if U[h[0]] else 'L'))
+                        else:
+                            print('O {:d}+{:d}'.format(h.size - hU.size, hU.size))
+                    L[h] = False
+                    U[h] = False
             else:
                 # the solution of the unconstrained problem is not feasible
                 # this means that d = xs - self.x is a descent direction, use it
@@ -172,6 +229,16 @@ class ActiveSet(BoxConstrainedQuadraticOptimizer):
                 U[nU] = True
                 A[nU] = False
 
+                Qu += self.f.Q[:, nU].dot(self.ub[nU])
+
+                out = np.nonzero(np.logical_or(nL[F], nU[F]))[0]
+                if R is not None:
+                    # the later rows and columns are removed first, so
+                    # the positions of the earlier ones do not change
+                    for p in out[::-1]:
+                        R = cholesky_delete(R, p)
+                F = np.delete(F, out)
+
                 if self.is_verbose():
                     print('I {:d}+{:d}'.format(sum(nL), sum(nU)))
 
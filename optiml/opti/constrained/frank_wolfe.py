@@ -51,14 +51,16 @@ class FrankWolfe(BoxConstrainedQuadraticOptimizer):
                  max_iter=1000,
                  callback=None,
                  callback_args=(),
-                 verbose=False):
+                 verbose=False,
+                 dtype=np.float64):
         super().__init__(f=f,
                          ub=ub,
                          eps=eps,
                          max_iter=max_iter,
                          callback=callback,
                          callback_args=callback_args,
-                         verbose=verbose)
+                         verbose=verbose,
+                         dtype=dtype)
         if not 0 <= t < 1:
             raise ValueError('t has to lie in [0, 1)')
         self.t = t
@@ -71,7 +73,7 @@ class FrankWolfe(BoxConstrainedQuadraticOptimizer):
             print('iter\t cost\t\t lb\t\t gap')
 
         while True:
-            self.f_x, self.g_x = self.f.function(self.x), self.f.jacobian(self.x)
+            self.f_x, self.g_x = self.f.function_and_jacobian(self.x)
 
             # solve min { <g, y> : 0 <= y <= u }
             y = np.zeros(self.f.ndim)
@@ -1,6 +1,9 @@
 import numpy as np
+from scipy.sparse.linalg import LinearOperator
 
+from optiml.opti import Quadratic
 from optiml.opti.constrained import BoxConstrainedQuadraticOptimizer
+from optiml.opti.unconstrained.line_search import ConjugateGradient
 from optiml.opti.utils import cholesky_solve
 
 
@@ -18,6 +21,21 @@ class InteriorPoint(BoxConstrainedQuadraticOptimizer):
     #   between the value of the current primal and dual feasible solutions is
     #   less than or equal to eps
     #
+    # - linear_solver (string, optional, default value 'cholesky'): the method
+    #   used to solve the linear system H dx = w at each iteration, where H is Q
+    #   plus a positive diagonal. Possible values are:
+    #   = 'cholesky': H is formed and factorized from scratch, i.e., it costs
+    #     O(n^2) memory and O(n^3) time per iteration
+    #   = 'cg': the preconditioned ConjugateGradient, warm started from the last
+    #     dx, with the inverse of the diagonal of H as the preconditioner, which
+    #     only needs the products Q v, so that Q can also be a scipy sparse matrix
+    #     or a LinearOperator, e.g., a low-rank factor G G^T. If Q is a
+    #     LinearOperator, its diagonal is unknown and only the barrier one is
+    #     used by the preconditioner
+    #
+    # - cg_eps (real scalar, optional, default value 1e-10): the accuracy of the
+    #   'cg' linear solver, relative to the norm of w
+    #
     # Output:
     #
     # - v (real scalar): the best function value found so far (possibly the
@@ -42,16 +60,48 @@ class InteriorPoint(BoxConstrainedQuadraticOptimizer):
                  ub,
                  eps=1e-10,
                  max_iter=1000,
+                 linear_solver='cholesky',
+                 cg_eps=1e-10,
                  callback=None,
                  callback_args=(),
-                 verbose=False):
+                 verbose=False,
+                 dtype=np.float64):
         super().__init__(f=f,
                          ub=ub,
                          eps=eps,
                          max_iter=max_iter,
                          callback=callback,
                          callback_args=callback_args,
-                         verbose=verbose)
+                         verbose=verbose,
+                         dtype=dtype)
+        if linear_solver not in ('cholesky', 'cg'):
+            raise ValueError(f'unknown linear solver {linear_solver}')
+        if linear_solver == 'cholesky' and not isinstance(self.f.Q, np.ndarray):
+            raise ValueError('the cholesky linear solver needs a dense Q, use the cg one instead')
+        self.linear_solver = linear_solver
+        if not cg_eps > 0:
+            raise ValueError('cg_eps must be > 0')
+        self.cg_eps = cg_eps
+
+    def _cg_solve(self, d, w, dx):
+        """
+        Solve the linear system (Q + diag(d)) dx = w by the preconditioned
+        ConjugateGradient, without forming the matrix of the system.
+
+        :param d: the positive diagonal added to Q
+        :param w: the right hand side of the linear system
+        :param dx: the starting point, i.e., the last solution
+        :return: the solution dx of the linear system
+        """
+        Q = self.f.Q
+        H = LinearOperator(Q.shape, matvec=lambda v: Q.dot(v.ravel()) + d * v.ravel())
+        diag = d if isinstance(Q, LinearOperator) else Q.diagonal() + d
+        M = LinearOperator(Q.shape, matvec=lambda v: v.ravel() / diag)
+        return ConjugateGradient(f=Quadratic(H, -w),
+                                 x=dx,
+                                 preconditioner=M,
+                                 eps=self.cg_eps * np.linalg.norm(w),
+                                 max_iter=self.f.ndim).minimize().x
 
     def minimize(self):
 
@@ -146,12 +196,14 @@ class InteriorPoint(BoxConstrainedQuadraticOptimizer):
         idx = np.logical_not(idx)
         lp[idx] = lp[idx] - self.g_x[idx]
 
+        dx = np.zeros(self.f.ndim)
+
         if self.verbose:
             print('iter\t cost\t\t p\t\t gap')
 
         while True:
-            self.f_x = self.f.function(self.x)
-            xQx = self.x.dot(self.f.Q).dot(self.x)
+            xQx = self.x.dot(self.f.Q.dot(self.x))
+            self.f_x = 0.5 * xQx + self.f.q.dot(self.x)
             p = -lp.T.dot(self.ub) - 0.5 * xQx
             gap = (self.f_x - p) / max(abs(self.f_x), 1)
 
@@ -186,13 +238,18 @@ class InteriorPoint(BoxConstrainedQuadraticOptimizer):
             mu = (self.f_x - p) / (4 * self.f.ndim * self.f.ndim)  # use \rho = 1 / (# of constraints)
 
             umx = self.ub - self.x
-            H = self.f.Q + np.diag(lp / umx + lm / self.x)
+            d = lp / umx + lm / self.x
             # w = \mu (np.ones(n) / umx - np.ones(n) / self.x) + lp - lm
             w = mu * (self.ub - 2 * self.x) / (umx * self.x) + lp - lm
 
-            # and use Cholesky to solve the system since
-            # H is a symmetric positive definite matrix
-            dx = cholesky_solve(np.linalg.cholesky(H), w)
+            if self.linear_solver == 'cholesky':
+                H = self.f.Q.copy()
+                H[np.diag_indices_from(H)] += d
+                # and use Cholesky to solve the system since
+                # H is a symmetric positive definite matrix
+                dx = cholesky_solve(np.linalg.cholesky(H), w)
+            else:
+                dx = self._cg_solve(d, w, dx)
 
             dlp = (mu * np.ones(self.f.ndim) + lp * dx) / umx - lp
 
@@ -42,14 +42,16 @@ class ProjectedGradient(BoxConstrainedQuadraticOptimizer):
                  max_iter=1000,
                  callback=None,
                  callback_args=(),
-                 verbose=False):
+                 verbose=False,
+                 dtype=np.float64):
         super().__init__(f=f,
                          ub=ub,
                          eps=eps,
                          max_iter=max_iter,
                          callback=callback,
                          callback_args=callback_args,
-                         verbose=verbose)
+                         verbose=verbose,
+                         dtype=dtype)
 
     def minimize(self):
 
@@ -57,7 +59,7 @@ class ProjectedGradient(BoxConstrainedQuadraticOptimizer):
             print('iter\t cost\t\t gnorm')
 
         while True:
-            self.f_x, self.g_x = self.f.function(self.x), self.f.jacobian(self.x)
+            self.f_x, self.g_x = self.f.function_and_jacobian(self.x)
             d = -self.g_x
 
             # project the direction over the active constraints
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+
+from optiml.ml.svm.kernels import gaussian
+from optiml.opti import Quadratic
+from optiml.opti.constrained import ActiveSet, InteriorPoint
+from optiml.opti.utils import generate_box_constrained_quadratic, cholesky_add, cholesky_delete
+
+
+def test_cholesky_add_delete():
+    Q, _, _ = generate_box_constrained_quadratic(ndim=10, seed=1)
+    L = np.linalg.cholesky(Q)
+    # the factor bordered by the last row and column is the one of Q
+    assert np.allclose(cholesky_add(np.linalg.cholesky(Q[:9, :9]), Q[:9, 9], Q[9, 9]), L)
+    for p in (0, 4, 9):
+        L_p = cholesky_delete(L, p)
+        assert np.allclose(L_p, np.tril(L_p))
+        Q_p = np.delete(np.delete(Q, p, axis=0), p, axis=1)
+        assert np.allclose(L_p.dot(L_p.T), Q_p)
+    with pytest.raises(np.linalg.LinAlgError):
+        cholesky_add(L, Q[:, 0], 0.)
+
+
+def test_ActiveSet_quadratic():
+    Q, q, ub = generate_box_constrained_quadratic(ndim=100, seed=2)
+    f = Quadratic(Q, q)
+    active_set = ActiveSet(f=f, ub=ub).minimize()
+    assert active_set.status == 'optimal'
+    assert np.isclose(active_set.f_x, InteriorPoint(f=f, ub=ub).minimize().f_x, rtol=1e-4)
+    # the bounds follow the dtype of the optimizer
+    assert ActiveSet(f=f, ub=ub, dtype=np.float32).ub.dtype == np.float32
+
+
+def test_ActiveSet_release_size():
+    X, y = make_classification(n_samples=300, random_state=1)
+    y = np.where(y == 1, 1., -1.)
+    f = Quadratic(gaussian(X) * np.outer(y, y), -np.ones_like(y))
+    ub = np.ones_like(y)
+    bland = ActiveSet(f=f, ub=ub).minimize()
+    batch = ActiveSet(f=f, ub=ub, release_size=100).minimize()
+    assert batch.status == 'optimal'
+    assert np.isclose(batch.f_x, bland.f_x)
+    assert batch.iter < bland.iter
+    with pytest.raises(ValueError):
+        ActiveSet(f=f, ub=ub, release_size=0)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -0,0 +1,40 @@
+import numpy as np
+import pytest
+import scipy.sparse as sp
+from scipy.sparse.linalg import aslinearoperator
+
+from optiml.opti import Quadratic
+from optiml.opti.constrained import InteriorPoint
+from optiml.opti.utils import generate_box_constrained_quadratic, cholesky_solve
+
+
+def test_cholesky_solve():
+    Q, q, _ = generate_box_constrained_quadratic(ndim=10, seed=1)
+    assert np.allclose(cholesky_solve(np.linalg.cholesky(Q), q), np.linalg.solve(Q, q))
+
+
+def test_InteriorPoint_cg():
+    Q, q, ub = generate_box_constrained_quadratic(ndim=100, seed=2)
+    cholesky = InteriorPoint(f=Quadratic(Q, q), ub=ub).minimize()
+    assert cholesky.status == 'optimal'
+    for Q_cg in (Q, sp.csr_matrix(Q)):
+        cg = InteriorPoint(f=Quadratic(Q_cg, q), ub=ub, linear_solver='cg').minimize()
+        assert cg.status == 'optimal'
+        assert np.isclose(cg.f_x, cholesky.f_x)
+    with pytest.raises(ValueError):
+        InteriorPoint(f=Quadratic(aslinearoperator(Q), q), ub=ub)
+
+
+def test_InteriorPoint_cg_low_rank():
+    # a low-rank Q = G G^T given by its factor is never formed
+    G = np.random.RandomState(3).standard_normal((500, 5))
+    q = np.random.RandomState(4).standard_normal(500)
+    ub = np.ones(500)
+    cg = InteriorPoint(f=Quadratic(aslinearoperator(G).dot(aslinearoperator(G.T)), q),
+                       ub=ub, linear_solver='cg').minimize()
+    assert cg.status == 'optimal'
+    assert np.isclose(cg.f_x, InteriorPoint(f=Quadratic(G.dot(G.T), q), ub=ub).minimize().f_x)
+
+
+if __name__ == "__main__":
+    pytest.main()
@@ -2,7 +2,7 @@ __all__ = ['LineSearchOptimizer',
            'Subgradient',  # 0th order methods
            # 1st order methods
            'SteepestGradientDescent', 'ConjugateGradient', 'NonlinearConjugateGradient', 'HeavyBallGradient',
-           'Newton', 'BFGS', 'LBFGS']  # 2nd order methods
+           'Newton', 'NewtonCG', 'BFGS', 'LBFGS']  # 2nd order methods
 
 from ._base import LineSearchOptimizer
 
@@ -10,5 +10,5 @@ from .gradient_descent import SteepestGradientDescent
 from .conjugate_gradient import ConjugateGradient, NonlinearConjugateGradient
 from .heavy_ball_gradient import HeavyBallGradient
 from .subgradient import Subgradient
-from .newton import Newton
+from .newton import Newton, NewtonCG
 from .quasi_newton import BFGS, LBFGS
@@ -1,15 +1,48 @@
 import numpy as np
+import scipy.sparse as sp
+from scipy.linalg import cho_solve
+from scipy.sparse.linalg import LinearOperator, aslinearoperator, spsolve_triangular
 
 from . import LineSearchOptimizer
+from ... import Quadratic
+from ...utils import incomplete_cholesky
 
 
 class ConjugateGradient(LineSearchOptimizer):
+    # Apply the (linear) Conjugate Gradient algorithm for the minimization of
+    # the provided quadratic function f(x) = 1/2 x^T Q x + q^T x, with Q
+    # symmetric positive definite, i.e., for the solution of Q x = -q.
+    #
+    # The step size along each direction d is the exact minimizer of f, i.e.,
+    # a = -(g^T d) / (d^T Q d), so that no line search is performed and each
+    # iteration costs a single product Q d, which is all that is needed of Q,
+    # e.g., a scipy sparse matrix or a LinearOperator. In exact arithmetic the
+    # algorithm converges in at most n iterations, and in fewer ones when the
+    # eigenvalues of Q are clustered, which is what a preconditioner M ~ Q^-1
+    # aims at, i.e., the directions are conjugate w.r.t. Q but built from the
+    # preconditioned gradients M g.
+    #
+    # The input and output parameters are the same of NonlinearConjugateGradient,
+    # except that the line search ones are unused and for:
+    #
+    # - preconditioner (string or LinearOperator, optional, default value None):
+    #   the preconditioner M. Possible values are:
+    #   = None: no preconditioning, i.e., M = I
+    #   = 'jacobi': the inverse of the diagonal of Q
+    #   = 'ichol': the inverse of L L^T, with L the incomplete Cholesky factor of
+    #     Q with zero fill-in, applied by two triangular solves
+    #   = a LinearOperator (or a matrix) giving the product M g
+    #   The 'jacobi' and the 'ichol' ones need Q to be dense or sparse.
+    #
+    # - status (string): as in NonlinearConjugateGradient, except for:
+    #
+    #   = 'unbounded': a direction d with d^T Q d <= 0 has been found, i.e., Q is
+    #     not positive definite and f() may be unbounded below
 
     def __init__(self,
                  f,
                  x,
-                 wf=0,
-                 r_start=0,
+                 preconditioner=None,
                  eps=1e-6,
                  max_iter=1000,
                  max_f_eval=1000,
@@ -38,15 +71,107 @@ class ConjugateGradient(LineSearchOptimizer):
                          callback=callback,
                          callback_args=callback_args,
                          verbose=verbose)
-        if wf < 0 or wf > 4:
-            raise ValueError(f'unknown NCG formula {wf}')
-        self.wf = wf
-        if not r_start >= 0:
-            raise ValueError('r_start must be >= 0')
-        self.r_start = r_start
+        # e.g., the Lagrangian dual of a box-constrained quadratic is not a quadratic in Q
+        if not isinstance(f, Quadratic) or f.ndim != f.Q.shape[0]:
+            raise TypeError(f'{f} is not a quadratic function')
+        self.preconditioner = preconditioner
+        self.M = self._preconditioner(preconditioner)
+
+    def _preconditioner(self, preconditioner):
+        Q = self.f.Q
+        if preconditioner is None:
+            return None
+        if isinstance(preconditioner, str):
+            if preconditioner not in ('jacobi', 'ichol'):
+                raise ValueError(f'unknown preconditioner {preconditioner}')
+            if isinstance(Q, LinearOperator):
+                raise ValueError(f'the {preconditioner} preconditioner needs Q to be dense or sparse')
+            if preconditioner == 'jacobi':
+                diag = Q.diagonal()
+                return LinearOperator(Q.shape, matvec=lambda g: g.ravel() / diag)
+            L = incomplete_cholesky(Q)
+            if sp.issparse(L):
+                Lt = L.T.tocsr()
+                return LinearOperator(Q.shape, matvec=lambda g: spsolve_triangular(
+                    Lt, spsolve_triangular(L, g.ravel(), lower=True), lower=False))
+            return LinearOperator(Q.shape, matvec=lambda g: cho_solve((L, True), g.ravel(), check_finite=False))
+        return aslinearoperator(preconditioner)
 
     def minimize(self):
-        raise NotImplementedError
+
+        if self.verbose:
+            print('iter\t cost\t\t gnorm', end='')
+            if self.f.f_star() < np.inf:
+                print('\t\t gap\t\t rate\t', end='')
+                prev_v = np.inf
+            print('\t beta\t\t astar', end='')
+
+        self.g_x = self.f.jacobian(self.x)
+        z = self.g_x if self.M is None else self.M.dot(self.g_x)  # preconditioned gradient
+        gz = self.g_x.dot(z)
+        d = -z
+
+        while True:
+            # since Q x = g - q, f(x) is computed without any other product with Q
+            self.f_x = 0.5 * self.x.dot(self.g_x + self.f.q)
+            ng = np.linalg.norm(self.g_x)
+
+            if self.eps < 0:
+                ng0 = -ng  # norm of first subgradient
+            else:
+                ng0 = 1  # un-scaled stopping criterion
+
+            if self.is_verbose():
+                print('\n{:4d}\t{: 1.4e}\t{: 1.4e}'.format(self.iter, self.f_x, ng), end='')
+                if self.f.f_star() < np.inf:
+                    print('\t{: 1.4e}'.format(self.f_x - self.f.f_star()), end='')
+                    if prev_v < np.inf:
+                        print('\t{: 1.4e}'.format((self.f_x - self.f.f_star()) / (prev_v - self.f.f_star())), end='')
+                    else:
+                        print('\t\t\t', end='')
+                    prev_v = self.f_x
+
+            # stopping criteria
+            if ng <= self.eps * ng0:
+                self.status = 'optimal'
+                break
+
+            if self.iter > self.max_iter:
+                self.status = 'stopped'
+                break
+
+            Qd = self.f.Q.dot(d)
+            dQd = d.dot(Qd)
+
+            if dQd <= 0:
+                self.status = 'unbounded'
+                break
+
+            # exact step size along d
+            a = -self.g_x.dot(d) / dQd
+
+            try:
+                self.callback()
+            except StopIteration:
+                break
+
+            self.x = self.x + a * d
+            self.g_x = self.g_x + a * Qd
+
+            z = self.g_x if self.M is None else self.M.dot(self.g_x)
+            gz, past_gz = self.g_x.dot(z), gz
+            beta = gz / past_gz
+            d = -z + beta * d
+
+            if self.is_verbose():
+                print('\t{: 1.4e}\t{: 1.4e}'.format(beta, a), end='')
+
+            self.iter += 1
+
+        if self.verbose:
+            print('\n')
+
+        return self
 
 
 class NonlinearConjugateGradient(LineSearchOptimizer):
@@ -212,8 +337,9 @@ class NonlinearConjugateGradient(LineSearchOptimizer):
                 prev_v = np.inf
             print('\t beta\t\tls\tit\t astar', end='')
 
+        self.f_x, self.g_x = self.f.function_and_jacobian(self.x)
+
         while True:
-            self.f_x, self.g_x = self.f.function(self.x), self.f.jacobian(self.x)
             ng = np.linalg.norm(self.g_x)
 
             if self.eps < 0:
@@ -296,8 +422,8 @@ class NonlinearConjugateGradient(LineSearchOptimizer):
             except StopIteration:
                 break
 
-            # update new point
-            self.x = last_x
+            # update new point and reuse the gradient computed by the line search
+            self.x, self.g_x = last_x, last_g
 
             self.iter += 1
 
@@ -170,8 +170,9 @@ class SteepestGradientDescent(LineSearchOptimizer):
                 prev_v = np.inf
             print('\tls\tit\t astar', end='')
 
+        self.f_x, self.g_x = self.f.function_and_jacobian(self.x)
+
         while True:
-            self.f_x, self.g_x = self.f.function(self.x), self.f.jacobian(self.x)
             ng = np.linalg.norm(self.g_x)
 
             if self.eps < 0:
@@ -223,8 +224,8 @@ class SteepestGradientDescent(LineSearchOptimizer):
             except StopIteration:
                 break
 
-            # update new point
-            self.x = last_x
+            # update new point and reuse the gradient computed by the line search
+            self.x, self.g_x = last_x, last_g
 
             self.iter += 1
 
@@ -158,8 +158,9 @@ class HeavyBallGradient(LineSearchOptimizer):
 
         past_d = np.zeros(self.f.ndim)
 
+        self.f_x, self.g_x = self.f.function_and_jacobian(self.x)
+
         while True:
-            self.f_x, self.g_x = self.f.function(self.x), self.f.jacobian(self.x)
             ng = np.linalg.norm(self.g_x)
 
             if self.eps < 0:
@@ -221,7 +222,8 @@ class HeavyBallGradient(LineSearchOptimizer):
             except StopIteration:
                 break
 
-            self.x = last_x
+            # update new point and reuse the gradient computed by the line search
+            self.x, self.g_x = last_x, last_g
 
             self.iter += 1
 
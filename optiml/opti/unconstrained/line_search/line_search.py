@@ -100,7 +100,7 @@ class BacktrackingLineSearch(LineSearch):
         def f2phi(f, d, x, a, f_eval):
             # phi(a) = f(x + a * d)
             last_x = x + a * d
-            phi_a, last_g = f.function(last_x), f.jacobian(last_x)
+            phi_a, last_g = f.function_and_jacobian(last_x)
             f_eval += 1
             return phi_a, last_x, last_g, f_eval
 
@@ -195,7 +195,7 @@ class ArmijoWolfeLineSearch(LineSearch):
             # phi'(a) = <\nabla f(x + a * d), d>
 
             last_x = x + a * d
-            phi_a, last_g = f.function(last_x), f.jacobian(last_x)
+            phi_a, last_g = f.function_and_jacobian(last_x)
             phi_p = d.T.dot(last_g)
             f_eval += 1
             return phi_a, phi_p, last_x, last_g, f_eval
@@ -1,4 +1,5 @@
 import numpy as np
+from scipy.linalg import cho_factor, cho_solve
 
 from . import LineSearchOptimizer
 
@@ -49,8 +50,12 @@ class Newton(LineSearchOptimizer):
     #   the simpler Backtracking line search should be used instead
     #
     # - delta (real scalar, optional, default value 1e-6): minimum positive
-    #   value for the eigenvalues of the modified Hessian used to compute the
-    #   Newton direction
+    #   value for the eigenvalues of the Hessian, which is modified by adding a
+    #   multiple of the identity if the Cholesky factorization of the Hessian
+    #   minus delta I fails. The multiple starts from 1e-3 times the Frobenius
+    #   norm of the Hessian and is multiplied by 10 until the Cholesky
+    #   factorization of the modified Hessian succeeds. The Newton direction is
+    #   then computed by two triangular solves with the Cholesky factor
     #
     # - tau (real scalar, optional, default value 0.9): scaling parameter for
     #   the line search. In the Armijo-Wolfe line search it is used in the
@@ -141,6 +146,33 @@ class Newton(LineSearchOptimizer):
             raise ValueError('delta must be > 0')
         self.delta = delta
 
+    def _modified_cholesky(self, H_work):
+        """Compute the Cholesky factorization of H_x + shift I, where the shift is 0 if the
+        smallest eigenvalue of H_x is at least delta, i.e., if H_x - delta I is positive
+        definite, so a positive definite H_x whose smallest eigenvalue is < delta is shifted
+        as well. Otherwise, as in the Cholesky with added multiple of the identity of
+        Nocedal and Wright, the shift starts from the largest between 1e-3 ||H_x||_F and
+        delta minus the most negative diagonal entry of H_x, if any, and it is multiplied
+        by 10 until the factorization succeeds, so that the full spectrum of H_x is never
+        computed.
+        :param H_work: the [n x n] work matrix the factorizations are computed into.
+        :return: the shift and the Cholesky factorization of the modified Hessian.
+        """
+        np.copyto(H_work, self.H_x)
+        H_work.flat[::H_work.shape[0] + 1] -= self.delta
+        try:
+            cho_factor(H_work, lower=True, overwrite_a=True, check_finite=False)
+            shift = 0.
+        except np.linalg.LinAlgError:
+            shift = max(1e-3 * np.linalg.norm(self.H_x), self.delta - min(np.min(self.H_x.diagonal()), 0.))
+        while True:
+            np.copyto(H_work, self.H_x)
+            H_work.flat[::H_work.shape[0] + 1] += shift
+            try:
+                return shift, cho_factor(H_work, lower=True, overwrite_a=True, check_finite=False)
+            except np.linalg.LinAlgError:
+                shift = max(10 * shift, self.delta)
+
     def minimize(self):
         last_x = np.zeros(self.f.ndim)  # last point visited in the line search
         last_g = np.zeros(self.f.ndim)  # gradient of last_x
@@ -150,10 +182,15 @@ class Newton(LineSearchOptimizer):
             if self.f.f_star() < np.inf:
                 print('\t gap\t\t rate\t', end='')
                 prev_v = np.inf
-            print('\t delta\t\tls\tit\t astar', end='')
+            print('\t shift\t\tls\tit\t astar', end='')
+
+        self.f_x, self.g_x = self.f.function_and_jacobian(self.x)
+
+        # the modified Hessians are factorized in place into this work matrix
+        H_work = np.empty((self.f.ndim, self.f.ndim))
 
         while True:
-            self.f_x, self.g_x, self.H_x = self.f.function(self.x), self.f.jacobian(self.x), self.f.hessian(self.x)
+            self.H_x = self.f.hessian(self.x)
             ng = np.linalg.norm(self.g_x)
 
             if self.eps < 0:
@@ -181,16 +218,179 @@ class Newton(LineSearchOptimizer):
                 break
 
             # compute Newton's direction
-            lambda_n = min(np.linalg.eigvalsh(self.H_x))  # smallest eigenvalue
-            if lambda_n < self.delta:
-                if self.is_verbose():
-                    print('\t{: 1.4e}'.format(self.delta - lambda_n), end='')
-                self.H_x = self.H_x + (self.delta - lambda_n) * np.identity(len(self.g_x))
+            shift, factor = self._modified_cholesky(H_work)
+
+            if self.is_verbose():
+                print('\t{: 1.4e}'.format(shift), end='')
+
+            d = -cho_solve(factor, self.g_x, check_finite=False)
+
+            phi_p0 = self.g_x.T.dot(d)
+
+            # compute step size: in Newton's method, the default initial step size is 1
+            a, self.f_x, last_x, last_g, self.f_eval = self.line_search.search(
+                d, self.x, last_x, last_g, self.f_eval, self.f_x, phi_p0, self.is_verbose())
+
+            # output statistics
+            if self.is_verbose():
+                print('\t{: 1.4e}'.format(a), end='')
+
+            if a <= self.line_search.min_a:
+                self.status = 'error'
+                break
+
+            if self.f_x <= self.m_inf:
+                self.status = 'unbounded'
+                break
+
+            try:
+                self.callback()
+            except StopIteration:
+                break
+
+            # update new point and reuse the gradient computed by the line search
+            self.x, self.g_x = last_x, last_g
+
+            self.iter += 1
+
+        if self.verbose:
+            print('\n')
+
+        return self
+
+
+class NewtonCG(LineSearchOptimizer):
+    # Apply a truncated (Hessian-free) Newton's method for the minimization of
+    # the provided function f.
+    #
+    # Rather than forming the [n x n] Hessian and inverting it, the Newton
+    # system H d = -g is solved inexactly by the linear Conjugate Gradient
+    # method, which only needs the products of the Hessian with vectors given
+    # by f.hessian_vector_product, so that both memory and time per iteration
+    # are O(n) times the number of CG iterations rather than O(n^2) and O(n^3).
+    # The CG iterations are stopped as soon as the residual is small enough
+    # w.r.t. the gradient, i.e., ||H d + g|| <= min(0.5, sqrt(||g||)) ||g||,
+    # or a direction of nonpositive curvature is found, in which case the
+    # current iterate (or the steepest descent direction at the first CG
+    # iteration) is taken, so that d is always a descent direction.
+    #
+    # The input and output parameters are the same of Newton, except for:
+    #
+    # - max_cg_iter (integer scalar, optional, default value None): the maximum
+    #   number of CG iterations for each Newton direction. If None, n is used,
+    #   i.e., the number of steps after which CG terminates in exact arithmetic.
+
+    def __init__(self,
+                 f,
+                 x,
+                 eps=1e-6,
+                 max_iter=1000,
+                 max_f_eval=1000,
+                 m1=0.01,
+                 m2=0.9,
+                 a_start=1,
+                 max_cg_iter=None,
+                 tau=0.9,
+                 sfgrd=0.01,
+                 m_inf=-np.inf,
+                 min_a=1e-12,
+                 callback=None,
+                 callback_args=(),
+                 verbose=False):
+        super().__init__(f=f,
+                         x=x,
+                         eps=eps,
+                         max_iter=max_iter,
+                         max_f_eval=max_f_eval,
+                         m1=m1,
+                         m2=m2,
+                         a_start=a_start,
+                         tau=tau,
+                         sfgrd=sfgrd,
+                         m_inf=m_inf,
+                         min_a=min_a,
+                         callback=callback,
+                         callback_args=callback_args,
+                         verbose=verbose)
+        if max_cg_iter is not None and not max_cg_iter > 0:
+            raise ValueError('max_cg_iter must be > 0')
+        self.max_cg_iter = max_cg_iter
+        self.cg_iter = 0
+
+    def _newton_direction(self, ng):
+        """Solve inexactly the Newton system H d = -g by the Conjugate Gradient method.
+        :param ng: the norm of the gradient at the current point.
+        :return: the Newton direction and the number of CG iterations performed.
+        """
+        max_cg_iter = self.f.ndim if self.max_cg_iter is None else self.max_cg_iter
+        tol = min(0.5, np.sqrt(ng)) * ng
+
+        d = np.zeros_like(self.g_x)
+        r = self.g_x.copy()  # the residual H d + g
+        p = -r
+        rr = r.dot(r)
+        for i in range(max_cg_iter):
+            Hp = self.f.hessian_vector_product(self.x, p)
+            pHp = p.dot(Hp)
+            if pHp <= 0:  # nonpositive curvature
+                return (-self.g_x if i == 0 else d), i + 1
+            alpha = rr / pHp
+            d += alpha * p
+            r += alpha * Hp
+            rr_new = r.dot(r)
+            if np.sqrt(rr_new) <= tol:
+                return d, i + 1
+            p *= rr_new / rr
+            p -= r
+            rr = rr_new
+        return d, max_cg_iter
+
+    def minimize(self):
+        last_x = np.zeros(self.f.ndim)  # last point visited in the line search
+        last_g = np.zeros(self.f.ndim)  # gradient of last_x
+
+        if self.verbose:
+            print('iter\tfeval\t cost\t\t gnorm\t', end='')
+            if self.f.f_star() < np.inf:
+                print('\t gap\t\t rate\t', end='')
+                prev_v = np.inf
+            print('\tcg_it\tls\tit\t astar', end='')
+
+        self.f_x, self.g_x = self.f.function_and_jacobian(self.x)
+
+        while True:
+            ng = np.linalg.norm(self.g_x)
+
+            if self.eps < 0:
+                ng0 = -ng  # norm of first subgradient
             else:
-                if self.is_verbose():
-                    print('\t{: 1.4e}'.format(self.delta), end='')
+                ng0 = 1  # un-scaled stopping criterion
 
-            d = -np.linalg.inv(self.H_x).dot(self.g_x)
+            if self.is_verbose():
+                print('\n{:4d}\t{:4d}\t{: 1.4e}\t{: 1.4e}'.format(self.iter, self.f_eval, self.f_x, ng), end='')
+                if self.f.f_star() < np.inf:
+                    print('\t{: 1.4e}'.format(self.f_x - self.f.f_star()), end='')
+                    if prev_v < np.inf:
+                        print('\t{: 1.4e}'.format((self.f_x - self.f.f_star()) / (prev_v - self.f.f_star())), end='')
+                    else:
+                        print('\t\t', end='')
+                    prev_v = self.f_x
+
+            # stopping criteria
+            if ng <= self.eps * ng0:
+                self.status = 'optimal'
+                break
+
+            if self.iter > self.max_iter or self.f_eval > self.line_search.max_f_eval:
+                self.status = 'stopped'
+                break
+
+            # compute the truncated Newton's direction
+            d, cg_iter = self._newton_direction(ng)
+            self.cg_iter += cg_iter
+
+            if self.is_verbose():
+                print('\t{:4d}'.format(cg_iter), end='')
 
             phi_p0 = self.g_x.T.dot(d)
 
@@ -215,8 +415,8 @@ class Newton(LineSearchOptimizer):
             except StopIteration:
                 break
 
-            # update new point
-            self.x = last_x
+            # update new point and reuse the gradient computed by the line search
+            self.x, self.g_x = last_x, last_g
 
             self.iter += 1
 
@@ -153,8 +153,9 @@ class BFGS(LineSearchOptimizer):
                 prev_v = np.inf
             print('\tls\tit\t astar\t\t rho', end='')
 
+        self.f_x, self.g_x = self.f.function_and_jacobian(self.x)
+
         while True:
-            self.f_x, self.g_x = self.f.function(self.x), self.f.jacobian(self.x)
             ng = np.linalg.norm(self.g_x)
 
             if self.eps < 0:
@@ -244,8 +245,8 @@ class BFGS(LineSearchOptimizer):
             except StopIteration:
                 break
 
-            # update new point
-            self.x = last_x
+            # update new point and reuse the gradient computed by the line search
+            self.x, self.g_x = last_x, last_g
 
             self.iter += 1
 
@@ -256,10 +257,33 @@ class BFGS(LineSearchOptimizer):
 
 
 class LBFGS(LineSearchOptimizer):
+    # Apply a limited-memory Quasi-Newton approach, in particular using the
+    # L-BFGS two-loop recursion, for the minimization of the provided function f.
+    #
+    # Rather than the dense [n x n] approximation of the inverse of the Hessian
+    # kept by BFGS, only the last mem pairs (s^i, y^i) are stored, in a couple
+    # of preallocated [mem x n] ring buffers, and the product between the
+    # approximation and the gradient is computed on the fly, so that both memory
+    # and time per iteration are O(mem n) rather than O(n^2). A pair whose
+    # curvature y^T s is not positive, e.g., on a nonconvex function, is not
+    # stored, so that the approximation is kept positive definite.
+    #
+    # The input and output parameters are the same of BFGS, except for:
+    #
+    # - mem (integer scalar, optional, default value 10): the number of the
+    #   most recent pairs (s^i, y^i) used to approximate the inverse of the
+    #   Hessian. Has to be > 0.
+    #
+    # - delta (real scalar, optional, default value 1): the initial
+    #   approximation of the inverse of the Hessian is taken as delta * I at
+    #   the first iteration, while at the following ones it is taken as
+    #   gamma * I with gamma = s^T y / y^T y of the most recent pair. Has to
+    #   be > 0.
 
     def __init__(self,
                  f,
                  x,
+                 mem=10,
                  eps=1e-6,
                  max_iter=1000,
                  max_f_eval=1000,
@@ -289,7 +313,134 @@ class LBFGS(LineSearchOptimizer):
                          callback=callback,
                          callback_args=callback_args,
                          verbose=verbose)
+        if not mem > 0:
+            raise ValueError('mem must be > 0')
+        self.mem = int(mem)
+        if not delta > 0:
+            raise ValueError('delta must be > 0')
         self.delta = delta
+        # ring buffers of the last mem pairs (s^i, y^i) and of rho^i = 1 / y^i s^i
+        self.S = np.zeros((self.mem, self.f.ndim))
+        self.Y = np.zeros((self.mem, self.f.ndim))
+        self.rho = np.zeros(self.mem)
+        self.alpha = np.zeros(self.mem)
+        self.n_pairs = 0  # number of pairs stored so far
+
+    def _inverse_hessian_product(self, g):
+        """
+        Compute the product between the L-BFGS approximation of the inverse
+        of the Hessian and g by means of the two-loop recursion.
+        :param g: ([n x 1] real column vector): the vector to be multiplied.
+        :return:  ([n x 1] real column vector): the approximated H^-1 g.
+        """
+        k = min(self.n_pairs, self.mem)
+        newest = (self.n_pairs - 1) % self.mem
+        # from the newest to the oldest pair
+        order = [(newest - i) % self.mem for i in range(k)]
+
+        q = g.copy()
+        for i in order:
+            self.alpha[i] = self.rho[i] * self.S[i].dot(q)
+            q -= self.alpha[i] * self.Y[i]
+
+        if k:
+            q *= self.S[newest].dot(self.Y[newest]) / self.Y[newest].dot(self.Y[newest])
+        else:
+            q *= self.delta
+
+        for i in reversed(order):
+            beta = self.rho[i] * self.Y[i].dot(q)
+            q += (self.alpha[i] - beta) * self.S[i]
+
+        return q
 
     def minimize(self):
-        raise NotImplementedError
+        last_x = np.zeros(self.f.ndim)  # last point visited in the line search
+        last_g = np.zeros(self.f.ndim)  # gradient of last_x
+
+        if self.verbose:
+            print('iter\tfeval\t cost\t\t gnorm\t', end='')
+            if self.f.f_star() < np.inf:
+                print('\t gap\t\t rate\t', end='')
+                prev_v = np.inf
+            print('\tls\tit\t astar\t\t rho', end='')
+
+        self.f_x, self.g_x = self.f.function_and_jacobian(self.x)
+
+        while True:
+            ng = np.linalg.norm(self.g_x)
+
+            if self.eps < 0:
+                ng0 = -ng  # norm of first subgradient
+            else:
+                ng0 = 1  # un-scaled stopping criterion
+
+            if self.is_verbose():
+                print('\n{:4d}\t{:4d}\t{: 1.4e}\t{: 1.4e}'.format(self.iter, self.f_eval, self.f_x, ng), end='')
+                if self.f.f_star() < np.inf:
+                    print('\t{: 1.4e}'.format(self.f_x - self.f.f_star()), end='')
+                    if prev_v < np.inf:
+                        print('\t{: 1.4e}'.format((self.f_x - self.f.f_star()) / (prev_v - self.f.f_star())), end='')
+                    else:
+                        print('\t\t', end='')
+                    prev_v = self.f_x
+
+            # stopping criteria
+            if ng <= self.eps * ng0:
+                self.status = 'optimal'
+                break
+
+            if self.iter > self.max_iter or self.f_eval > self.line_search.max_f_eval:
+                self.status = 'stopped'
+                break
+
+            # compute approximation to Newton's direction
+            d = -self._inverse_hessian_product(self.g_x)
+
+            phi_p0 = self.g_x.T.dot(d)
+
+            # compute step size: as in Newton's method, the default initial step size is 1
+            a, self.f_x, last_x, last_g, self.f_eval = self.line_search.search(
+                d, self.x, last_x, last_g, self.f_eval, self.f_x, phi_p0, self.is_verbose())
+
+            # output statistics
+            if self.is_verbose():
+                print('\t{: 1.4e}'.format(a), end='')
+
+            if a <= self.line_search.min_a:
+                self.status = 'error'
+                break
+
+            if self.f_x <= self.m_inf:
+                self.status = 'unbounded'
+                break
+
+            # the curvature y^i s^i, with s^i = a d, is checked before storing the new
+            # pair, so that a pair which would break the positive definiteness of the
+            # approximation is skipped without overwriting the oldest stored one
+            if a * (last_g.dot(d) - phi_p0) >= 1e-16:
+                # store the new pair overwriting the oldest one
+                i = self.n_pairs % self.mem
+                np.subtract(last_x, self.x, out=self.S[i])  # s^i = x^{i + 1} - x^i
+                np.subtract(last_g, self.g_x, out=self.Y[i])  # y^i = \nabla f(x^{i + 1}) - \nabla f(x^i)
+
+                self.rho[i] = 1 / self.Y[i].dot(self.S[i])
+                self.n_pairs += 1
+
+                if self.is_verbose():
+                    print('\t{: 1.4e}'.format(self.rho[i]), end='')
+
+            try:
+                self.callback()
+            except StopIteration:
+                break
+
+            # update new point and reuse the gradient computed by the line search
+            self.x, self.g_x = last_x, last_g
+
+            self.iter += 1
+
+        if self.verbose:
+            print('\n')
+
+        return self
@@ -140,7 +140,7 @@ class Subgradient(LineSearchOptimizer):
             delta = 0  # required displacement from f_ref
 
         while True:
-            self.f_x, self.g_x = self.f.function(self.x), self.f.jacobian(self.x)
+            self.f_x, self.g_x = self.f.function_and_jacobian(self.x)
             ng = np.linalg.norm(self.g_x)
 
             if self.eps > 0:  # target-level step size
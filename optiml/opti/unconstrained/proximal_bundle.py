@@ -1,5 +1,4 @@
 import numpy as np
-from cvxpy import Variable, Problem, Minimize, sum_squares
 
 from .. import Optimizer
 
@@ -104,6 +103,8 @@ class ProximalBundle(Optimizer):
         self.master_verbose = master_verbose
 
     def minimize(self):
+        # cvxpy is imported only when the master problems have to be solved
+        from cvxpy import Variable, Problem, Minimize, sum_squares
 
         if self.verbose:
             if self.f.f_star() < np.inf:
@@ -115,7 +116,7 @@ class ProximalBundle(Optimizer):
 
             if self.iter == 0:
                 # compute first function and subgradient
-                self.f_x, self.g_x = self.f.function(self.x), self.f.jacobian(self.x)
+                self.f_x, self.g_x = self.f.function_and_jacobian(self.x)
 
                 G = self.g_x.T  # matrix of subgradients
                 F = self.f_x - self.g_x.T.dot(self.x)  # vector of translated function values
@@ -181,7 +182,7 @@ class ProximalBundle(Optimizer):
             last_x = self.x - d
 
             # compute function and subgradient
-            fd, self.g_x = self.f.function(last_x), self.f.jacobian(last_x)
+            fd, self.g_x = self.f.function_and_jacobian(last_x)
 
             if fd <= self.m_inf:
                 self.status = 'unbounded'
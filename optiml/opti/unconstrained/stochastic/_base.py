@@ -1,9 +1,12 @@
 import itertools
+import queue
+import threading
 import warnings
 from abc import ABC
 
 import numpy as np
-from sklearn.utils import shuffle
+import scipy.sparse as sp
+from sklearn.utils import check_random_state
 
 from ... import Optimizer
 
@@ -23,7 +26,9 @@ class StochasticOptimizer(Optimizer, ABC):
                  callback_args=(),
                  shuffle=True,
                  random_state=None,
-                 verbose=False):
+                 prefetch=None,
+                 verbose=False,
+                 dtype=np.float64):
         """
 
         :param f: the objective function.
@@ -32,11 +37,18 @@ class StochasticOptimizer(Optimizer, ABC):
                     criterion: the algorithm is stopped when the norm of the gradient is less
                     than or equal to eps.
         :param epochs: (integer scalar, optional, default value 1000): the maximum number of iterations.
+        :param prefetch: (integer scalar, optional, default value None): if not None, the next
+                         `prefetch` mini batches are gathered by a background thread while the
+                         current step is computed. The mini batches are the same, and in the
+                         same order, as the ones gathered synchronously.
         :param verbose: (boolean, optional, default value False): print details about each iteration
                         if True, nothing otherwise.
+        :param dtype: (numpy floating type, optional, default value np.float64): the type of the
+                      current point and so of the steps and of the moment estimates, e.g., np.float32
+                      to halve their memory, provided that f computes the gradient in the same type.
         """
 
-        super().__init__(f, x, eps, epochs, callback, callback_args, verbose)
+        super().__init__(f, x, eps, epochs, callback, callback_args, verbose, dtype)
         if not step_size > 0:
             raise ValueError('step_size must be > 0')
         self.step_size = step_size
@@ -50,52 +62,236 @@ class StochasticOptimizer(Optimizer, ABC):
         self.epoch = 0
         self.shuffle = shuffle
         self.random_state = random_state
+        # the shuffling goes on across reset_batches calls rather than restarting
+        self._random_state = check_random_state(random_state)
         self.step = 0
+        if prefetch is not None and not prefetch > 0:
+            raise ValueError('prefetch must be > 0')
+        self.prefetch = prefetch
 
-        if batch_size is None:
+        self._batch_size = batch_size
+        self.batches = None
+        self.reset_batches()
+        if self.batch_size is not None:
+            self.max_iter *= self.n_batches
+
+    def reset_batches(self):
+        """Restart the mini batches from the current f.args(), e.g., after the data
+        of f have been replaced by a new chunk to train on it out of core, keeping
+        the state of the optimizer, i.e., the current point, the last step and the
+        moment estimates of the adaptive methods, so that the next call to minimize
+        goes on from where the last one stopped.
+        """
+        self._stop_prefetch()
+        # the iteration from which the epochs over the current batches are counted
+        self._batches_start_iter = self.iter
+
+        if self._batch_size is None:
             self.batch_size = None
-            self.batches = itertools.repeat(f.args())
+            self.batches = itertools.repeat(self.f.args())
         else:
-            n_samples = len(f.args()[0])
+            n_samples = self.f.args()[0].shape[0]
 
-            if batch_size < 1 or batch_size > n_samples:
+            if self._batch_size < 1 or self._batch_size > n_samples:
                 warnings.warn('Got `batch_size` less than 1 or larger than '
                               'sample size. It is going to be clipped.')
-            self.batch_size = np.clip(batch_size, 1, n_samples)
+            self.batch_size = np.clip(self._batch_size, 1, n_samples)
 
-            self.n_batches, rest = divmod(len(f.args()[0]), self.batch_size)
+            self.n_batches, rest = divmod(n_samples, self.batch_size)
             if rest:
                 self.n_batches += 1
 
-            self.max_iter *= self.n_batches
+            if self.prefetch is None:
+                self.batches = self.iter_mini_batches()
+            else:
+                # the consumer holds a batch while the producer may hold another one
+                # ready to be enqueued, so prefetch + 2 sets of buffers are needed
+                self.batches = BatchPrefetcher(self.iter_mini_batches(n_buffers=self.prefetch + 2), self.prefetch)
+
+    def minimize_epoch(self):
+        """Go on from the current state with a single further epoch, i.e., a step per
+        mini batch or a single step if each step uses the whole data, e.g., to train a
+        model out of core one chunk of data at a time after reset_batches.
+        :return: the optimizer itself.
+        """
+        if self.is_batch_end():
+            # each full batch iteration ends an epoch before its step, so the run
+            # is bounded to a single iteration by the batches rather than by the epochs
+            batches = self.batches
+            self.batches = itertools.islice(batches, 1)
+            self.epochs = self.epoch + 2
+            self.minimize()
+            self.batches = batches
+            self._stop_prefetch()
+        else:
+            self.epochs = self.epoch + 1
+            self.minimize()
+        return self
 
-            self.batches = (i for i in self.iter_mini_batches())
-
-    def iter_mini_batches(self):
-        """Return an iterator that successively yields tuples containing aligned
-        mini batches of size batch_size from sliceable objects given in f.args(), in
-        random order without replacement.
-        Because different containers might require slicing over different
-        dimensions, the dimension of each container has to be givens as a list
-        dims.
-        :param: Xy: tuple of arrays to be sliced into mini batches in alignment with the others
-        :param: batch_size: size of each batch
+    def iter_mini_batches(self, n_buffers=1):
+        """Return an iterator that successively yields lists containing aligned
+        mini batches of size batch_size from the sliceable objects given in f.args(),
+        sliced along their first dimension.
+        If shuffle is True, the sample indices are permuted in place once per epoch
+        and each mini batch is gathered with np.take into a buffer allocated once,
+        so that no new batch array is allocated in steady state; otherwise, the mini
+        batches are contiguous views of the data. In both cases the yielded arrays
+        are only valid until the next mini batch is requested, unless n_buffers
+        sets of buffers are used in turn.
+        :param n_buffers: the number of sets of buffers the mini batches are gathered into.
         :return: infinite iterator of mini batches in random order (without replacement)
         """
+        args = self.f.args()
+        n_samples = args[0].shape[0]
 
-        while True:
-            idx = list(range(self.n_batches))
+        if not self.shuffle:
             while True:
-                if self.shuffle:
-                    shuffle(idx, random_state=self.random_state)
-                for i in idx:
-                    start = i * self.batch_size
-                    stop = (i + 1) * self.batch_size
-                    yield [param[slice(start, stop)] for param in self.f.args()]
+                for start in range(0, n_samples, self.batch_size):
+                    yield [param[start:start + self.batch_size] for param in args]
+
+        idx = np.arange(n_samples)
+        # sparse matrices cannot be gathered in place, so they are fancy indexed
+        buffers = [[None if sp.issparse(param) else
+                    np.empty((self.batch_size,) + param.shape[1:], dtype=param.dtype)
+                    for param in args] for _ in range(n_buffers)]
+        batches = [{size: [None if buffer is None else buffer[:size] for buffer in buffer_set]
+                    for size in (self.batch_size, n_samples - (self.n_batches - 1) * self.batch_size)}
+                   for buffer_set in buffers]
+
+        n_yielded = 0
+        while True:
+            self._random_state.shuffle(idx)
+            for start in range(0, n_samples, self.batch_size):
+                batch_idx = idx[start:start + self.batch_size]
+                batch = batches[n_yielded % n_buffers][batch_idx.size]
+                for i, param in enumerate(args):
+                    if sp.issparse(param):
+                        batch[i] = param[batch_idx]
+                    else:
+                        # mode='clip' avoids the internal buffering of out with mode='raise'
+                        np.take(param, batch_idx, axis=0, out=batch[i], mode='clip')
+                n_yielded += 1
+                yield batch
+
+    def _requires_f_x(self):
+        # the objective value is needed only to be printed at the end of the batch
+        # or to be passed to the callback (which also stores it if f is plottable)
+        return (callable(self._callback) or self.f.ndim <= 3 or
+                (self.is_batch_end() and self.is_verbose()))
+
+    def _evaluate(self, batch):
+        """Evaluate the objective function at the current point in a lazy fashion,
+        i.e., the function value is computed only if it will be used while the
+        gradient is computed only if the step does not need it somewhere else,
+        e.g., at the look-ahead point of the Nesterov momentum.
+        :param batch: the current mini batch
+        """
+        if self.momentum_type == 'nesterov':
+            if self._requires_f_x():
+                self.f_x = self.f.function(self.x, *batch)
+        elif self._requires_f_x():
+            self.f_x, self.g_x = self.f.function_and_jacobian(self.x, *batch)
+        else:
+            self.g_x = self.f.jacobian(self.x, *batch)
+
+    def _momentum_step(self, batch):
+        """Scale in place the last step by the momentum, i.e., the step1 of the momentum
+        methods, and, if the momentum is nesterov, move the current point along it and
+        evaluate the gradient at the look-ahead point.
+        :param batch: the current mini batch
+        """
+        if self.momentum_type != 'none':
+            self.step *= self.momentum
+            if self.momentum_type == 'nesterov':
+                self.x -= self.step
+                self.g_x = self.f.jacobian(self.x, *batch)
+
+    def _update(self, step2):
+        """Move the current point along -(step1 + step2), where step1 is the
+        momentum step already in self.step and step2 has been computed into
+        self._buffer, updating self.step in place without any new array.
+        :param step2: the step computed by the optimizer into self._buffer
+        """
+        if self.momentum_type == 'standard':
+            self.step += step2
+            self.x -= self.step
+        elif self.momentum_type == 'nesterov':
+            # the current point has already been moved along step1
+            self.x -= step2
+            self.step += step2
+        else:
+            self.x -= step2
+            # the buffers are swapped rather than copied
+            self.step, self._buffer = step2, self.step
 
     def is_batch_end(self):
-        return (self.batch_size is None or self.batch_size == len(self.f.args()[0])
-                or (self.iter and not self.iter % self.n_batches))
+        return (self.batch_size is None or self.batch_size == self.f.args()[0].shape[0]
+                or (self.iter > self._batches_start_iter and
+                    not (self.iter - self._batches_start_iter) % self.n_batches))
 
     def is_verbose(self):
         return self.verbose and not self.epoch % self.verbose
+
+    def _stop_prefetch(self):
+        """Stop the background thread gathering the next mini batches, if any, keeping
+        the ones already gathered so that a later call to minimize resumes from them."""
+        if isinstance(self.batches, BatchPrefetcher):
+            self.batches.close()
+
+
+class BatchPrefetcher:
+    """
+    Iterate over the mini batches yielded by a generator while a background thread
+    gathers the next ones into a bounded queue, so that gathering the next mini batch,
+    during which numpy releases the GIL, overlaps with the computation of the current
+    step. The mini batches are yielded in the same order as the generator ones.
+    """
+
+    def __init__(self, batches, prefetch):
+        """
+
+        :param batches: the generator of the mini batches, which must not overwrite a mini
+                        batch before prefetch + 2 more ones have been gathered.
+        :param prefetch: (integer scalar): the maximum number of mini batches gathered in advance.
+        """
+        self.batches = batches
+        self.queue = queue.Queue(maxsize=prefetch)
+        self._pending = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _produce(self):
+        try:
+            while not self._stop.is_set():
+                batch = next(self.batches) if self._pending is None else self._pending
+                self._pending = batch
+                while not self._stop.is_set():
+                    try:
+                        # wake up periodically to check if the consumer has gone
+                        self.queue.put(batch, timeout=0.1)
+                        self._pending = None
+                        break
+                    except queue.Full:
+                        pass
+        except Exception as e:
+            self.queue.put(e)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._produce, daemon=True)
+            self._thread.start()
+        batch = self.queue.get()
+        if isinstance(batch, Exception):
+            raise batch
+        return batch
+
+    def close(self):
+        """Stop the background thread, which is restarted when the next mini batch is requested."""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._stop.clear()
+            self._thread = None
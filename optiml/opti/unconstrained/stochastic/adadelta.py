@@ -20,7 +20,9 @@ class AdaDelta(StochasticOptimizer):
                  callback_args=(),
                  shuffle=True,
                  random_state=None,
-                 verbose=False):
+                 prefetch=None,
+                 verbose=False,
+                 dtype=np.float64):
         super().__init__(f=f,
                          x=x,
                          step_size=step_size,
@@ -33,15 +35,21 @@ class AdaDelta(StochasticOptimizer):
                          callback_args=callback_args,
                          shuffle=shuffle,
                          random_state=random_state,
-                         verbose=verbose)
+                         prefetch=prefetch,
+                         verbose=verbose,
+                         dtype=dtype)
         if not 0 <= decay < 1:
             raise ValueError('decay has to lie in [0, 1)')
         self.decay = decay
         if not offset > 0:
             raise ValueError('offset must be > 0')
         self.offset = offset
-        self.gms = 0
-        self.sms = 0
+        self.gms = np.zeros_like(self.x)
+        self.sms = np.zeros_like(self.x)
+        self._rms_step = np.empty_like(self.x)
+        # the steps are computed into preallocated buffers, updated in place
+        self.step = np.zeros_like(self.x)
+        self._buffer = np.empty_like(self.x)
 
     def minimize(self):
 
@@ -52,7 +60,7 @@ class AdaDelta(StochasticOptimizer):
                 prev_v = np.inf
 
         for batch in self.batches:
-            self.f_x, self.g_x = self.f.function(self.x, *batch), self.f.jacobian(self.x, *batch)
+            self._evaluate(batch)
 
             if self.is_batch_end():
 
@@ -79,34 +87,34 @@ class AdaDelta(StochasticOptimizer):
                 self.status = 'stopped'
                 break
 
-            if self.momentum_type == 'standard':
-                step_m1 = self.step
-                step1 = self.momentum * step_m1
-            elif self.momentum_type == 'nesterov':
-                step_m1 = self.step
-                step1 = self.momentum * step_m1
-                self.x -= step1
+            self._momentum_step(batch)
 
-            self.g_x = self.f.jacobian(self.x, *batch)
-            self.gms = self.decay * self.gms + (1. - self.decay) * self.g_x ** 2
-            delta = np.sqrt(self.sms + self.offset) / np.sqrt(self.gms + self.offset) * self.g_x
+            self.gms *= self.decay
+            np.square(self.g_x, out=self._buffer)
+            self._buffer *= 1. - self.decay
+            self.gms += self._buffer
 
-            step2 = self.step_size * delta
+            # delta = sqrt(sms + offset) / sqrt(gms + offset) * g_x
+            step2 = np.add(self.gms, self.offset, out=self._buffer)
+            np.sqrt(step2, out=step2)
+            np.add(self.sms, self.offset, out=self._rms_step)
+            np.sqrt(self._rms_step, out=self._rms_step)
+            np.divide(self._rms_step, step2, out=step2)
+            step2 *= self.g_x
+            step2 *= self.step_size
 
-            if self.momentum_type == 'standard':
-                self.x -= step1 + step2
-            else:
-                self.x -= step2
+            self._update(step2)
 
-            if self.momentum_type != 'none':
-                self.step = step1 + step2
-            else:
-                self.step = step2
-
-            self.sms = self.decay * self.sms + (1. - self.decay) * self.step ** 2
+            # the buffer of step2 is free again once the step has been taken
+            self.sms *= self.decay
+            np.square(self.step, out=self._buffer)
+            self._buffer *= 1. - self.decay
+            self.sms += self._buffer
 
             self.iter += 1
 
+        self._stop_prefetch()
+
         if self.verbose:
             print('\n')
 
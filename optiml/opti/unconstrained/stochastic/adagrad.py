@@ -19,7 +19,9 @@ class AdaGrad(StochasticOptimizer):
                  callback_args=(),
                  shuffle=True,
                  random_state=None,
-                 verbose=False):
+                 prefetch=None,
+                 verbose=False,
+                 dtype=np.float64):
         super().__init__(f=f,
                          x=x,
                          step_size=step_size,
@@ -32,11 +34,16 @@ class AdaGrad(StochasticOptimizer):
                          callback_args=callback_args,
                          shuffle=shuffle,
                          random_state=random_state,
-                         verbose=verbose)
+                         prefetch=prefetch,
+                         verbose=verbose,
+                         dtype=dtype)
         if not offset > 0:
             raise ValueError('offset must be > 0')
         self.offset = offset
-        self.gms = 0
+        self.gms = np.zeros_like(self.x)
+        # the steps are computed into preallocated buffers, updated in place
+        self.step = np.zeros_like(self.x)
+        self._buffer = np.empty_like(self.x)
 
     def minimize(self):
 
@@ -47,7 +54,7 @@ class AdaGrad(StochasticOptimizer):
                 prev_v = np.inf
 
         for batch in self.batches:
-            self.f_x, self.g_x = self.f.function(self.x, *batch), self.f.jacobian(self.x, *batch)
+            self._evaluate(batch)
 
             if self.is_batch_end():
 
@@ -74,30 +81,22 @@ class AdaGrad(StochasticOptimizer):
                 self.status = 'stopped'
                 break
 
-            if self.momentum_type == 'standard':
-                step_m1 = self.step
-                step1 = self.momentum * step_m1
-            elif self.momentum_type == 'nesterov':
-                step_m1 = self.step
-                step1 = self.momentum * step_m1
-                self.x -= step1
+            self._momentum_step(batch)
 
-            self.g_x = self.f.jacobian(self.x, *batch)
-            self.gms += self.g_x ** 2
-            step2 = self.step_size * self.g_x / np.sqrt(self.gms + self.offset)
+            np.square(self.g_x, out=self._buffer)
+            self.gms += self._buffer
 
-            if self.momentum_type == 'standard':
-                self.x -= step1 + step2
-            else:
-                self.x -= step2
+            step2 = np.add(self.gms, self.offset, out=self._buffer)
+            np.sqrt(step2, out=step2)
+            np.divide(self.g_x, step2, out=step2)
+            step2 *= self.step_size
 
-            if self.momentum_type != 'none':
-                self.step = step1 + step2
-            else:
-                self.step = step2
+            self._update(step2)
 
             self.iter += 1
 
+        self._stop_prefetch()
+
         if self.verbose:
             print('\n')
 
@@ -23,7 +23,9 @@ class AMSGrad(StochasticOptimizer):
                  callback_args=(),
                  shuffle=True,
                  random_state=None,
-                 verbose=False):
+                 prefetch=None,
+                 verbose=False,
+                 dtype=np.float64):
         super().__init__(f=f,
                          x=x,
                          step_size=step_size,
@@ -36,15 +38,21 @@ class AMSGrad(StochasticOptimizer):
                          callback_args=callback_args,
                          shuffle=shuffle,
                          random_state=random_state,
-                         verbose=verbose)
+                         prefetch=prefetch,
+                         verbose=verbose,
+                         dtype=dtype)
         if not 0 <= beta1 < 1:
             raise ValueError('beta1 has to lie in [0, 1)')
         self.beta1 = beta1
-        self.est_mom1 = 0  # initialize 1st moment vector
+        self.est_mom1 = np.zeros_like(self.x)  # initialize 1st moment vector
         if not 0 <= beta2 < 1:
             raise ValueError('beta2 has to lie in [0, 1)')
         self.beta2 = beta2
-        self.est_mom2 = 0  # initialize 2nd moment vector
+        self.est_mom2 = np.zeros_like(self.x)  # initialize 2nd moment vector
+        self.max_est_mom2 = np.zeros_like(self.x)  # initialize the max of the 2nd moment vectors
+        # the steps are computed into preallocated buffers, updated in place
+        self.step = np.zeros_like(self.x)
+        self._buffer = np.empty_like(self.x)
         if not self.beta1 < np.sqrt(self.beta2):
             warnings.warn('constraint from convergence analysis for adam not satisfied')
         if not offset > 0:
@@ -59,10 +67,9 @@ class AMSGrad(StochasticOptimizer):
                 print('\t gap\t\t rate', end='')
                 prev_v = np.inf
 
-        est_mom2_crt = 0.
 
         for batch in self.batches:
-            self.f_x, self.g_x = self.f.function(self.x, *batch), self.f.jacobian(self.x, *batch)
+            self._evaluate(batch)
 
             if self.is_batch_end():
 
@@ -89,38 +96,31 @@ class AMSGrad(StochasticOptimizer):
                 self.status = 'stopped'
                 break
 
-            if self.momentum_type == 'standard':
-                step_m1 = self.step
-                step1 = self.momentum * step_m1
-            elif self.momentum_type == 'nesterov':
-                step_m1 = self.step
-                step1 = self.momentum * step_m1
-                self.x -= step1
+            self._momentum_step(batch)
 
-            est_mom1_m1 = self.est_mom1
-            est_mom2_m1 = self.est_mom2
-
-            self.g_x = self.f.jacobian(self.x, *batch)
-            self.est_mom1 = self.beta1 * est_mom1_m1 + (1. - self.beta1) * self.g_x  # update biased 1st moment estimate
+            # update biased 1st moment estimate
+            self.est_mom1 *= self.beta1
+            np.multiply(self.g_x, 1. - self.beta1, out=self._buffer)
+            self.est_mom1 += self._buffer
             # update biased 2nd raw moment estimate
-            self.est_mom2 = self.beta2 * est_mom2_m1 + (1. - self.beta2) * self.g_x ** 2
-
-            est_mom2_crt = np.maximum(self.est_mom2, est_mom2_crt)
+            self.est_mom2 *= self.beta2
+            np.square(self.g_x, out=self._buffer)
+            self._buffer *= 1. - self.beta2
+            self.est_mom2 += self._buffer
 
-            step2 = self.step_size * self.est_mom1 / (np.sqrt(est_mom2_crt) + self.offset)
+            np.maximum(self.est_mom2, self.max_est_mom2, out=self.max_est_mom2)
 
-            if self.momentum_type == 'standard':
-                self.x -= step1 + step2
-            else:
-                self.x -= step2
+            step2 = np.sqrt(self.max_est_mom2, out=self._buffer)
+            step2 += self.offset
+            np.divide(self.est_mom1, step2, out=step2)
+            step2 *= self.step_size
 
-            if self.momentum_type != 'none':
-                self.step = step1 + step2
-            else:
-                self.step = step2
+            self._update(step2)
 
             self.iter += 1
 
+        self._stop_prefetch()
+
         if self.verbose:
             print('\n')
 
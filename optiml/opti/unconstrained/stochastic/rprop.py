@@ -22,7 +22,9 @@ class RProp(StochasticOptimizer):
                  callback_args=(),
                  shuffle=True,
                  random_state=None,
-                 verbose=False):
+                 prefetch=None,
+                 verbose=False,
+                 dtype=np.float64):
         super().__init__(f=f,
                          x=x,
                          step_size=step_size,
@@ -35,7 +37,9 @@ class RProp(StochasticOptimizer):
                          callback_args=callback_args,
                          shuffle=shuffle,
                          random_state=random_state,
-                         verbose=verbose)
+                         prefetch=prefetch,
+                         verbose=verbose,
+                         dtype=dtype)
         self.min_step = min_step
         self.step_shrink = step_shrink
         self.step_grow = step_grow
@@ -52,7 +56,7 @@ class RProp(StochasticOptimizer):
                 prev_v = np.inf
 
         for batch in self.batches:
-            self.f_x, self.g_x = self.f.function(self.x, *batch), self.f.jacobian(self.x, *batch)
+            self._evaluate(batch)
 
             if self.is_batch_end():
 
@@ -86,11 +90,12 @@ class RProp(StochasticOptimizer):
                 step_m1 = self.step
                 step1 = self.momentum * step_m1
                 self.x -= step1
+                self.g_x = self.f.jacobian(self.x, *batch)
 
-            g_m1 = self.jacobian
-
-            self.jacobian = self.f.jacobian(self.x, *batch)
-            grad_prod = g_m1 * self.jacobian
+            grad_prod = self.jacobian * self.g_x
+            # the last jacobian is copied rather than referenced since
+            # f may return its gradient into the same buffer every time
+            np.copyto(self.jacobian, self.g_x)
 
             self.changes[grad_prod > 0] *= self.step_grow
             self.changes[grad_prod < 0] *= self.step_shrink
@@ -110,6 +115,8 @@ class RProp(StochasticOptimizer):
 
             self.iter += 1
 
+        self._stop_prefetch()
+
         if self.verbose:
             print('\n')
 
@@ -1,9 +1,59 @@
 import numpy as np
 import pytest
+import scipy.sparse as sp
+from scipy.sparse.linalg import aslinearoperator, spsolve
 
-from optiml.opti import quad1, quad2
+from optiml.opti import Quadratic, quad1, quad2, quad5
 from optiml.opti.unconstrained import Rosenbrock
-from optiml.opti.unconstrained.line_search import NonlinearConjugateGradient
+from optiml.opti.unconstrained.line_search import ConjugateGradient, NonlinearConjugateGradient
+from optiml.opti.utils import incomplete_cholesky
+
+
+def poisson_2d(m=20):
+    T = sp.diags([-np.ones(m - 1), 4 * np.ones(m), -np.ones(m - 1)], [-1, 0, 1])
+    S = sp.diags([-np.ones(m - 1), -np.ones(m - 1)], [-1, 1])
+    # the varying diagonal makes the Jacobi preconditioner useful too
+    return (sp.kron(sp.identity(m), T) + sp.kron(S, sp.identity(m)) + sp.diags(np.linspace(0, 100, m * m))).tocsr()
+
+
+def test_ConjugateGradient_quadratic():
+    for quad in (quad1, quad2, quad5):
+        opt = ConjugateGradient(f=quad, x=np.random.uniform(size=2)).minimize()
+        assert np.allclose(opt.x, quad.x_star())
+        # at most n iterations in exact arithmetic
+        assert opt.iter <= 2
+
+
+def test_ConjugateGradient_preconditioners():
+    Q = poisson_2d()
+    q = np.ones(Q.shape[0])
+    x_star = spsolve(Q.tocsc(), -q)
+    n_iter = {}
+    for preconditioner in (None, 'jacobi', 'ichol'):
+        for quad in (Quadratic(Q, q), Quadratic(Q.toarray(), q)):
+            opt = ConjugateGradient(f=quad, x=np.zeros(Q.shape[0]), preconditioner=preconditioner).minimize()
+            assert np.allclose(opt.x, x_star)
+            n_iter[preconditioner] = opt.iter
+    assert n_iter[None] > n_iter['jacobi'] > n_iter['ichol']
+    # Q is never needed to be dense
+    opt = ConjugateGradient(f=Quadratic(aslinearoperator(Q), q), x=np.zeros(Q.shape[0])).minimize()
+    assert np.allclose(opt.x, x_star)
+    with pytest.raises(ValueError):
+        ConjugateGradient(f=Quadratic(aslinearoperator(Q), q), x=np.zeros(Q.shape[0]), preconditioner='ichol')
+    with pytest.raises(TypeError):
+        ConjugateGradient(f=Rosenbrock(), x=np.zeros(2))
+
+
+def test_incomplete_cholesky():
+    Q = poisson_2d(m=5)
+    L = incomplete_cholesky(Q)
+    # L has the pattern of the lower triangle of Q, where L L^T matches Q
+    assert L.nnz == sp.tril(Q).nnz
+    pattern = Q.toarray() != 0
+    assert np.allclose(L.dot(L.T).toarray()[pattern], Q.toarray()[pattern])
+    # while it is the complete Cholesky factor of a dense matrix
+    L = incomplete_cholesky(Q.toarray())
+    assert np.allclose(L.dot(L.T), Q.toarray())
 
 
 def test_NonlinearConjugateGradient_quadratic_FletcherReeves():
@@ -1,9 +1,9 @@
 import numpy as np
 import pytest
 
-from optiml.opti import quad1, quad2
+from optiml.opti import Quadratic, quad1, quad2, quad4
 from optiml.opti.unconstrained import Rosenbrock
-from optiml.opti.unconstrained.line_search import Newton
+from optiml.opti.unconstrained.line_search import Newton, NewtonCG
 
 
 def test_quadratic():
@@ -16,5 +16,49 @@ def test_Rosenbrock():
     assert np.allclose(Newton(f=rosen, x=np.random.uniform(size=2)).minimize().x, rosen.x_star())
 
 
+def test_modified_cholesky():
+    H_work = np.empty((2, 2))
+    # the last Hessian is positive definite but its smallest eigenvalue is < delta
+    for quad in (quad1, quad4, Quadratic(Q=[[1., 0.], [0., 1e-8]], q=[0., 0.])):
+        newton = Newton(f=quad, x=np.zeros(2))
+        newton.H_x = quad.hessian(newton.x)
+        shift, (L, lower) = newton._modified_cholesky(H_work)
+        L = np.tril(L) if lower else np.triu(L).T
+        # the identity is added only if the smallest eigenvalue of the Hessian is < delta
+        assert (shift == 0.) == (np.linalg.eigvalsh(quad.Q).min() >= newton.delta)
+        assert np.allclose(L.dot(L.T), quad.Q + shift * np.identity(2))
+        assert np.linalg.eigvalsh(quad.Q + shift * np.identity(2)).min() >= newton.delta
+
+
+def test_NewtonCG_quadratic():
+    assert np.allclose(NewtonCG(f=quad1, x=np.random.uniform(size=2)).minimize().x, quad1.x_star())
+    assert np.allclose(NewtonCG(f=quad2, x=np.random.uniform(size=2)).minimize().x, quad2.x_star())
+
+
+def test_NewtonCG_Rosenbrock():
+    rosen = Rosenbrock(ndim=100)
+    assert np.allclose(NewtonCG(f=rosen, x=np.random.uniform(size=100)).minimize().x, rosen.x_star())
+
+
+def test_hessian_vector_product():
+    x, v = np.random.uniform(size=2), np.random.uniform(size=2)
+    for f in (quad1, Rosenbrock()):
+        assert np.allclose(f.hessian_vector_product(x, v), f.hessian(x).dot(v))
+
+
+def test_lazy_auto_derivatives():
+    x = np.random.uniform(size=2)
+    rosen = Rosenbrock()
+    assert rosen._auto_hess is None
+    rosen.hessian(x)
+    # the automatic Hessian is built once and then reused
+    auto_hess = rosen._auto_hess
+    rosen.hessian(x)
+    assert rosen._auto_hess is auto_hess
+    # the analytical derivatives of the quadratic functions never build it
+    Newton(f=quad2, x=x).minimize()
+    assert quad2._auto_jac is None and quad2._auto_hess is None
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -1,9 +1,9 @@
 import numpy as np
 import pytest
 
-from optiml.opti import quad1, quad2
+from optiml.opti import Quadratic, quad1, quad2
 from optiml.opti.unconstrained import Rosenbrock
-from optiml.opti.unconstrained.line_search import BFGS
+from optiml.opti.unconstrained.line_search import BFGS, LBFGS
 
 
 def test_quadratic():
@@ -16,5 +16,26 @@ def test_Rosenbrock():
     assert np.allclose(BFGS(f=rosen, x=np.random.uniform(size=2)).minimize().x, rosen.x_star())
 
 
+def test_LBFGS_quadratic():
+    assert np.allclose(LBFGS(f=quad1, x=np.random.uniform(size=2)).minimize().x, quad1.x_star())
+    assert np.allclose(LBFGS(f=quad2, x=np.random.uniform(size=2)).minimize().x, quad2.x_star())
+
+
+def test_LBFGS_Rosenbrock():
+    rosen = Rosenbrock()
+    assert np.allclose(LBFGS(f=rosen, x=np.random.uniform(size=2)).minimize().x, rosen.x_star())
+    # a history shorter than the number of iterations wraps around the ring buffers
+    assert np.allclose(LBFGS(f=rosen, x=np.random.uniform(size=2), mem=2).minimize().x, rosen.x_star())
+
+
+def test_LBFGS_skips_nonpositive_curvature_pairs():
+    # along the backtracking steps on an indefinite quadratic the curvature y^T s
+    # is null, so no pair is stored and the run goes on until it is unbounded
+    f = Quadratic(Q=[[1., 0.], [0., -1.]], q=[0., 0.])
+    lbfgs = LBFGS(f=f, x=np.ones(2), m2=0, m_inf=-1e3).minimize()
+    assert lbfgs.status == 'unbounded'
+    assert lbfgs.iter > 0 and lbfgs.n_pairs == 0
+
+
 if __name__ == "__main__":
     pytest.main()
@@ -0,0 +1,168 @@
+import tracemalloc
+
+import numpy as np
+import pytest
+
+from optiml.opti import Quadratic, OptimizationFunction
+from optiml.opti.unconstrained.stochastic import (StochasticGradientDescent, Adam, AMSGrad, AdaMax,
+                                                  AdaGrad, AdaDelta, RProp, RMSProp)
+
+
+class CountingQuadratic(Quadratic):
+
+    def __init__(self, Q, q):
+        super().__init__(Q, q)
+        self.n_f_eval = 0
+        self.n_g_eval = 0
+
+    def function(self, x):
+        self.n_f_eval += 1
+        return super().function(x)
+
+    def jacobian(self, x):
+        self.n_g_eval += 1
+        return super().jacobian(x)
+
+    def function_and_jacobian(self, x):
+        self.n_f_eval += 1
+        self.n_g_eval += 1
+        return super().function_and_jacobian(x)
+
+
+class LeastSquares(OptimizationFunction):
+
+    def __init__(self, X, y):
+        super().__init__(X.shape[1])
+        self.X = X
+        self.y = y
+
+    def args(self):
+        return self.X, self.y
+
+    def function(self, x, X_batch=None, y_batch=None):
+        return 0.5 * np.mean(np.square(X_batch.dot(x) - y_batch))
+
+    def jacobian(self, x, X_batch=None, y_batch=None):
+        return X_batch.T.dot(X_batch.dot(x) - y_batch) / X_batch.shape[0]
+
+
+def counting_quadratic(ndim=5, seed=0):
+    A = np.random.RandomState(seed).uniform(size=(ndim, ndim))
+    return CountingQuadratic(A.T.dot(A) + np.identity(ndim), np.ones(ndim))
+
+
+def test_one_jacobian_evaluation_per_step():
+    for optimizer in (StochasticGradientDescent, Adam, AMSGrad, AdaMax, AdaGrad, AdaDelta, RProp, RMSProp):
+        for momentum_type in ('none', 'standard', 'nesterov'):
+            quad = counting_quadratic()
+            opt = optimizer(f=quad, x=np.zeros(quad.ndim), epochs=50, momentum_type=momentum_type).minimize()
+            assert quad.n_g_eval <= opt.iter + 1
+
+
+def test_lazy_function_evaluation():
+    for optimizer in (StochasticGradientDescent, Adam, AMSGrad, AdaMax, AdaGrad, AdaDelta, RProp, RMSProp):
+        quad = counting_quadratic()
+        optimizer(f=quad, x=np.zeros(quad.ndim), epochs=50).minimize()
+        assert quad.n_f_eval == 0
+
+
+def test_mini_batches():
+    X = np.arange(46.).reshape(23, 2)
+    y = np.arange(23)
+    f = LeastSquares(X, y)
+    opt = StochasticGradientDescent(f=f, x=np.zeros(2), batch_size=5, random_state=1)
+    batches = opt.iter_mini_batches()
+    epochs = []
+    for epoch in range(3):
+        X_epoch, y_epoch, data = [], [], set()
+        for _ in range(opt.n_batches):
+            X_batch, y_batch = next(batches)
+            assert np.array_equal(X_batch[:, 0], 2 * y_batch)
+            X_epoch.append(X_batch.copy())
+            y_epoch.append(y_batch.copy())
+            data.add(X_batch.__array_interface__['data'][0])
+        # the batches are gathered into the same buffer every epoch
+        assert len(data) == 1
+        y_epoch = np.concatenate(y_epoch)
+        assert np.array_equal(np.sort(y_epoch), y)
+        epochs.append(y_epoch)
+    # the samples are shuffled one by one and with a different permutation every epoch
+    assert not np.array_equal(epochs[0], epochs[1])
+    assert not np.array_equal(np.sort(epochs[0][:5]), epochs[0][:5])
+    # and the permutations are reproducible given the random state
+    same_opt = StochasticGradientDescent(f=f, x=np.zeros(2), batch_size=5, random_state=1)
+    assert np.array_equal(np.concatenate([next(same_opt.batches)[1].copy() for _ in range(opt.n_batches)]), epochs[0])
+
+
+def test_mini_batches_without_shuffle():
+    X = np.arange(46.).reshape(23, 2)
+    y = np.arange(23)
+    opt = StochasticGradientDescent(f=LeastSquares(X, y), x=np.zeros(2), batch_size=5, shuffle=False)
+    for start in (0, 5, 10, 15, 20, 0):
+        X_batch, y_batch = next(opt.batches)
+        assert np.shares_memory(X_batch, X)
+        assert np.array_equal(y_batch, y[start:start + 5])
+
+
+def test_prefetched_mini_batches():
+    X = np.random.RandomState(0).uniform(size=(103, 4))
+    y = X.dot(np.arange(4.))
+    sync_opt = StochasticGradientDescent(f=LeastSquares(X, y), x=np.zeros(4), batch_size=10, random_state=2)
+    opt = StochasticGradientDescent(f=LeastSquares(X, y), x=np.zeros(4), batch_size=10, random_state=2, prefetch=3)
+    for i in range(5 * opt.n_batches):
+        if i % 7 == 0:
+            # the prefetching is stopped, e.g., at the end of minimize, and restarted on demand
+            opt._stop_prefetch()
+        X_batch, y_batch = next(opt.batches)
+        sync_X_batch, sync_y_batch = next(sync_opt.batches)
+        assert np.array_equal(X_batch, sync_X_batch)
+        assert np.array_equal(y_batch, sync_y_batch)
+    opt._stop_prefetch()
+
+    for optimizer in (StochasticGradientDescent, Adam):
+        sync_opt = optimizer(f=LeastSquares(X, y), x=np.zeros(4), batch_size=10, epochs=20, random_state=1).minimize()
+        opt = optimizer(f=LeastSquares(X, y), x=np.zeros(4), batch_size=10, epochs=20, random_state=1,
+                        prefetch=2).minimize()
+        assert np.array_equal(opt.x, sync_opt.x)
+        assert opt.batches._thread is None
+
+
+def test_in_place_updates():
+    X = np.random.RandomState(0).uniform(size=(10, 10000))
+    y = np.ones(10)
+    for optimizer in (Adam, AMSGrad, AdaMax, AdaGrad, AdaDelta, RMSProp):
+        for momentum_type in ('none', 'standard', 'nesterov'):
+            opt = optimizer(f=LeastSquares(X, y), x=np.zeros(10000), epochs=2, momentum_type=momentum_type).minimize()
+            opt.epochs = 10
+            tracemalloc.start()
+            opt.minimize()
+            # only the new gradient, i.e., X.T.dot(r) / n_samples, is allocated
+            # by f while the last one is still alive, the steps are in place
+            assert tracemalloc.get_traced_memory()[1] < 4 * opt.x.nbytes
+            tracemalloc.stop()
+
+    # the bias corrections folded into the step size give the textbook adam steps
+    quad = counting_quadratic()
+    x, m, v = np.zeros(quad.ndim), 0., 0.
+    for t in range(1, 51):
+        g = quad.jacobian(x)
+        m = 0.9 * m + 0.1 * g
+        v = 0.999 * v + 0.001 * g ** 2
+        x -= 0.001 * (m / (1 - 0.9 ** t)) / (np.sqrt(v / (1 - 0.999 ** t)) + 1e-8)
+    assert np.allclose(Adam(f=quad, x=np.zeros(quad.ndim), epochs=51).minimize().x, x)
+
+
+def test_float32_optimizers():
+    X = np.random.RandomState(0).uniform(size=(100, 4)).astype(np.float32)
+    y = X.dot(np.arange(4, dtype=np.float32))
+    for optimizer in (StochasticGradientDescent, Adam, AMSGrad, AdaMax, AdaGrad, AdaDelta, RProp, RMSProp):
+        for momentum_type in ('none', 'standard', 'nesterov'):
+            opt = optimizer(f=LeastSquares(X, y), x=np.zeros(4), batch_size=10, epochs=5,
+                            momentum_type=momentum_type, dtype=np.float32).minimize()
+            assert opt.x.dtype == np.float32
+            assert opt.g_x.dtype == np.float32
+            assert opt.step.dtype == np.float32
+
+
+if __name__ == "__main__":
+    pytest.main()
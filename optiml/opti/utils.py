@@ -1,15 +1,135 @@
-import matplotlib.pyplot as plt
 import numpy as np
-from matplotlib.colors import SymLogNorm
-from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+import scipy.sparse as sp
+from scipy.linalg import cholesky, cho_solve, solve_triangular
 
 
 # linear algebra utils
 
 def cholesky_solve(L, b):
     """Solve a symmetric positive definite linear
-    system L L.T x = b using Cholesky factorization"""
-    return np.linalg.solve(L.T, np.linalg.solve(L, b))
+    system L L.T x = b using Cholesky factorization,
+    i.e., by a pair of triangular solves in O(n^2)"""
+    return cho_solve((L, True), b, check_finite=False)
+
+
+def incomplete_cholesky(A, alpha=1e-3):
+    """
+    Compute the incomplete Cholesky factorization with zero fill-in, i.e., IC(0),
+    of a symmetric positive definite matrix A, that is the lower triangular L with
+    the same sparsity pattern of the lower triangle of A such that L L.T matches A
+    on that pattern. If a nonpositive pivot is met, the factorization is restarted
+    on A + alpha diag(A), doubling alpha until it succeeds. Since the pattern of a
+    dense matrix is full, its IC(0) is just its (complete) Cholesky factorization.
+    :param A: ([n x n] real symmetric matrix, dense or sparse): the matrix to factorize.
+    :param alpha: (real scalar, optional, default value 1e-3): the first relative
+                  shift of the diagonal of A used if the factorization breaks down.
+    :return: ([n x n] real lower triangular matrix): the factor L, sparse CSR if A is
+             sparse, dense otherwise.
+    """
+    if not sp.issparse(A):
+        A = np.asarray(A, dtype=float)
+        shift = 0.
+        while True:
+            try:
+                return cholesky(A + shift * np.diag(A.diagonal()), lower=True, check_finite=False)
+            except np.linalg.LinAlgError:
+                shift = max(2 * shift, alpha)
+
+    A = sp.tril(A, format='csc').astype(float)
+    A.sort_indices()
+    n = A.shape[0]
+    indptr, indices = A.indptr, A.indices
+    # the (column, position) of the strictly lower entries of each row of L
+    rows = [[] for _ in range(n)]
+    for k in range(n):
+        for pos in range(indptr[k], indptr[k + 1]):
+            if indices[pos] > k:
+                rows[indices[pos]].append((k, pos))
+
+    shift = 0.
+    w = np.zeros(n)  # dense work vector for the current column
+    while True:
+        data = A.data.copy()
+        for j in range(n):
+            start, end = indptr[j], indptr[j + 1]
+            if start == end or indices[start] != j:
+                raise ValueError('A must have a nonzero diagonal')
+            data[start] *= 1. + shift
+            w[indices[start:end]] = data[start:end]
+            # left-looking update by the previous columns with a nonzero in row j,
+            # whose entries out of the pattern of the column j are just dropped
+            for k, pos in rows[j]:
+                w[indices[pos:indptr[k + 1]]] -= data[pos:indptr[k + 1]] * data[pos]
+            col = w[indices[start:end]]
+            for k, pos in rows[j]:
+                w[indices[pos:indptr[k + 1]]] = 0.
+            w[indices[start:end]] = 0.
+            if col[0] <= 0:
+                break
+            data[start:end] = col / np.sqrt(col[0])
+        else:
+            return sp.csc_matrix((data, indices, indptr), shape=(n, n)).tocsr()
+        shift = max(2 * shift, alpha)
+
+
+def cholesky_update(L, v):
+    """
+    Update in place the lower triangular Cholesky factor L of A to the one of
+    A + v v.T by a sequence of Givens rotations, in O(n^2) instead of the O(n^3)
+    of a new factorization. The vector v is overwritten.
+    :param L: ([n x n] real lower triangular matrix): the Cholesky factor of A.
+    :param v: ([n x 1] real column vector): the vector of the rank-one update.
+    :return:  ([n x n] real lower triangular matrix): the updated factor L.
+    """
+    for i in range(L.shape[0]):
+        r = np.hypot(L[i, i], v[i])
+        c, s = r / L[i, i], v[i] / L[i, i]
+        L[i, i] = r
+        L[i + 1:, i] += s * v[i + 1:]
+        L[i + 1:, i] /= c
+        v[i + 1:] *= c
+        v[i + 1:] -= s * L[i + 1:, i]
+    return L
+
+
+def cholesky_add(L, a, alpha):
+    """
+    Compute the lower triangular Cholesky factor of the symmetric matrix
+    [[A, a], [a.T, alpha]] bordered by a new row and column, given the one
+    L of A, in O(n^2) by a single triangular solve.
+    :param L:     ([n x n] real lower triangular matrix): the Cholesky factor of A.
+    :param a:     ([n x 1] real column vector): the new column of A.
+    :param alpha: (real scalar): the new diagonal entry of A.
+    :return:      ([n+1 x n+1] real lower triangular matrix): the Cholesky factor
+                  of the bordered matrix.
+    :raise np.linalg.LinAlgError: if the bordered matrix is not positive definite.
+    """
+    n = L.shape[0]
+    l = solve_triangular(L, a, lower=True, check_finite=False) if n else np.empty(0)
+    d = alpha - l.dot(l)
+    if d <= 0:
+        raise np.linalg.LinAlgError('Matrix is not positive definite')
+    L_new = np.zeros((n + 1, n + 1))
+    L_new[:n, :n] = L
+    L_new[n, :n] = l
+    L_new[n, n] = np.sqrt(d)
+    return L_new
+
+
+def cholesky_delete(L, p):
+    """
+    Compute the lower triangular Cholesky factor of A without its p-th row and
+    column, given the one L of A, in O(n^2) by a rank-one update of the trailing
+    block of L by the removed column.
+    :param L: ([n x n] real lower triangular matrix): the Cholesky factor of A.
+    :param p: (integer scalar): the index of the row and column to remove.
+    :return:  ([n-1 x n-1] real lower triangular matrix): the Cholesky factor
+              of A without its p-th row and column.
+    """
+    v = L[p + 1:, p].copy()
+    L_new = np.delete(np.delete(L, p, axis=0), p, axis=1)
+    cholesky_update(L_new[p:, p:], v)
+    return L_new
 
 
 # bcqp generator
@@ -122,9 +242,14 @@ def generate_box_constrained_quadratic(ndim=2, actv=0.5, rank=1.1, ecc=0.99, ub_
     return Q, q, ub
 
 
-# plot functions
+# plot functions, which import matplotlib only when they are called
+# so that the linear algebra utils above do not depend on it
 
 def plot_surface_contour(f, opt, x_min, x_max, y_min, y_max):
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import SymLogNorm
+    from mpl_toolkits.mplot3d.art3d import Poly3DCollection
+
     X, Y = np.meshgrid(np.arange(x_min, x_max, 0.1), np.arange(y_min, y_max, 0.1))
 
     Z = np.array([f.function(np.array([x, y]))
@@ -180,6 +305,8 @@ def plot_surface_contour(f, opt, x_min, x_max, y_min, y_max):
 
 
 def plot_trajectory_optimization(f, opt, x_min, x_max, y_min, y_max):
+    import matplotlib.pyplot as plt
+
     fig = plot_surface_contour(f, opt, x_min, x_max, y_min, y_max)
     x0_history = opt['x0_history'] if isinstance(opt, dict) else opt.x0_history
     x1_history = opt['x1_history'] if isinstance(opt, dict) else opt.x1_history